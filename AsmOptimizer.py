@@ -1,86 +1,709 @@
-import re
+import time
+from collections import deque
+
+
+class Instruction:
+    """
+    一行汇编的结构化表示
+
+    标签行: label 为标签名（不含冒号），op 为 None；
+    其它行: op 为第一个词（指令助记符或伪指令），operands 为按逗号分开的操作数；
+    注释行 op 为 None。text 为该行文本，改写指令时重新生成。
+    """
+    __slots__ = ('op', 'operands', 'label', 'text', 'effects')
+
+    def __init__(self, op, operands=(), label=None, text=None):
+        self.op = op
+        self.operands = operands
+        self.label = label
+        if text is None:
+            text = f"{label}:" if label is not None else f"{op} {', '.join(operands)}" if operands else op
+        self.text = text
+        self.effects = None  # _effects 的结果，首次使用时计算
+
+    @classmethod
+    def parse(cls, line):
+        """
+        解析一行（已去除首尾空白）
+
+        Args:
+            line: 汇编文本行
+
+        Returns:
+            Instruction: 结构化的一行
+        """
+        if line.endswith(':') and ' ' not in line:
+            return cls(None, label=line[:-1], text=line)
+        if line.startswith(';'):
+            return cls(None, text=line)
+        parts = line.split(None, 1)
+        operands = tuple(operand.strip() for operand in parts[1].split(',')) if len(parts) > 1 else ()
+        return cls(parts[0], operands, text=line)
+
+
+def _is_memory(operand):
+    return operand.startswith('[') and operand.endswith(']')
+
+
+def _is_word(operand):
+    # 与 \w+ 相同: 寄存器名或数字
+    return operand.replace('_', 'a').isalnum()
+
+
+# 乘以 2 的幂 -> 左移位数
+SHIFTS = {'2': 1, '4': 2, '8': 3, '16': 4}
+
+
+# 寄存器名 -> 所属的 64 位寄存器
+REGISTERS = {}
+for _names in (("rax", "eax", "ax", "al", "ah"), ("rbx", "ebx", "bx", "bl", "bh"),
+               ("rcx", "ecx", "cx", "cl", "ch"), ("rdx", "edx", "dx", "dl", "dh"),
+               ("rsi", "esi", "si", "sil"), ("rdi", "edi", "di", "dil"),
+               ("rbp", "ebp", "bp", "bpl"), ("rsp", "esp", "sp", "spl")):
+    for _name in _names:
+        REGISTERS[_name] = _names[0]
+for _k in range(8, 16):
+    for _suffix in ("", "d", "w", "b"):
+        REGISTERS[f"r{_k}{_suffix}"] = f"r{_k}"
+
+# 只写目的操作数（第一个操作数）的指令；flags 的变化不影响下面的改写，
+# 因为改写只增删 push/pop/mov，它们都不读写 flags
+DEST_OPS = {'mov', 'movzx', 'movsx', 'movsxd', 'lea', 'add', 'sub', 'imul', 'and', 'or', 'xor',
+            'shl', 'shr', 'sar', 'neg', 'not', 'inc', 'dec'}
+# 只读操作数的指令
+READ_OPS = {'cmp', 'test', 'nop'}
+# 隐式写 rax/rdx 的指令
+WIDE_OPS = {'cqo': ('rdx',), 'cdq': ('rdx',), 'idiv': ('rax', 'rdx'), 'div': ('rax', 'rdx'),
+            'mul': ('rax', 'rdx')}
+SIZE_PREFIXES = ('qword ', 'dword ', 'word ', 'byte ')
+
+# 指令的类别
+PLAIN, STACK, BARRIER = 0, 1, 2
+
+# 条件跳转 -> 条件相反的跳转
+INVERSE_JUMPS = {}
+for _a, _b in (('jz', 'jnz'), ('je', 'jne'), ('jl', 'jge'), ('jle', 'jg'), ('jb', 'jae'),
+               ('jbe', 'ja'), ('js', 'jns'), ('jo', 'jno'), ('jp', 'jnp'), ('jc', 'jnc'),
+               ('jnge', 'jnl'), ('jng', 'jnle'), ('jnae', 'jnb'), ('jna', 'jnbe'), ('jpe', 'jpo')):
+    INVERSE_JUMPS[_a], INVERSE_JUMPS[_b] = _b, _a
+# 以标签为操作数的跳转
+JUMPS = {'jmp', 'jrcxz', 'jecxz', 'loop', 'loope', 'loopne'} | set(INVERSE_JUMPS)
+# 可以作为不可达代码删除的指令；伪指令和数据定义即使位于不可达处也保留
+INSTRUCTIONS = DEST_OPS | READ_OPS | set(WIDE_OPS) | JUMPS | {'push', 'pop', 'call', 'ret', 'leave'}
+
+
+def _memory(operand):
+    """内存操作数 -> 方括号内的地址，其它操作数返回 None"""
+    for prefix in SIZE_PREFIXES:
+        if operand.startswith(prefix):
+            operand = operand[len(prefix):].lstrip()
+            if operand.startswith('ptr '):
+                operand = operand[4:].lstrip()
+            break
+    if _is_memory(operand):
+        return operand[1:-1].strip()
+    return None
+
+
+def _frame_offset(address):
+    """形如 rbp - 8 的地址 -> -8，其它地址返回 None"""
+    address = address.replace(' ', '')
+    if address == 'rbp':
+        return 0
+    if address[:4] in ('rbp-', 'rbp+') and address[4:].isdigit():
+        return int(address[3:])
+    return None
+
+
+def _address_registers(address):
+    """地址中用到的 64 位寄存器（基址与变址），例如 rax + rcx*8 -> {rax, rcx}"""
+    for char in '+-*':
+        address = address.replace(char, ' ')
+    return {REGISTERS[word] for word in address.split() if word in REGISTERS}
+
+
+def _may_alias(a, b):
+    """两个地址指向的 8 字节是否可能重叠；不是 rbp 加常数的地址一律视为可能重叠"""
+    if a == b:
+        return True
+    x, y = _frame_offset(a), _frame_offset(b)
+    return x is None or y is None or abs(x - y) < 8
+
+
+def _effects(ins):
+    """
+    分析一条指令的副作用，结果记录在指令上
+
+    Returns:
+        tuple: (类别, 写入的 64 位寄存器, 写入的内存地址或 None)。类别为 BARRIER 时
+        （标签、跳转、调用、修改 rsp/rbp 或无法识别的指令）其余两项无意义。
+    """
+    if ins.effects is None:
+        ins.effects = _analyze(ins)
+    return ins.effects
+
+
+def _analyze(ins):
+    op = ins.op
+    if op is None:
+        return (BARRIER if ins.label is not None else PLAIN), (), None
+    operands = ins.operands
+    if any('rsp' in operand or operand == 'rbp' for operand in operands):
+        return BARRIER, (), None
+    if op == 'push':
+        return STACK, (), None
+    if op == 'pop':
+        register = REGISTERS.get(operands[0]) if len(operands) == 1 else None
+        return (STACK, (register,), None) if register else (BARRIER, (), None)
+    if op in READ_OPS:
+        return PLAIN, (), None
+    if op in WIDE_OPS or op == 'imul' and len(operands) == 1:
+        return PLAIN, WIDE_OPS.get(op, ('rax', 'rdx')), None
+    if (op in DEST_OPS or op.startswith('set')) and operands:
+        register = REGISTERS.get(operands[0])
+        if register:
+            return PLAIN, (register,), None
+        address = _memory(operands[0])
+        if address is not None:
+            return PLAIN, (), address
+    return BARRIER, (), None
+
+
+# 各改写规则的名称，optimize 的 stats["rules"] 按此顺序给出命中次数
+RULES = (
+    "redundant_push_pop",   # push X / pop X -> 删除
+    "store_load",           # mov [m], r / mov r, [m] -> 删掉取
+    "algebraic_identity",   # 加减 0、乘 1 -> 删除
+    "strength_reduction",   # 乘 2 的幂 -> 左移
+    "jump_to_next",         # jmp .L1 / .L1: -> 删掉 jmp
+    "push_pop_to_mov",      # push A ... pop B -> mov B, A 或删除
+    "store_forwarding",     # mov B, [m] -> mov B, R 或删除
+    "jump_threading",       # 跳转到 jmp 的跳转 -> 直接跳到最终目标
+    "branch_inversion",     # jz .L1 / jmp .L2 / .L1: -> jnz .L2 / .L1:
+    "unreachable_code",     # 删除 jmp/ret 之后到不了的指令
+    "dead_label",           # 删除没有被引用的局部标签
+)
+
+# 可单独启用的优化遍（按执行顺序），每个遍负责的规则:
+#   peephole          redundant_push_pop, store_load, algebraic_identity, strength_reduction, jump_to_next
+#   push_pop          push_pop_to_mov
+#   store_forwarding  store_forwarding
+#   control_flow      jump_threading, branch_inversion, unreachable_code, dead_label
+PASSES = ("peephole", "push_pop", "store_forwarding", "control_flow")
+
+
+def _is_local(label):
+    return label.startswith('.')
+
+
+def _jump_target(ins):
+    """跳转指令的目标（去掉 short/near）: 标签、寄存器或内存操作数，不是跳转时返回 None"""
+    if ins.op in JUMPS and len(ins.operands) == 1:
+        words = ins.operands[0].split(maxsplit=1)
+        return words[1] if len(words) == 2 and words[0] in ('short', 'near') else ins.operands[0]
+    return None
+
+
+def _jump_label(ins):
+    """跳转指令的目标标签；不是跳转或是间接跳转（目标为寄存器或内存）时返回 None"""
+    target = _jump_target(ins)
+    if target is None or target in REGISTERS or _memory(target) is not None:
+        return None
+    return target
+
+
+def _label_references(operand):
+    """操作数中可能引用局部标签的词，例如 lea rax, [rel .L3] 中的 .L3"""
+    if '.' not in operand:
+        return ()
+    for char in '[]+-*':
+        operand = operand.replace(char, ' ')
+    return [word for word in operand.split() if word.startswith('.')]
+
 
 class AsmOptimizer:
-    def __init__(self, asm_code):
-        # 预处理：按行分割，去除前后空格，保留非空行
-        self.lines = [line.strip() for line in asm_code.split('\n') if line.strip()]
+    def __init__(self, asm_code, passes=PASSES):
+        """
+        Args:
+            asm_code: 汇编文本
+            passes: 启用的优化遍（见 PASSES），执行顺序固定为 PASSES 中的顺序
+
+        Raises:
+            ValueError: 未知的优化遍
+        """
+        unknown = [name for name in passes if name not in PASSES]
+        if unknown:
+            raise ValueError(f"未知的汇编优化遍: {', '.join(unknown)}")
+        # 预处理：按行分割，去除前后空格，保留非空行，一次解析为结构化指令
+        self.lines = [Instruction.parse(line) for line in map(str.strip, asm_code.split('\n')) if line]
         self.original_count = len(self.lines)
+        self.pipeline = tuple(name for name in PASSES if name in passes)
+        self.hits = dict.fromkeys(RULES, 0)
+        self.passes = 0
+        # 每个遍累计的耗时与删除的行数
+        self.profile = {name: {"seconds": 0.0, "removed": 0} for name in self.pipeline}
 
     def optimize(self):
-        """执行多轮优化，直到不再产生变化或达到上限"""
-        passes = 0
-        changed = True
-        
-        while changed and passes < 10:
-            old_count = len(self.lines)
-            self._apply_rules()
-            changed = len(self.lines) < old_count
-            passes += 1
-        
-        optimized_code = "\n    ".join(self.lines) # 格式化输出，带缩进
+        """
+        用工作表把每个基本块优化到不动点
+
+        清单按标签切分为基本块，所有块先进入工作表。取出一个块后依次执行
+        窥孔规则、push/pop 配对和存储转发，块有任何改写就重新放回工作表，
+        直到所有块都不再变化；没有改动的块不会被重新扫描。工作表清空后再做
+        控制流化简，只把受影响的块放回工作表，重复到两者都不再变化。
+        只执行构造时启用的遍，stats["profile"] 给出每个遍的耗时与删除的行数。
+        """
+        # 先做一次控制流化简，不可达的代码不必再经过窥孔优化
+        result = self._control_flow(self.lines)
+        blocks = self._split_blocks(self.lines if result is None else result[0])
+        worklist = deque(range(len(blocks)))
+        queued = [True] * len(blocks)
+        visits = [0] * len(blocks)
+        total_visits = 0
+        while True:
+            total_visits += self._run_worklist(blocks, worklist, queued, visits)
+            # 控制流化简会合并块、使跳转与目标相邻，只把受影响的块放回工作表
+            result = self._control_flow([ins for block in blocks for ins in block])
+            if result is None:
+                break
+            lines, touched = result
+            blocks = self._split_blocks(lines)
+            worklist = deque(i for i, block in enumerate(blocks) if any(id(ins) in touched for ins in block))
+            queued = [False] * len(blocks)
+            for i in worklist:
+                queued[i] = True
+            visits = [0] * len(blocks)
+        self.lines = [ins for block in blocks for ins in block]
+
+        optimized_code = "\n    ".join(line.text for line in self.lines) # 格式化输出，带缩进
         return {
             "data": "    " + optimized_code,
             "stats": {
                 "original": self.original_count,
                 "optimized": len(self.lines),
                 "reduction": self.original_count - len(self.lines),
-                "passes": passes
+                "passes": self.passes,  # 收敛最慢的块被扫描的次数
+                "visits": total_visits,
+                "rules": dict(self.hits),
+                "profile": {name: dict(entry, seconds=round(entry["seconds"], 6))
+                            for name, entry in self.profile.items()},
             }
         }
 
-    def _apply_rules(self):
-        new_lines = []
-        i = 0
-        while i < len(self.lines):
-            line1 = self.lines[i]
-            line2 = self.lines[i+1] if i+1 < len(self.lines) else ""
-            line3 = self.lines[i+2] if i+2 < len(self.lines) else ""
-
-            # --- 模式 1: 消除冗余 push/pop ---
-            # push rax / pop rax -> 直接删除
-            match_push = re.match(r"push\s+(\w+)", line1)
-            match_pop = re.match(r"pop\s+(\w+)", line2)
-            if match_push and match_pop and match_push.group(1) == match_pop.group(1):
-                i += 2
-                continue
+    def _block_stages(self):
+        """启用的块内遍: (遍名, 方法)"""
+        methods = {"peephole": self._peephole, "push_pop": self._pair_push_pop,
+                   "store_forwarding": self._forward_stores}
+        return [(name, methods[name]) for name in self.pipeline if name in methods]
 
-            # --- 模式 2: 消除冗余加载 (Store-Load Elimination) ---
-            # mov [rbp-8], rax / mov rax, [rbp-8] -> 只保留存，删掉取
-            m1 = re.match(r"mov\s+(\[.*\]),\s*(\w+)", line1)
-            m2 = re.match(r"mov\s+(\w+),\s*(\[.*\])", line2)
-            if m1 and m2 and m1.group(1) == m2.group(2) and m1.group(2) == m2.group(1):
-                new_lines.append(line1)
-                i += 2
-                continue
+    def _control_flow(self, lines):
+        """启用 control_flow 时执行 _simplify_control_flow 并计时，否则返回 None"""
+        if "control_flow" not in self.profile:
+            return None
+        start = time.perf_counter()
+        result = self._simplify_control_flow(lines)
+        entry = self.profile["control_flow"]
+        entry["seconds"] += time.perf_counter() - start
+        if result is not None:
+            entry["removed"] += len(lines) - len(result[0])
+        return result
 
-            # --- 模式 3: 代数简化 (加减0, 乘除1) ---
-            if re.search(r"(add|sub)\s+\w+,\s*0", line1) or re.search(r"imul\s+\w+,\s*1", line1):
-                i += 1
+    def _run_worklist(self, blocks, worklist, queued, visits):
+        """处理工作表直到为空，返回本次访问块的次数"""
+        count = 0
+        stages = self._block_stages()
+        if not stages:
+            worklist.clear()
+            return count
+        profile = self.profile
+        clock = time.perf_counter
+        while worklist:
+            i = worklist.popleft()
+            queued[i] = False
+            visits[i] += 1
+            count += 1
+            self.passes = max(self.passes, visits[i])
+            block = blocks[i]
+            # 窥孔规则自身一次即到不动点；之后的两个阶段有改写时才可能
+            # 产生新的匹配，块需要再扫描一次
+            changed = False
+            for name, stage in stages:
+                start = clock()
+                result = stage(block)
+                entry = profile[name]
+                if result is not None:
+                    entry["removed"] += len(block) - len(result)
+                    block = result
+                    changed = name != "peephole"
+                if name == "peephole":
+                    # jmp .L1 / .L1: -> 删掉 jmp（条件跳转同样可以删除）；.L1 是下一个块的第一行
+                    target = blocks[i + 1][0].label if i + 1 < len(blocks) else None
+                    while (block and target is not None and (block[-1].op == 'jmp' or block[-1].op in INVERSE_JUMPS)
+                           and _jump_label(block[-1]) == target):
+                        block.pop()
+                        self.hits["jump_to_next"] += 1
+                        entry["removed"] += 1
+                entry["seconds"] += clock() - start
+            blocks[i] = block
+            if changed and not queued[i]:
+                worklist.append(i)
+                queued[i] = True
+        return count
+
+    def _simplify_control_flow(self, lines):
+        """
+        控制流化简，对整个清单重复执行到不再变化
+
+        建立标签（按所在函数区分局部标签）到行号的索引，然后
+        1. 跳转线程化: 目标处（跳过紧随的标签）是 jmp .L2 的跳转直接跳到 .L2，沿链走到底；
+        2. 条件反转: jcc .L1 / jmp .L2 / .L1: -> jncc .L2 / .L1:；
+        3. 从清单开头和每个函数标签出发沿顺序执行与跳转求可达性，删除到不了的指令；
+           遇到目标未知的跳转（如 jmp rax）时不做这一步；
+        4. 删除没有被任何操作数引用的局部标签，使前后两个块合并。
+
+        Returns:
+            tuple: (新的行列表, 受影响指令的 id 集合)，没有变化时返回 None
+        """
+        touched = set()
+        changed = False
+        while True:
+            scopes, index = self._label_index(lines)
+            hits = (self._thread_jumps(lines, scopes, index, touched)
+                    + self._invert_branches(lines, scopes, touched))
+            if hits:
+                lines = [ins for ins in lines if ins is not None]
+                scopes, index = self._label_index(lines)
+            reachable = self._reachable(lines, scopes, index)
+            if reachable is not None and not all(reachable):
+                kept = []
+                for ins, live in zip(lines, reachable):
+                    if live or ins.op is not None and ins.op not in INSTRUCTIONS:
+                        kept.append(ins)
+                    elif kept:
+                        touched.add(id(kept[-1]))
+                hits += len(lines) - len(kept)
+                self.hits["unreachable_code"] += len(lines) - len(kept)
+                lines = kept
+                scopes, index = self._label_index(lines)
+            hits += self._remove_dead_labels(lines, scopes, touched)
+            lines = [ins for ins in lines if ins is not None]
+            if not hits:
+                break
+            changed = True
+        return (lines, touched) if changed else None
+
+    @staticmethod
+    def _label_index(lines):
+        """
+        Returns:
+            tuple: (每行所在的函数名列表, {(函数名, 局部标签) 或 (None, 函数标签): 行号})
+        """
+        scopes = []
+        index = {}
+        scope = None
+        for i, ins in enumerate(lines):
+            label = ins.label
+            if label is not None:
+                if _is_local(label):
+                    index[(scope, label)] = i
+                else:
+                    scope = label
+                    index[(None, label)] = i
+            scopes.append(scope)
+        return scopes, index
+
+    @staticmethod
+    def _key(label, scope):
+        return (scope, label) if _is_local(label) else (None, label)
+
+    def _thread_jumps(self, lines, scopes, index, touched):
+        """跳转线程化，返回改写的条数；只沿目标为标签的跳转进行，间接跳转保持原样"""
+        count = 0
+        for i, ins in enumerate(lines):
+            target = _jump_label(ins)
+            if target is None:
                 continue
+            final = target
+            seen = {target}
+            while True:
+                position = index.get(self._key(final, scopes[i]))
+                if position is None:
+                    break
+                # 跳过目标处连续的局部标签和注释，找到第一条指令
+                j = position + 1
+                while j < len(lines) and lines[j].op is None and (
+                        lines[j].label is None or _is_local(lines[j].label)):
+                    j += 1
+                following = _jump_label(lines[j]) if j < len(lines) and lines[j].op == 'jmp' else None
+                if following is None:
+                    break
+                if following in seen:
+                    final = target  # 跳转构成环（死循环），保持原样
+                    break
+                seen.add(following)
+                final = following
+            if final != target:
+                lines[i] = Instruction(ins.op, (final,))
+                touched.add(id(lines[i]))
+                count += 1
+        self.hits["jump_threading"] += count
+        return count
+
+    def _invert_branches(self, lines, scopes, touched):
+        """jcc .L1 / jmp .L2 / .L1: -> jncc .L2 / .L1:，被删除的行置为 None；.L2 必须是标签"""
+        count = 0
+        for i in range(len(lines) - 2):
+            ins, jump, label = lines[i], lines[i + 1], lines[i + 2]
+            if (ins is not None and ins.op in INVERSE_JUMPS and jump is not None and jump.op == 'jmp'
+                    and label is not None and label.label is not None
+                    and _jump_label(ins) == label.label and _jump_label(jump) is not None):
+                lines[i] = Instruction(INVERSE_JUMPS[ins.op], (_jump_label(jump),))
+                lines[i + 1] = None
+                touched.add(id(lines[i]))
+                count += 1
+        self.hits["branch_inversion"] += count
+        return count
 
-            # --- 模式 4: 强度削弱 (乘 2, 4, 8 转换为移位) ---
-            m_mul = re.match(r"imul\s+(\w+),\s*(2|4|8|16)", line1)
-            if m_mul:
-                reg = m_mul.group(1)
-                val = int(m_mul.group(2))
-                shift = {2:1, 4:2, 8:3, 16:4}[val]
-                new_lines.append(f"shl {reg}, {shift}")
+    @staticmethod
+    def _reachable(lines, scopes, index):
+        """
+        每行是否可达；存在目标未知的跳转时返回 None
+
+        入口为清单开头、每个函数标签以及被跳转以外的操作数引用的局部标签。
+        """
+        count = len(lines)
+        reachable = [False] * count
+        entries = [0]
+        for i, ins in enumerate(lines):
+            if ins.label is not None and not _is_local(ins.label):
+                entries.append(i)
+            elif ins.op is not None and _jump_target(ins) is None:
+                for operand in ins.operands:
+                    for label in _label_references(operand):
+                        position = index.get((scopes[i], label))
+                        if position is not None:
+                            entries.append(position)
+        while entries:
+            i = entries.pop()
+            while i < count and not reachable[i]:
+                reachable[i] = True
+                ins = lines[i]
+                target = _jump_target(ins)
+                if target is not None:
+                    position = index.get(AsmOptimizer._key(target, scopes[i]))
+                    if position is None:
+                        if _is_local(target) or REGISTERS.get(target) or _memory(target) is not None:
+                            return None
+                    else:
+                        entries.append(position)
+                    if ins.op == 'jmp':
+                        break
+                elif ins.op == 'ret':
+                    break
                 i += 1
-                continue
+        return reachable
+
+    def _remove_dead_labels(self, lines, scopes, touched):
+        """删除没有被引用的局部标签（置为 None），返回删除的个数"""
+        referenced = set()
+        for i, ins in enumerate(lines):
+            for operand in ins.operands:
+                for label in _label_references(operand):
+                    referenced.add((scopes[i], label))
+        count = 0
+        for i, ins in enumerate(lines):
+            if ins.label is not None and _is_local(ins.label) and (scopes[i], ins.label) not in referenced:
+                lines[i] = None
+                if i > 0 and lines[i - 1] is not None:
+                    touched.add(id(lines[i - 1]))
+                count += 1
+        self.hits["dead_label"] += count
+        return count
+
+    @staticmethod
+    def _split_blocks(lines):
+        """按标签切分，每个标签开始一个新块"""
+        blocks = [[]]
+        for ins in lines:
+            if ins.label is not None and blocks[-1]:
+                blocks.append([])
+            blocks[-1].append(ins)
+        return [block for block in blocks if block]
+
+    def _peephole(self, block):
+        """
+        局部规则（模式 1~4）
+
+        逐条移入结果栈，每移入或改写一条就在栈顶重新匹配，删除后露出的
+        相邻指令立即得到再次匹配的机会，一次线性扫描即达到不动点。
+
+        Returns:
+            list: 改写后的块，没有变化时返回 None
+        """
+        hits = self.hits
+        out = []
+        changed = False
+        for ins in block:
+            out.append(ins)
+            while out:
+                last = out[-1]
+                op = last.op
+                operands = last.operands
+
+                # --- 模式 3: 代数简化 (加减0, 乘1) ---
+                if len(operands) == 2 and (
+                        (op == 'add' or op == 'sub') and operands[1] == '0'
+                        or op == 'imul' and operands[1] == '1'):
+                    out.pop()
+                    hits["algebraic_identity"] += 1
+                    changed = True
+                    continue
+
+                # --- 模式 4: 强度削弱 (乘 2, 4, 8, 16 转换为移位) ---
+                if op == 'imul' and len(operands) == 2 and operands[1] in SHIFTS:
+                    out[-1] = Instruction('shl', (operands[0], str(SHIFTS[operands[1]])))
+                    hits["strength_reduction"] += 1
+                    changed = True
+                    continue
+
+                if len(out) < 2:
+                    break
+                prev = out[-2]
 
-            # --- 模式 5: 消除连续跳转 ---
-            # jmp .L1 / .L1: -> 删掉 jmp
-            m_jmp = re.match(r"jmp\s+(\.\w+)", line1)
-            if m_jmp and line2 == f"{m_jmp.group(1)}:":
-                new_lines.append(line2)
-                i += 2
+                # --- 模式 1: 消除冗余 push/pop ---
+                # push rax / pop rax -> 直接删除
+                if (op == 'pop' and prev.op == 'push'
+                        and len(operands) == 1 and prev.operands == operands):
+                    del out[-2:]
+                    hits["redundant_push_pop"] += 1
+                    changed = True
+                    continue
+
+                # --- 模式 2: 消除冗余加载 (Store-Load Elimination) ---
+                # mov [rbp-8], rax / mov rax, [rbp-8] -> 只保留存，删掉取
+                stored = prev.operands
+                if (op == 'mov' and prev.op == 'mov'
+                        and len(stored) == 2 and _is_memory(stored[0]) and _is_word(stored[1])
+                        and operands == (stored[1], stored[0])):
+                    out.pop()
+                    hits["store_load"] += 1
+                    changed = True
+                    continue
+                break
+        return out if changed else None
+
+    def _pair_push_pop(self, block):
+        """
+        栈到寄存器: push A ... pop B -> mov B, A，A 与 B 相同时两条都删除
+
+        acc 用栈传递所有中间结果。按栈的嵌套关系为每个 pop 找到压入它的 push，
+        两者之间只要没有标签、跳转、调用和其它栈操作，且中间的指令不改写 A
+        （A 为寄存器时）或 A 所在的内存，pop 处的值就可以直接从 A 取得。
+        B 仍在 pop 的位置写入，mov 不影响 flags，因此其它寄存器、内存和 flags 都不变。
+
+        Returns:
+            list: 改写后的块，没有变化时返回 None
+        """
+        lines = list(block)
+        removed = [False] * len(lines)
+        pending = []  # 尚未配对的 push 的下标，栈顶为最近的一个
+        changed = False
+        for i, ins in enumerate(lines):
+            kind = _effects(ins)[0]
+            if kind == BARRIER:
+                pending.clear()
+            elif ins.op == 'push':
+                pending.append(i)
+            elif ins.op == 'pop' and pending:
+                k = pending.pop()
+                source, target = lines[k].operands[0], ins.operands[0]
+                if REGISTERS.get(target) != target or not self._can_forward(source, lines, k + 1, i, removed):
+                    continue
+                removed[k] = True
+                if source == target:
+                    removed[i] = True
+                else:
+                    lines[i] = Instruction('mov', (target, source))
+                self.hits["push_pop_to_mov"] += 1
+                changed = True
+        if not changed:
+            return None
+        return [ins for ins, dead in zip(lines, removed) if not dead]
+
+    @staticmethod
+    def _can_forward(source, lines, start, end, removed):
+        """
+        lines[start:end] 是否都不碰栈且不改写 source（64 位寄存器、qword 内存或立即数）；
+        source 为内存时，地址中的寄存器也不能被改写
+        """
+        register = REGISTERS.get(source)
+        address = _memory(source)
+        base = ()
+        if register is not None:
+            if register != source:
+                return False
+        elif address is not None:
+            if source.startswith(SIZE_PREFIXES[1:]):
+                return False
+            base = _address_registers(address)
+        elif not source.lstrip('-').isdigit():
+            return False
+        for j in range(start, end):
+            if removed[j]:
                 continue
+            kind, writes, store = _effects(lines[j])
+            if kind != PLAIN:
+                return False
+            if register is not None and register in writes or base and base.intersection(writes):
+                return False
+            if address is not None and store is not None and _may_alias(address, store):
+                return False
+        return True
 
-            # 无匹配模式，保留原样
-            new_lines.append(line1)
-            i += 1
-            
-        self.lines = new_lines
+    def _forward_stores(self, block):
+        """
+        存储转发: mov [m], R 之后，在 R 与 [m] 都没有被改写前，
+        mov B, [m] -> mov B, R，B 就是 R 时删除
+
+        只在基本块内进行。假设 acc 的栈帧布局: 局部变量位于 [rbp - k]，
+        在 sub rsp, 512 预留的空间内，push 不会覆盖它们。改写一个寄存器时，
+        既忘掉它持有的值，也忘掉地址中用到它的存储（如 [rax]）。
+
+        Returns:
+            list: 改写后的块，没有变化时返回 None
+        """
+        known = {}  # 地址 -> 持有该地址当前值的 64 位寄存器
+        new_lines = []
+        changed = False
+        for ins in block:
+            kind, writes, store = _effects(ins)
+            if kind == BARRIER:
+                known.clear()
+                new_lines.append(ins)
+                continue
+            operands = ins.operands
+            if known and ins.op == 'mov' and len(operands) == 2 and REGISTERS.get(operands[0]) == operands[0]:
+                address = _memory(operands[1])
+                register = known.get(address.replace(' ', '')) if address is not None else None
+                if register is not None and not operands[1].startswith(SIZE_PREFIXES[1:]):
+                    self.hits["store_forwarding"] += 1
+                    changed = True
+                    if register == operands[0]:
+                        continue
+                    ins = Instruction('mov', (operands[0], register))
+            if known:
+                for register in writes:
+                    for address in [a for a, r in known.items() if r == register or register in _address_registers(a)]:
+                        del known[address]
+            if store is not None:
+                if known:
+                    for address in [a for a in known if _may_alias(a, store)]:
+                        del known[address]
+                if ins.op == 'mov' and REGISTERS.get(operands[1]) == operands[1] \
+                        and not operands[0].startswith(SIZE_PREFIXES[1:]):
+                    known[store.replace(' ', '')] = operands[1]
+            new_lines.append(ins)
+        return new_lines if changed else None
 
 # --- 使用示例 ---
 # raw_asm = """
@@ -97,4 +720,4 @@ class AsmOptimizer:
 # optimizer = AsmOptimizer(raw_asm)
 # result = optimizer.optimize()
 # print(result["data"])
-# print(f"优化统计: {result['stats']}")
\ No newline at end of file
+# print(f"优化统计: {result['stats']}")
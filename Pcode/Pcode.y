@@ -3,6 +3,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdarg.h>
+#include "serve.h"
 
 extern int yylineno;
 extern char* yytext;
@@ -113,6 +114,7 @@ void leave_scope() {
 /* ========= P-code ========= */
 int label_cnt = 0;
 int new_label() { return label_cnt++; }
+int in_main = 0;  /* 当前函数是否为 main，决定 return 生成 STOP 还是 RET */
 
 void emit(const char* fmt, ...) {
     va_list args;
@@ -184,6 +186,7 @@ function
       {
           insert_symbol($1, 0, 0);
           emit("FUNC @%s", $1);
+          in_main = strcmp($1, "main") == 0;
           enter_scope();
       }
       '(' param_list ')' compound_stmt
@@ -257,8 +260,10 @@ INT_list
     ;
 
 
+/* return 在 main 中结束程序 (STOP)，在其他函数中返回 (RET)；
+ * 作为语句的调用之后用 POP 丢弃返回值，使每条语句结束时操作数栈为空 */
 stmt
-    : T_Return expr ';'       { }
+    : T_Return expr ';'       { emit(in_main ? "STOP" : "RET"); }
     | T_Int INT_list ';'      { }
     | T_Identifier '=' expr ';'   
       { 
@@ -267,7 +272,7 @@ stmt
         }
         emit("STO %s", $1); 
       }
-    | T_Identifier '(' arg_list ')' ';' { emit("CALL %s", $1); }
+    | T_Identifier '(' arg_list ')' ';' { emit("CALL %s", $1); emit("POP"); }
     | compound_stmt
     
     /* 解决悬空 else */
@@ -346,10 +351,19 @@ expr
 %%
 
 
-int main() {
+/* 处理一个完整的源程序，常驻模式下每个请求调用一次 */
+int run_once() {
+    has_errors = 0;
+    scope_top = -1;
+    label_cnt = 0;
+    while_top = -1;
     int status=yyparse();
     return status | has_errors;
 }
+
+int main(int argc, char* argv[]) {
+    return serve_main(argc, argv, run_once);
+}
 #include <stdarg.h>
 
 // 增强版 yyerror
@@ -3,6 +3,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdarg.h>
+#include "serve.h"
 
 extern int yylineno;
 extern char* yytext;
@@ -418,12 +419,24 @@ expr
 
 %%
 
-int main() {
+/* 处理一个完整的源程序，常驻模式下每个请求调用一次 */
+int run_once() {
+    has_errors = 0;
+    scope_top = -1;
+    label_cnt = 0;
+    while_top = -1;
+    current_func_stack_offset = 0;
+    current_param_idx = 0;
+    call_arg_count = 0;
     int status=yyparse();
     status|=has_errors;
     return status;
 }
 
+int main(int argc, char* argv[]) {
+    return serve_main(argc, argv, run_once);
+}
+
 void yyerror(const char* fmt, ...)
 {
     has_errors = 1;
@@ -436,5 +449,5 @@ void yyerror(const char* fmt, ...)
         fprintf(stderr, " (near '%s')", yytext);
     }
     fprintf(stderr, "\n");
-    exit(1);
+    serve_exit(1);
 }
\ No newline at end of file
@@ -0,0 +1,363 @@
+"""
+ASGI 异步服务入口
+
+与 main.py 提供相同的接口，但所有前端工具调用、程序构建与运行都以 asyncio
+子进程的方式等待，不占用线程；超时时结束子进程。适合大量并发连接的场景。
+
+运行方式（任意 ASGI 服务器均可）:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+配置（进程池大小、缓存等环境变量）与结果缓存来自 config.py，与 main.py 相同；
+本模块不依赖 Flask。
+"""
+import asyncio
+import json
+import subprocess
+
+from quadruple import PcodeToQuadsTranslator
+from config import (TOOLS, KEYWORDS, POOL_SIZE, cache, EXE_CACHE_DIR, EXE_CACHE_BYTES, RUN_CONCURRENCY,
+                    RUN_DIR, RUN_OUTPUT_BYTES, VM_MAX_STEPS, VM_ENGINE)
+from result_cache import tool_version
+from passes import PassManager, DEFAULT_LEVEL, normalize_level
+from pipeline import (compile_stages_async, compile_asm_async, FIELDS, BACKENDS, QUADS_BACKEND_SOURCES,
+                      ASM_OPTIMIZER_SOURCES)
+from runner import AsyncProgramRunner, BuildError, ExecutableCache, sse_event
+from vm import AsyncVMRunner, normalize_max_steps
+from worker_pool import AsyncToolRunner
+
+
+tools = AsyncToolRunner(TOOLS, pool_size=POOL_SIZE)
+
+
+async def run_stage(name, source_code, timeout=None):
+    """
+    调用前端工具（异步），结果按 (源代码, 工具名, 工具版本) 缓存
+
+    计算工具版本（哈希文件）与缓存的磁盘层读写都放到线程中，不阻塞事件循环。
+
+    Returns:
+        subprocess.CompletedProcess: 处理结果
+    """
+    version = await asyncio.to_thread(tool_version, TOOLS[name])
+    key = cache.key(source_code, name, version)
+    result = await asyncio.to_thread(cache.get, key)
+    if result is None:
+        result = await tools.run(name, source_code, timeout)
+        # 进程异常退出（返回码为负，见 worker_pool.crash_returncode）的结果不缓存
+        if result.returncode >= 0:
+            await asyncio.to_thread(cache.put, key, result)
+    return result
+
+
+exe_cache = ExecutableCache(EXE_CACHE_DIR, max_bytes=EXE_CACHE_BYTES)
+run_options = dict(
+    max_concurrency=RUN_CONCURRENCY,
+    workspace_root=RUN_DIR,
+    exe_cache=exe_cache,
+    max_output=RUN_OUTPUT_BYTES,
+)
+runner = AsyncProgramRunner(
+    lambda source_code, level=None: compile_asm_async(source_code, run_stage, "acc", timeout=10, level=level),
+    acc_path=TOOLS["acc"],
+    version_paths=ASM_OPTIMIZER_SOURCES,
+    **run_options,
+)
+# 各后端的运行器（见 pipeline.BACKENDS），共享可执行文件缓存
+runners = {
+    "acc": runner,
+    "quads": AsyncProgramRunner(
+        lambda source_code, level=None: compile_asm_async(source_code, run_stage, "quads", timeout=10, level=level),
+        acc_path=TOOLS["pcode"],
+        compile_step="pcode",
+        version_paths=QUADS_BACKEND_SOURCES,
+        **run_options,
+    ),
+}
+vm_runner = AsyncVMRunner(
+    lambda source_code: run_stage("pcode", source_code, timeout=10),
+    max_steps=VM_MAX_STEPS,
+    max_output=run_options["max_output"],
+    engine=VM_ENGINE,
+    version_paths=(TOOLS["pcode"],),
+)
+
+
+# ---------- 接口实现: 每个处理函数返回 (响应体, 状态码) ----------
+# 响应体为异步迭代器时按 server-sent events 流式发送
+
+def _level(body):
+    """请求中的优化级别（见 passes.LEVELS），未给出时为 None；未知级别时抛出 ValueError"""
+    return normalize_level(body.get("level"))
+
+
+def _failure(result):
+    """前端工具返回非零时的统一错误响应"""
+    return {
+        "success": False,
+        "error": result.stderr if result.stderr else "编译过程出错",
+        "returncode": result.returncode,
+        "raw_stderr": result.stderr,
+        "raw_stdout": result.stdout
+    }, 400
+
+
+async def keyword(body):
+    return KEYWORDS, 200
+
+
+async def check(body):
+    source_code = body["code"]
+    result = await run_stage("Lexical", source_code)
+    return {"success": True, "code": len(source_code), "data": json.loads(result.stdout)}, 200
+
+
+async def symbol_table(body):
+    source_code = body["code"]
+    result = await run_stage("symbol_table", source_code, timeout=10)
+    if result.returncode != 0:
+        return _failure(result)
+    data = json.loads(result.stdout.strip() if result.stdout else "{}")
+    return {"success": True, "code_length": len(source_code), "data": data}, 200
+
+
+async def pcode(body):
+    source_code = body["code"]
+    try:
+        level = _level(body)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    result = await run_stage("pcode", source_code, timeout=10)
+    if result.returncode != 0:
+        return _failure(result)
+    data = result.stdout
+    quads = await asyncio.to_thread(PcodeToQuadsTranslator().translate, data)
+    payload = {"success": True, "code": len(source_code), "pcode": data.split('\n'), "quads": quads}
+    if level is not None:
+        manager = PassManager(level)
+        quads["functions"] = await asyncio.to_thread(manager.optimize_quads, quads["functions"])
+        payload["optimization"] = manager.summary()
+    return payload, 200
+
+
+async def ast(body):
+    source_code = body["code"]
+    result = await run_stage("ast", source_code, timeout=10)
+    if result.returncode != 0:
+        return _failure(result)
+    return {"success": True, "code": len(source_code), "data": json.loads(result.stdout)}, 200
+
+
+async def asm(body):
+    source_code = body["code"]
+    backend = body.get("backend", "acc")
+    if backend not in BACKENDS:
+        return {"success": False, "error": f"未知的后端: {backend}"}, 400
+    try:
+        level = _level(body)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    result = await compile_asm_async(source_code, run_stage, backend, timeout=10, level=level)
+    if result.returncode != 0:
+        return _failure(result)
+    payload = {"success": True, "code": len(source_code), "data": result.stdout}
+    if level is not None:
+        payload["optimization"] = result.optimization
+    return payload, 200
+
+
+async def compile_all(body):
+    source_code = body["code"]
+    fields = body.get("fields") or list(FIELDS)
+    try:
+        data, errors = await compile_stages_async(source_code, fields, run_stage, timeout=10)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    return {"success": not errors, "code": len(source_code), "data": data, "errors": errors}, 200
+
+
+async def optimize(body):
+    source_asm = body.get("asm", "")
+    if not source_asm:
+        return {"success": False, "error": "No ASM code provided"}, 400
+    try:
+        manager = PassManager(_level(body) or DEFAULT_LEVEL)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    result = await asyncio.to_thread(manager.optimize_asm, source_asm)
+    return {"success": True, "optimized_asm": result["data"], "stats": result["stats"],
+            "optimization": manager.summary()}, 200
+
+
+async def run(body):
+    source_code = body["code"]
+    input_str = body.get("input_str", "")
+    mode = body.get("mode", "native")
+    try:
+        options = {"level": _level(body)}
+    except ValueError as e:
+        return {"success": False, "error": str(e)}, 400
+    if mode == "vm":
+        runner = vm_runner
+        try:
+            options["max_steps"] = normalize_max_steps(body.get("max_steps"), VM_MAX_STEPS)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}, 400
+    elif mode == "native":
+        backend = body.get("backend", "acc")
+        if backend not in runners:
+            return {"success": False, "error": f"未知的后端: {backend}"}, 400
+        runner = runners[backend]
+    else:
+        return {"success": False, "error": f"未知的运行方式: {mode}"}, 400
+    if body.get("stream"):
+        events = runner.stream(source_code, input_str, timeout=10, **options)
+        try:
+            await events.__anext__()  # 构建并启动程序
+        except BuildError as e:
+            payload, status = _failure(e.result)
+            payload["step"] = e.step
+            return payload, status
+        return events, 200
+    try:
+        result = await runner.run(source_code, input_str, timeout=10, **options)
+    except BuildError as e:
+        payload, status = _failure(e.result)
+        payload["step"] = e.step
+        return payload, status
+    if result.returncode != 0:
+        return _failure(result)
+    payload = {"success": True, "code": len(source_code), "data": result.stdout}
+    if mode == "vm":
+        payload["steps"] = result.steps
+    return payload, 200
+
+
+async def cache_stats(body):
+    return {"success": True, "stats": cache.stats(), "executables": runner.exe_cache.stats()}, 200
+
+
+async def workers(body):
+    return {"success": True, "pools": tools.stats()}, 200
+
+
+ROUTES = {
+    ("GET", "/keyword"): keyword,
+    ("POST", "/check"): check,
+    ("POST", "/symbol_table"): symbol_table,
+    ("POST", "/pcode"): pcode,
+    ("POST", "/ast"): ast,
+    ("POST", "/asm"): asm,
+    ("POST", "/compile"): compile_all,
+    ("POST", "/optimize"): optimize,
+    ("POST", "/run"): run,
+    ("GET", "/cache"): cache_stats,
+    ("GET", "/workers"): workers,
+}
+
+
+# ---------- ASGI 协议 ----------
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+]
+
+
+async def _send_json(send, payload, status):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *CORS_HEADERS,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stream(send, events):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            *CORS_HEADERS,
+        ],
+    })
+    try:
+        async for event, data in events:
+            text = sse_event(event, {"data": data} if event == "stdout" else data)
+            await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+    finally:
+        await events.aclose()
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await tools.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 应用入口"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method = scope["method"]
+    path = scope["path"].rstrip("/") or "/"
+
+    if method == "OPTIONS":
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        await _send_json(send, {"success": False, "error": "Not Found"}, 404)
+        return
+
+    raw = await _read_body(receive)
+    if raw is None:
+        return
+    try:
+        body = json.loads(raw) if raw else {}
+    except ValueError:
+        await _send_json(send, {"success": False, "error": "请求体不是合法的 JSON"}, 400)
+        return
+
+    try:
+        payload, status = await handler(body)
+    except KeyError:
+        payload, status = {"success": False, "error": "缺少code字段"}, 400
+    except subprocess.TimeoutExpired:
+        payload, status = {"success": False, "error": "处理超时"}, 408
+    except Exception as e:
+        payload, status = {"success": False, "error": f"服务器内部错误: {str(e)}"}, 500
+    if hasattr(payload, "__anext__"):
+        await _send_stream(send, payload)
+    else:
+        await _send_json(send, payload, status)
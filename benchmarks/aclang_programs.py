@@ -0,0 +1,400 @@
+"""
+aclang 合成程序生成器
+
+generate_program 按给定的规模与形状（函数个数、语句数、嵌套深度、表达式长度、
+循环次数）随机生成一棵语法树，Program 可以把它输出为
+    to_source  aclang 源代码
+    to_pcode   与 Pcode 前端（Pcode/Pcode.y）输出一致的 P-code
+    to_asm     与 acc 前端（acc/parser.y，System V 版本）输出一致的汇编
+前端工具不可用时，基准以后两者代替工具的输出。固定的语料（如 bench_code_quality
+的 CORPUS）直接用 Program 与 Function 写出语法树。
+
+生成的程序总能终止: 循环都是计数循环（循环变量只在循环末尾加一），函数只
+调用在它之前定义的函数；除数都是正的常量，乘方的指数是 0 到 3 的常量。
+"""
+import random
+
+
+# 二元运算符 -> P-code 指令
+BINARY = {
+    "+": "ADD", "-": "SUB", "*": "MUL", "/": "DIV",
+    "==": "EQ", "!=": "NE", "<": "LT", ">": "GT", "<=": "LE", ">=": "GE",
+    "||": "OR", "&&": "AND", "**": "POW",
+}
+ARITH_ASM = {"+": ["add rax, rbx"], "-": ["sub rax, rbx"], "*": ["imul rax, rbx"], "/": ["cqo", "idiv rbx"]}
+COMPARE_ASM = {"==": "sete", "!=": "setne", "<": "setl", ">": "setg", "<=": "setle", ">=": "setge"}
+ARG_REGS = ["rdi", "rsi", "rdx", "rcx", "r8", "r9"]
+
+# 预设的程序形状，--scale 按比例放大函数个数与语句数
+SHAPES = {
+    "many_functions": dict(functions=60, statements=8, depth=1, expr_size=3),
+    "deep_nesting": dict(functions=2, statements=3, depth=10, expr_size=2, loop_bias=0.6),
+    "long_expressions": dict(functions=4, statements=16, depth=1, expr_size=40),
+    "big_loops": dict(functions=4, statements=12, depth=3, expr_size=4, loop_bias=0.6, iterations=1000),
+}
+
+
+class Function:
+    """一个函数: 名字、形参、局部变量以及语句列表"""
+
+    def __init__(self, name, params, local_vars, body):
+        self.name = name
+        self.params = params
+        self.local_vars = local_vars
+        self.body = body
+
+
+class Program:
+    """
+    合成程序的语法树
+
+    表达式: ("num", 值) ("var", 名字) ("call", 函数名, [实参]) ("in",) ("bin", 运算符, 左, 右)
+    语句:   ("assign", 名字, 表达式) ("out", 表达式) ("expr_call", 函数名, [实参])
+            ("if", 条件, [语句], [语句] 或 None) ("while", 条件, [语句]) ("break",) ("return", 表达式)
+    """
+
+    def __init__(self, functions):
+        self.functions = functions
+
+    # ---------- aclang 源代码 ----------
+
+    def to_source(self):
+        out = []
+        for function in self.functions:
+            params = ", ".join(f"int {p}" for p in function.params)
+            out.append(f"{function.name}:int({params}) {{")
+            if function.local_vars:
+                out.append(f"    int {', '.join(function.local_vars)};")
+            self._source_block(function.body, out, 1)
+            out.append("}")
+        return "\n".join(out) + "\n"
+
+    def _source_block(self, stmts, out, indent):
+        pad = "    " * indent
+        for stmt in stmts:
+            kind = stmt[0]
+            if kind == "assign":
+                out.append(f"{pad}{stmt[1]} = {self._source_expr(stmt[2])};")
+            elif kind == "out":
+                out.append(f"{pad}outputInt({self._source_expr(stmt[1])});")
+            elif kind == "expr_call":
+                out.append(f"{pad}{stmt[1]}({', '.join(map(self._source_expr, stmt[2]))});")
+            elif kind == "if":
+                out.append(f"{pad}if ({self._source_expr(stmt[1])}) {{")
+                self._source_block(stmt[2], out, indent + 1)
+                if stmt[3] is not None:
+                    out.append(f"{pad}}} else {{")
+                    self._source_block(stmt[3], out, indent + 1)
+                out.append(f"{pad}}}")
+            elif kind == "while":
+                out.append(f"{pad}while ({self._source_expr(stmt[1])}) {{")
+                self._source_block(stmt[2], out, indent + 1)
+                out.append(f"{pad}}}")
+            elif kind == "break":
+                out.append(f"{pad}break;")
+            else:
+                out.append(f"{pad}return {self._source_expr(stmt[1])};")
+
+    def _source_expr(self, expr):
+        kind = expr[0]
+        if kind == "num":
+            return str(expr[1])
+        if kind == "var":
+            return expr[1]
+        if kind == "call":
+            return f"{expr[1]}({', '.join(map(self._source_expr, expr[2]))})"
+        if kind == "in":
+            return "inputInt()"
+        return f"({self._source_expr(expr[2])} {expr[1]} {self._source_expr(expr[3])})"
+
+    # ---------- P-code（Pcode/Pcode.y 的发射方式） ----------
+
+    def to_pcode(self):
+        out = []
+        labels = [0]
+        for function in self.functions:
+            main = function.name == "main"
+            out.append(f"FUNC @{function.name}")
+            out.extend(f"ARG {p}" for p in function.params)
+            out.extend(f"INT {v}" for v in function.local_vars)
+            self._pcode_block(function.body, out, labels, main, [])
+            out.append("STOP" if main else "RET")
+            out.append("END FUNC\n")
+        return "\n".join(out) + "\n"
+
+    def _pcode_block(self, stmts, out, labels, main, loops):
+        for stmt in stmts:
+            kind = stmt[0]
+            if kind == "assign":
+                self._pcode_expr(stmt[2], out)
+                out.append(f"STO {stmt[1]}")
+            elif kind == "out":
+                self._pcode_expr(stmt[1], out)
+                out.append("OUT")
+            elif kind == "expr_call":
+                for arg in stmt[2]:
+                    self._pcode_expr(arg, out)
+                out.append(f"CALL {stmt[1]}")
+                out.append("POP")
+            elif kind == "if":
+                self._pcode_expr(stmt[1], out)
+                skip = _new_label(labels)
+                out.append(f"JZ L{skip}")
+                self._pcode_block(stmt[2], out, labels, main, loops)
+                if stmt[3] is None:
+                    out.append(f"LABEL L{skip}")
+                else:
+                    end = _new_label(labels)
+                    out.append(f"JMP L{end}")
+                    out.append(f"LABEL L{skip}")
+                    self._pcode_block(stmt[3], out, labels, main, loops)
+                    out.append(f"LABEL L{end}")
+            elif kind == "while":
+                begin = _new_label(labels)
+                out.append(f"LABEL L{begin}")
+                self._pcode_expr(stmt[1], out)
+                end = _new_label(labels)
+                out.append(f"JZ L{end}")
+                self._pcode_block(stmt[2], out, labels, main, loops + [end])
+                out.append(f"JMP L{begin}")
+                out.append(f"LABEL L{end}")
+            elif kind == "break":
+                out.append(f"JMP L{loops[-1]}")
+            else:
+                self._pcode_expr(stmt[1], out)
+                out.append("STOP" if main else "RET")
+
+    def _pcode_expr(self, expr, out):
+        kind = expr[0]
+        if kind == "num":
+            out.append(f"LIT {expr[1]}")
+        elif kind == "var":
+            out.append(f"LOD {expr[1]}")
+        elif kind == "call":
+            for arg in expr[2]:
+                self._pcode_expr(arg, out)
+            out.append(f"CALL {expr[1]}")
+        elif kind == "in":
+            out.append("IN")
+        else:
+            self._pcode_expr(expr[2], out)
+            self._pcode_expr(expr[3], out)
+            out.append(BINARY[expr[1]])
+
+    # ---------- acc 汇编（acc/parser.y 的发射方式） ----------
+
+    def to_asm(self):
+        out = ["; Generated for Linux (System V ABI)", "default rel", "section .data",
+               '    fmt_out db "%ld", 10, 0', '    fmt_in  db "%ld", 0', "section .text",
+               "    extern printf, scanf", "    global main", ""]
+        labels = [0]
+        for function in self.functions:
+            # 形参与局部变量按声明顺序占用 [rbp - 8], [rbp - 16], ...
+            offsets = {name: 8 * (k + 1) for k, name in enumerate(function.params + function.local_vars)}
+            out.append(f"{function.name}:")
+            out += ["    push rbp", "    mov rbp, rsp", "    sub rsp, 512"]
+            for k, p in enumerate(function.params):
+                out.append(f"    mov [rbp - {offsets[p]}], {ARG_REGS[k]}")
+            self._asm_block(function.body, out, labels, offsets, [])
+            out += ["    leave", "    ret", ""]
+        return "\n".join(out) + "\n"
+
+    def _asm_block(self, stmts, out, labels, offsets, loops):
+        emit = lambda *lines: out.extend(f"    {line}" for line in lines)  # noqa: E731
+        for stmt in stmts:
+            kind = stmt[0]
+            if kind == "assign":
+                self._asm_expr(stmt[2], out, labels, offsets)
+                emit("pop rax", f"mov [rbp - {offsets[stmt[1]]}], rax")
+            elif kind == "out":
+                self._asm_expr(stmt[1], out, labels, offsets)
+                emit("pop rsi", "lea rdi, [fmt_out]", "xor al, al", "call printf")
+            elif kind == "expr_call":
+                # acc 的调用语句不把实参弹出到寄存器，原样保留这一行为
+                for arg in stmt[2]:
+                    self._asm_expr(arg, out, labels, offsets)
+                emit(f"call {stmt[1]}")
+            elif kind == "if":
+                self._asm_expr(stmt[1], out, labels, offsets)
+                skip = _new_label(labels)
+                emit("pop rax", "test rax, rax", f"jz .L{skip}")
+                self._asm_block(stmt[2], out, labels, offsets, loops)
+                if stmt[3] is None:
+                    out.append(f".L{skip}:")
+                else:
+                    end = _new_label(labels)
+                    emit(f"jmp .L{end}")
+                    out.append(f".L{skip}:")
+                    self._asm_block(stmt[3], out, labels, offsets, loops)
+                    out.append(f".L{end}:")
+            elif kind == "while":
+                begin = _new_label(labels)
+                out.append(f".L{begin}:")
+                self._asm_expr(stmt[1], out, labels, offsets)
+                end = _new_label(labels)
+                emit("pop rax", "test rax, rax", f"jz .L{end}")
+                self._asm_block(stmt[2], out, labels, offsets, loops + [end])
+                emit(f"jmp .L{begin}")
+                out.append(f".L{end}:")
+            elif kind == "break":
+                emit(f"jmp .L{loops[-1]}")
+            else:
+                self._asm_expr(stmt[1], out, labels, offsets)
+                emit("pop rax", "leave", "ret")
+
+    def _asm_expr(self, expr, out, labels, offsets):
+        emit = lambda *lines: out.extend(f"    {line}" for line in lines)  # noqa: E731
+        kind = expr[0]
+        if kind == "num":
+            emit(f"push {expr[1]}")
+        elif kind == "var":
+            emit(f"push qword [rbp - {offsets[expr[1]]}]")
+        elif kind == "call":
+            for arg in expr[2]:
+                self._asm_expr(arg, out, labels, offsets)
+            emit(*(f"pop {ARG_REGS[i]}" for i in reversed(range(len(expr[2])))))
+            emit(f"call {expr[1]}", "push rax")
+        elif kind == "in":
+            emit("lea rsi, [rbp - 512]", "lea rdi, [fmt_in]", "xor al, al", "call scanf", "push qword [rbp - 512]")
+        else:
+            op = expr[1]
+            self._asm_expr(expr[2], out, labels, offsets)
+            self._asm_expr(expr[3], out, labels, offsets)
+            if op in ARITH_ASM:
+                emit("pop rbx", "pop rax", *ARITH_ASM[op], "push rax")
+            elif op in COMPARE_ASM:
+                emit("pop rbx", "pop rax", "cmp rax, rbx", f"{COMPARE_ASM[op]} al", "movzx rax, al", "push rax")
+            elif op in ("&&", "||"):
+                first, end = _new_label(labels), _new_label(labels)
+                jump, value = ("jz", 0) if op == "&&" else ("jnz", 1)
+                emit("pop rbx", "pop rax", "test rax, rax", f"{jump} .L{first}",
+                     "test rbx, rbx", f"{jump} .L{first}", f"push {1 - value}", f"jmp .L{end}")
+                out.append(f".L{first}:")
+                emit(f"push {value}")
+                out.append(f".L{end}:")
+            else:
+                loop, even, done = _new_label(labels), _new_label(labels), _new_label(labels)
+                emit("pop rcx", "pop rsi", "mov rax, 1")
+                out.append(f".L{loop}:")
+                emit("test rcx, rcx", f"jz .L{done}", "test rcx, 1", f"jz .L{even}", "imul rax, rsi")
+                out.append(f".L{even}:")
+                emit("imul rsi, rsi", "shr rcx, 1", f"jmp .L{loop}")
+                out.append(f".L{done}:")
+                emit("push rax")
+
+
+def _new_label(labels):
+    labels[0] += 1
+    return labels[0] - 1
+
+
+class _Generator:
+    def __init__(self, rng, depth, expr_size, loop_bias, iterations, inputs):
+        self.rng = rng
+        self.depth = depth
+        self.expr_size = expr_size
+        self.loop_bias = loop_bias
+        self.iterations = iterations
+        self.inputs = inputs
+        self.callable = []  # (函数名, 形参个数)
+
+    def expr(self, names, size):
+        """约 size 个叶子的随机表达式"""
+        rng = self.rng
+        if size <= 1:
+            kind = rng.random()
+            if kind < 0.08 and self.callable:
+                name, arity = rng.choice(self.callable)
+                return ("call", name, [self.expr(names, 1) for _ in range(arity)])
+            if kind < 0.1 and self.inputs:
+                return ("in",)
+            if kind < 0.45:
+                return ("num", rng.randint(0, 100))
+            return ("var", rng.choice(names))
+        op = rng.choice(["+", "-", "*", "+", "-", "*", "/", "<", ">", "<=", ">=", "==", "!=", "&&", "||", "**"])
+        if op == "/":
+            return ("bin", op, self.expr(names, size - 1), ("num", rng.randint(1, 9)))
+        if op == "**":
+            return ("bin", op, self.expr(names, size - 1), ("num", rng.randint(0, 3)))
+        left = rng.randint(1, size - 1)
+        return ("bin", op, self.expr(names, left), self.expr(names, size - left))
+
+    def stmt(self, names, counters, depth, in_loop):
+        rng = self.rng
+        size = max(1, rng.randint(self.expr_size // 2, self.expr_size))
+        kind = rng.random()
+        if depth < self.depth and kind < self.loop_bias / 2:
+            # 计数循环: counter = 0; while (counter < N) { ...; counter = counter + 1; }
+            counter = counters[depth]
+            body = self.block(names, counters, depth + 1, True)
+            body.append(("assign", counter, ("bin", "+", ("var", counter), ("num", 1))))
+            bound = ("num", rng.randint(self.iterations // 2, self.iterations))
+            return [("assign", counter, ("num", 0)),
+                    ("while", ("bin", "<", ("var", counter), bound), body)]
+        if depth < self.depth and kind < self.loop_bias:
+            orelse = self.block(names, counters, depth + 1, in_loop) if rng.random() < 0.5 else None
+            return [("if", self.expr(names, size), self.block(names, counters, depth + 1, in_loop), orelse)]
+        if in_loop and kind < self.loop_bias + 0.03:
+            return [("if", self.expr(names, size), [("break",)], None)]
+        if kind < self.loop_bias + 0.15:
+            return [("out", self.expr(names, size))]
+        if kind < self.loop_bias + 0.18 and self.callable:
+            name, arity = rng.choice(self.callable)
+            return [("expr_call", name, [self.expr(names, 1) for _ in range(arity)])]
+        return [("assign", rng.choice(names), self.expr(names, size))]
+
+    def block(self, names, counters, depth, in_loop):
+        stmts = []
+        for _ in range(self.rng.randint(1, 3)):
+            stmts += self.stmt(names, counters, depth, in_loop)
+        return stmts
+
+    def function(self, name, statements):
+        rng = self.rng
+        params = [f"p{k}" for k in range(rng.randint(0, 3))] if name != "main" else []
+        local_vars = [f"v{k}" for k in range(6)]
+        counters = [f"i{k}" for k in range(self.depth)]
+        names = params + local_vars
+        body = [("assign", v, ("num", rng.randint(0, 9))) for v in local_vars]
+        for _ in range(statements):
+            body += self.stmt(names, counters, 0, False)
+        # main 的返回值是进程的退出码，固定为 0
+        body.append(("return", ("num", 0) if name == "main" else self.expr(names, 2)))
+        return Function(name, params, local_vars + counters, body)
+
+
+def generate_program(functions=10, statements=20, depth=2, expr_size=4, loop_bias=0.2,
+                     iterations=10, inputs=True, seed=0):
+    """
+    生成一个合成 aclang 程序
+
+    Args:
+        functions: 函数个数（最后一个为 main）
+        statements: 每个函数的顶层语句数
+        depth: if/while 的最大嵌套深度
+        expr_size: 表达式的叶子个数上限
+        loop_bias: 语句为 while/if 的概率（其中一半为 while）
+        iterations: 计数循环的次数上限
+        inputs: 表达式中是否出现 inputInt()
+        seed: 随机种子
+
+    Returns:
+        Program: 语法树，用 to_source / to_pcode / to_asm 输出
+    """
+    gen = _Generator(random.Random(seed), depth, expr_size, loop_bias, iterations, inputs)
+    result = []
+    for f in range(functions):
+        name = "main" if f == functions - 1 else f"f{f}"
+        function = gen.function(name, statements)
+        result.append(function)
+        gen.callable.append((name, len(function.params)))
+    return Program(result)
+
+
+def generate_shape(shape, scale=1.0, seed=0):
+    """按 SHAPES 中的预设生成程序，scale 放大函数个数与语句数"""
+    options = dict(SHAPES[shape])
+    options["functions"] = max(1, round(options["functions"] * scale))
+    options["statements"] = max(1, round(options["statements"] * scale))
+    return generate_program(seed=seed, **options)
+
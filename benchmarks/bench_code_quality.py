@@ -0,0 +1,378 @@
+"""
+生成代码质量基准: 各优化级别下程序的运行时间与静态/动态指令数
+
+用法:
+    python benchmarks/bench_code_quality.py [--program P ...] [--level L ...] [--scale X]
+        [--native-scale N] [--repeat R] [--no-native]
+
+语料 CORPUS 是几个以计算为主的 aclang 程序（循环、递归、乘方）。每个程序按 passes.LEVELS
+的每个优化级别构建，以固定输入运行，并检查输出与未经优化（O0）的程序一致:
+    vm      该级别的四元式流水线优化后在 CompiledVM 中运行；静态指令数为四元式条数，
+            动态指令数为执行的四元式条数 (steps)
+    acc     acc 的汇编经该级别的汇编优化遍后用 nasm/gcc 构建运行
+    quads   quads 后端: 该级别的四元式流水线 + codegen + 汇编优化遍
+vm 以 O0 的 CompiledVM 输出为参照。原生程序的输入按 --native-scale 放大，以 O0 的 acc 程序
+的输出为参照；静态指令数为汇编中的指令条数，动态指令数用 perf stat 统计用户态指令
+（没有 perf 时为 null）；没有 nasm 或 gcc 时跳过原生程序。
+
+运行时间取 --repeat 次中的最好成绩与中位数（秒），speedup 为同一后端 O0 与该级别
+最好成绩之比。P-code 与 acc 汇编优先取前端工具对 to_source 输出的源程序的编译结果，
+工具不可用时由语法树直接发射（inputs 字段注明来源）。结果以 JSON 输出；有输出不一致时退出码为 1。
+"""
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from AsmOptimizer import INSTRUCTIONS  # noqa: E402
+from aclang_programs import Function, Program  # noqa: E402
+from bench_pipeline import load_service, measure  # noqa: E402
+from codegen import X86Generator  # noqa: E402
+from passes import LEVELS, PassManager  # noqa: E402
+from quadruple import PcodeToQuadsTranslator  # noqa: E402
+from runner import BuildError, ProgramRunner  # noqa: E402
+from vm import CompiledProgram, CompiledVM  # noqa: E402
+
+
+def _expr(x):
+    """整数 -> 常量，字符串 -> 变量，其它原样返回"""
+    if isinstance(x, int):
+        return ("num", x)
+    if isinstance(x, str):
+        return ("var", x)
+    return x
+
+
+def _bin(left, op, right):
+    return ("bin", op, _expr(left), _expr(right))
+
+
+def _call(name, *args):
+    return ("call", name, [_expr(arg) for arg in args])
+
+
+def _assign(name, value):
+    return ("assign", name, _expr(value))
+
+
+def _return(value):
+    return ("return", _expr(value))
+
+
+def _if(condition, then, otherwise=None):
+    return ("if", condition, then, otherwise)
+
+
+def _while(condition, *body):
+    return ("while", condition, list(body))
+
+
+def _increment(name):
+    return _assign(name, _bin(name, "+", 1))
+
+
+IN = ("in",)
+
+# 语料以 aclang_programs 的语法树写出，由 to_source / to_pcode / to_asm 输出。
+# inputInt 与 outputInt 只出现在 main 的语句层，调用 scanf/printf 时 acc 的栈保持 16 字节对齐
+FIB = Program([
+    Function("fib", ["n"], [], [
+        _if(_bin("n", "<", 2), [_return("n")]),
+        _return(_bin(_call("fib", _bin("n", "-", 1)), "+", _call("fib", _bin("n", "-", 2)))),
+    ]),
+    Function("main", [], ["n"], [
+        _assign("n", IN),
+        ("out", _call("fib", "n")),
+        _return(0),
+    ]),
+])
+
+COLLATZ = Program([
+    Function("collatz", ["n"], ["c"], [
+        _assign("c", 0),
+        _while(_bin("n", ">", 1),
+               _if(_bin("n", "-", _bin(_bin("n", "/", 2), "*", 2)),
+                   [_assign("n", _bin(_bin(3, "*", "n"), "+", 1))],
+                   [_assign("n", _bin("n", "/", 2))]),
+               _increment("c")),
+        _return("c"),
+    ]),
+    Function("main", [], ["limit", "i", "s"], [
+        _assign("limit", IN),
+        _assign("s", 0),
+        _assign("i", 1),
+        _while(_bin("i", "<", "limit"),
+               _assign("s", _bin("s", "+", _call("collatz", "i"))),
+               _increment("i")),
+        ("out", _expr("s")),
+        _return(0),
+    ]),
+])
+
+PRIMES = Program([
+    Function("is_prime", ["n"], ["d", "r"], [
+        _if(_bin("n", "<", 2), [_return(0)]),
+        _assign("r", 1),
+        _assign("d", 2),
+        _while(_bin(_bin("d", "*", "d"), "<=", "n"),
+               _if(_bin(_bin("n", "-", _bin(_bin("n", "/", "d"), "*", "d")), "==", 0),
+                   [_assign("r", 0), ("break",)]),
+               _increment("d")),
+        _return("r"),
+    ]),
+    Function("main", [], ["n", "i", "count"], [
+        _assign("n", IN),
+        _assign("count", 0),
+        _assign("i", 0),
+        _while(_bin("i", "<", "n"),
+               _assign("count", _bin("count", "+", _call("is_prime", "i"))),
+               _increment("i")),
+        ("out", _expr("count")),
+        _return(0),
+    ]),
+])
+
+# s = s + (i + j) ** 3 / k - (i * j) ** 2 / (j + 1) + 2 ** (j / 8)
+POWER_SUMS = Program([
+    Function("main", [], ["n", "k", "i", "j", "s"], [
+        _assign("n", IN),
+        _assign("k", IN),
+        _assign("s", 0),
+        _assign("i", 0),
+        _while(_bin("i", "<", "n"),
+               _assign("j", 0),
+               _while(_bin("j", "<", 64),
+                      _assign("s", _bin(
+                          _bin(_bin("s", "+", _bin(_bin(_bin("i", "+", "j"), "**", 3), "/", "k")),
+                               "-", _bin(_bin(_bin("i", "*", "j"), "**", 2), "/", _bin("j", "+", 1))),
+                          "+", _bin(2, "**", _bin("j", "/", 8)))),
+                      _increment("j")),
+               _increment("i")),
+        ("out", _expr("s")),
+        _return(0),
+    ]),
+])
+
+# 重复的子表达式 i * 3 + 1 与 j * 5 + 2 留给公共子表达式消除
+_A = _bin(_bin("i", "*", 3), "+", 1)
+_B = _bin(_bin("j", "*", 5), "+", 2)
+GCD_GRID = Program([
+    Function("gcd", ["a", "b"], ["t"], [
+        _while(_bin("b", "!=", 0),
+               _assign("t", _bin("a", "-", _bin(_bin("a", "/", "b"), "*", "b"))),
+               _assign("a", "b"),
+               _assign("b", "t")),
+        _return("a"),
+    ]),
+    Function("main", [], ["n", "i", "j", "s"], [
+        _assign("n", IN),
+        _assign("s", 0),
+        _assign("i", 1),
+        _while(_bin("i", "<=", "n"),
+               _assign("j", 1),
+               _while(_bin("j", "<=", "n"),
+                      _if(_bin(_bin(_call("gcd", _A, _B), "==", 1), "&&",
+                               _bin(_bin(_A, "*", _B), ">", _bin("n", "*", 4))),
+                          [_assign("s", _bin(_bin("s", "+", _A), "-", _bin(_B, "/", 2)))]),
+                      _increment("j")),
+               _increment("i")),
+        ("out", _expr("s")),
+        _return(0),
+    ]),
+])
+
+# 程序名 -> (Program, scale -> 输入的各个整数)；--scale 按比例放大计算量
+CORPUS = {
+    "fib": (FIB, lambda scale: [22 + round(math.log(scale, (1 + 5 ** 0.5) / 2))]),
+    "collatz": (COLLATZ, lambda scale: [round(2000 * scale)]),
+    "primes": (PRIMES, lambda scale: [round(8000 * scale)]),
+    "power_sums": (POWER_SUMS, lambda scale: [round(400 * scale), 7]),
+    "gcd_grid": (GCD_GRID, lambda scale: [round(120 * scale ** 0.5)]),
+}
+
+BACKENDS = ("vm", "acc", "quads")
+MAX_STEPS = 1 << 40
+TIMEOUT = 120
+
+
+def static_instructions(asm):
+    """汇编中的指令条数（不含标签、伪指令与数据定义）"""
+    count = 0
+    for line in asm.splitlines():
+        fields = line.split(";", 1)[0].split()
+        if fields and fields[0].lower() in INSTRUCTIONS:
+            count += 1
+    return count
+
+
+def dynamic_instructions(exe_file, input_str):
+    """
+    用 perf stat 统计程序执行的用户态指令数
+
+    Returns:
+        int: 指令数；没有 perf 或 perf 无法计数（如容器内没有权限）时为 None
+    """
+    perf = shutil.which("perf")
+    if perf is None:
+        return None
+    result = subprocess.run(
+        [perf, "stat", "-x", ",", "-e", "instructions:u", "--", os.path.abspath(exe_file)],
+        input=input_str, capture_output=True, text=True, timeout=TIMEOUT
+    )
+    for line in result.stderr.splitlines():
+        fields = line.split(",")
+        if len(fields) > 2 and fields[2].startswith("instructions") and fields[0].isdigit():
+            return int(fields[0])
+    return None
+
+
+def native_toolchain():
+    """原生程序不可用的原因，可用时为 None"""
+    missing = [tool for tool in ("nasm", "gcc") if shutil.which(tool) is None]
+    return f"{', '.join(missing)} 不存在" if missing else None
+
+
+def front_end(service, program):
+    """程序的 P-code 与 acc 汇编，返回 (pcode, asm, 来源)"""
+    outputs = {}
+    if service is not None:
+        source = program.to_source()
+        for name in ("pcode", "acc"):
+            if os.path.exists(service.TOOLS[name]):
+                result = service.tools.run(name, source, timeout=60)
+                if result.returncode == 0:
+                    outputs[name] = result.stdout
+    pcode = outputs.get("pcode") or program.to_pcode()
+    asm = outputs.get("acc") or program.to_asm()
+    return pcode, asm, {"pcode": "tool" if "pcode" in outputs else "generated",
+                        "asm": "tool" if "acc" in outputs else "generated"}
+
+
+def run_vm(functions, input_str, repeat):
+    program = CompiledProgram(functions)
+    timing, result = measure(lambda n: CompiledVM(program, MAX_STEPS).run(input_str), repeat)
+    entry = {"static": sum(map(len, functions.values())), "dynamic": result.steps, "runtime": timing}
+    return entry, result
+
+
+def run_native(native, asm, input_str, repeat, workdir):
+    exe_file = native.build(asm, workdir)
+    timing, result = measure(lambda n: native.execute(exe_file, input_str, TIMEOUT), repeat)
+    entry = {"static": static_instructions(asm), "dynamic": dynamic_instructions(exe_file, input_str),
+             "runtime": timing}
+    return entry, result
+
+
+def bench_program(name, scale, native_scale, levels, repeat, service, native):
+    program, inputs = CORPUS[name]
+    input_str = " ".join(map(str, inputs(scale)))
+    pcode, acc_asm, origin = front_end(service, program)
+    with redirect_stdout(io.StringIO()):
+        functions = PcodeToQuadsTranslator().translate(pcode)["functions"]
+    expected = {"vm": CompiledVM(functions, MAX_STEPS).run(input_str).stdout, "native": None}
+    report = {"input": input_str, "inputs": origin, "output": expected["vm"].strip(), "levels": {}}
+    mismatches = []
+
+    # 原生程序比 CompiledVM 快得多，放大输入以免运行时间被进程启动开销淹没
+    native_input = " ".join(map(str, inputs(scale * native_scale)))
+    if native is not None:
+        report["native_input"] = native_input
+
+    workdir = tempfile.mkdtemp(prefix="aclang-bench-")
+    try:
+        for level in levels:
+            manager = PassManager(level)
+            optimized = manager.optimize_quads(functions)
+            runs = {"vm": lambda: run_vm(optimized, input_str, repeat)}
+            if native is not None:
+                def optimize_asm(asm):
+                    return manager.optimize_asm(asm)["data"] if manager.asm_passes else asm
+
+                runs["acc"] = lambda: run_native(native, optimize_asm(acc_asm), native_input, repeat, workdir)
+                runs["quads"] = lambda: run_native(
+                    native, optimize_asm(X86Generator().generate(optimized)), native_input, repeat, workdir)
+
+            entries = {}
+            for backend, run in runs.items():
+                try:
+                    entry, result = run()
+                except BuildError as e:
+                    entry, result = {"error": f"{e.step}: {e.result.stderr.strip()[:200]}"}, None
+                except subprocess.TimeoutExpired:
+                    entry, result = {"error": f"运行超过 {TIMEOUT} 秒"}, None
+                # 原生程序的参照输出是未经优化的 acc 程序（levels 的第一项 O0）的输出
+                kind = "vm" if backend == "vm" else "native"
+                ok = result is not None and result.returncode == 0
+                if ok and expected[kind] is None:
+                    expected[kind] = result.stdout
+                    report["native_output"] = result.stdout.strip()
+                entry["outputs_match"] = ok and result.stdout == expected[kind]
+                if not entry["outputs_match"]:
+                    mismatches.append(f"{name}/{level}/{backend}")
+                entries[backend] = entry
+            entries["optimize_seconds"] = manager.summary()["seconds"]
+            report["levels"][level] = entries
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # 各后端相对 O0 的加速比
+    baseline = report["levels"].get("O0", {})
+    for entries in report["levels"].values():
+        for backend in BACKENDS:
+            entry, base = entries.get(backend), baseline.get(backend)
+            if entry and base and "runtime" in entry and "runtime" in base:
+                entry["speedup"] = round(base["runtime"]["best"] / entry["runtime"]["best"], 3)
+    return report, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成代码质量基准")
+    parser.add_argument("--program", action="append", choices=sorted(CORPUS),
+                        help="语料中的程序，可重复给出，默认全部")
+    parser.add_argument("--level", action="append", choices=list(LEVELS),
+                        help="优化级别，可重复给出，默认全部")
+    parser.add_argument("--scale", type=float, default=1.0, help="程序输入规模（计算量）的倍数")
+    parser.add_argument("--native-scale", type=float, default=100.0,
+                        help="原生程序的输入规模相对 --scale 的倍数")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-native", action="store_true", help="只在 CompiledVM 中运行")
+    args = parser.parse_args()
+
+    # O0 总是最先运行: speedup 以它为基准，原生程序也以它的输出为参照
+    levels = ["O0"] + [level for level in args.level or LEVELS if level != "O0"]
+    reason = "--no-native" if args.no_native else native_toolchain()
+    native = None if reason else ProgramRunner(
+        lambda asm: subprocess.CompletedProcess(["asm"], 0, asm, ""), max_output=1 << 24)
+
+    service = load_service()
+    report = {
+        "scale": args.scale,
+        "native_scale": args.native_scale,
+        "repeat": args.repeat,
+        "native": reason or True,
+        "perf": shutil.which("perf") is not None,
+        "programs": {},
+    }
+    mismatches = []
+    for name in args.program or list(CORPUS):
+        report["programs"][name], failed = bench_program(name, args.scale, args.native_scale, levels, args.repeat, service, native)
+        mismatches += failed
+    if service is not None:
+        service.tools.close()
+    report["mismatches"] = mismatches
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
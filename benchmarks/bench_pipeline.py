@@ -0,0 +1,177 @@
+"""
+编译流水线延迟基准
+
+用法:
+    python benchmarks/bench_pipeline.py [--shape S ...] [--scale X] [--repeat R] [--no-endpoints]
+
+对每种形状的合成程序（见 aclang_programs.SHAPES: 多函数、深嵌套、长表达式、大循环）
+分别计时:
+    tools          各前端工具（Lexical / symbol_table / ast / pcode / acc）处理源程序，经 main.tools 的进程池
+    translate      PcodeToQuadsTranslator.translate
+    quad_optimize  QuadOptimizer.optimize（所有函数）
+    asm_optimize   AsmOptimizer.optimize
+    endpoints      经 Flask 测试客户端请求各接口；cold 每次请求不同的源程序（结果缓存未命中），
+                   warm 重复请求同一个源程序
+
+前端工具不存在时跳过该工具，translate 与 asm_optimize 改用生成器发射的 P-code 与汇编
+（inputs 字段注明来源）；无法导入 main（未安装 Flask）时跳过 tools 与 endpoints。
+每项给出 --repeat 次中的最好成绩与中位数（秒）。结果以 JSON 输出。
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from AsmOptimizer import AsmOptimizer  # noqa: E402
+from aclang_programs import SHAPES, generate_shape  # noqa: E402
+from optimizer import QuadOptimizer  # noqa: E402
+from quadruple import PcodeToQuadsTranslator  # noqa: E402
+
+
+# 名称 -> (路径, 请求体中除 code 以外的字段)；/optimize 的请求体另行给出汇编
+ENDPOINTS = {
+    "check": ("/check", {}),
+    "pcode": ("/pcode", {}),
+    "asm": ("/asm", {}),
+    "asm_quads": ("/asm", {"backend": "quads"}),
+    "compile": ("/compile", {}),
+    "optimize": ("/optimize", None),
+    "run_vm": ("/run", {"mode": "vm", "max_steps": 1_000_000, "input_str": " ".join(["7"] * 1000)}),
+}
+
+
+def load_service():
+    """
+    导入 main（工具路径相对于仓库根目录）
+
+    Returns:
+        module: main 模块，无法导入（如未安装 Flask）时为 None
+    """
+    os.chdir(ROOT)
+    try:
+        import main
+    except ImportError:
+        return None
+    return main
+
+
+def measure(func, repeat):
+    """
+    运行 repeat 次并计时；与 timeit 一样，计时期间关闭垃圾回收
+
+    func 接收第几次运行的序号。
+
+    Returns:
+        tuple: ({"best": 秒, "median": 秒}, 最后一次的返回值)
+    """
+    times = []
+    result = None
+    for n in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = func(n)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return {"best": round(min(times), 6), "median": round(statistics.median(times), 6)}, result
+
+
+def bench_tools(service, source, repeat):
+    """计时各前端工具，返回 (报告, {工具名: 成功时的输出})"""
+    report = {}
+    outputs = {}
+    for name, path in service.TOOLS.items():
+        if not os.path.exists(path):
+            report[name] = {"skipped": f"{path} 不存在"}
+            continue
+        service.tools.run(name, source, timeout=60)  # 启动常驻进程
+        timing, result = measure(lambda n: service.tools.run(name, source, timeout=60), repeat)
+        report[name] = dict(timing, returncode=result.returncode)
+        if result.returncode == 0:
+            outputs[name] = result.stdout
+    return report, outputs
+
+
+def bench_endpoints(service, source, asm, repeat):
+    """经 Flask 测试客户端计时各接口"""
+    client = service.app.test_client()
+    report = {}
+    for name, (path, fields) in ENDPOINTS.items():
+        def request(n, unique):
+            # 注释使每次 cold 请求的源程序不同，结果缓存与可执行文件缓存都不会命中
+            code = source + f"// cold {n}\n" if unique else source
+            body = {"asm": asm} if fields is None else dict(fields, code=code)
+            with redirect_stdout(io.StringIO()):
+                return client.post(path, json=body)
+
+        cold, response = measure(lambda n: request(n, True), repeat)
+        warm, _ = measure(lambda n: request(n, False), repeat)
+        report[name] = {"status": response.status_code, "cold": cold, "warm": warm}
+    return report
+
+
+def bench_shape(shape, scale, repeat, service, endpoints):
+    program = generate_shape(shape, scale)
+    source = program.to_source()
+    entry = {"source_lines": source.count("\n"), "source_bytes": len(source.encode("utf-8"))}
+    stages = {}
+
+    outputs = {}
+    if service is not None:
+        stages["tools"], outputs = bench_tools(service, source, repeat)
+    pcode = outputs.get("pcode") or program.to_pcode()
+    asm = outputs.get("acc") or program.to_asm()
+    entry["inputs"] = {"pcode": "tool" if "pcode" in outputs else "generated",
+                       "asm": "tool" if "acc" in outputs else "generated"}
+    entry["pcode_lines"] = pcode.count("\n")
+    entry["asm_lines"] = asm.count("\n")
+
+    def translate(n):
+        with redirect_stdout(io.StringIO()):
+            return PcodeToQuadsTranslator().translate(pcode)["functions"]
+
+    stages["translate"], functions = measure(translate, repeat)
+    stages["quad_optimize"], optimized = measure(
+        lambda n: {name: QuadOptimizer.optimize(quads) for name, quads in functions.items()}, repeat)
+    stages["asm_optimize"], result = measure(lambda n: AsmOptimizer(asm).optimize(), repeat)
+    entry["quads"] = {"before": sum(map(len, functions.values())), "after": sum(map(len, optimized.values()))}
+    entry["asm_optimized_lines"] = result["stats"]["optimized"]
+    entry["stages"] = stages
+
+    if endpoints:
+        entry["endpoints"] = bench_endpoints(service, source, asm, repeat)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编译流水线延迟基准")
+    parser.add_argument("--shape", action="append", choices=sorted(SHAPES),
+                        help="程序形状，可重复给出，默认全部")
+    parser.add_argument("--scale", type=float, default=1.0, help="函数个数与语句数的倍数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-endpoints", action="store_true", help="不经 Flask 测试客户端计时接口")
+    args = parser.parse_args()
+
+    service = load_service()
+    report = {"scale": args.scale, "repeat": args.repeat, "service": service is not None, "shapes": {}}
+    for shape in args.shape or list(SHAPES):
+        report["shapes"][shape] = bench_shape(
+            shape, args.scale, args.repeat, service, service is not None and not args.no_endpoints)
+    if service is not None:
+        service.tools.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
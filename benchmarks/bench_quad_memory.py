@@ -0,0 +1,93 @@
+"""
+四元式存储内存基准
+
+用法:
+    python benchmarks/bench_quad_memory.py [--size N]
+    python benchmarks/bench_quad_memory.py --baseline /path/to/old_quadruple.py
+
+用 tracemalloc 统计翻译完成后转换器仍持有的内存（四元式本身与操作数），
+以及 get_result 生成元组视图时额外分配的内存。--baseline 指向另一个版本的
+quadruple.py（例如逐条对象存储的旧版本），在同一份 Pcode 上对比。结果以 JSON 输出。
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quadruple import PcodeToQuadsTranslator  # noqa: E402
+from bench_translate import generate_pcode, load_translator  # noqa: E402
+
+
+def measure(translator_cls, pcode):
+    """
+    测量一次翻译的内存占用
+
+    Returns:
+        dict: quads 四元式条数, retained_bytes 转换器持有的字节数,
+              peak_bytes 翻译期间的峰值, result_view_bytes 元组视图的字节数, seconds 翻译耗时
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        translator = translator_cls()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            # translate 内部会调用 get_result，这里只保留转换器本身
+            translator.translate(pcode)
+        seconds = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        retained -= base
+        peak -= base
+
+        before_view = tracemalloc.get_traced_memory()[0]
+        result = translator.get_result()
+        view = tracemalloc.get_traced_memory()[0] - before_view
+    finally:
+        tracemalloc.stop()
+
+    quads = sum(len(q) for q in result["functions"].values())
+    return {
+        "quads": quads,
+        "retained_bytes": retained,
+        "bytes_per_quad": round(retained / quads, 1) if quads else None,
+        "peak_bytes": peak,
+        "result_view_bytes": view,
+        "seconds": round(seconds, 6),
+    }, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="四元式存储内存基准")
+    parser.add_argument("--functions", type=int, default=20)
+    parser.add_argument("--size", type=int, default=2000, help="每个函数的语句数")
+    parser.add_argument("--baseline", help="作为对照的另一个 quadruple.py")
+    args = parser.parse_args()
+
+    pcode = generate_pcode(args.functions, args.size)
+    candidates = [("current", PcodeToQuadsTranslator)]
+    if args.baseline:
+        candidates.insert(0, ("baseline", load_translator(args.baseline)))
+
+    report = {"results": {}}
+    outputs = {}
+    for name, cls in candidates:
+        report["results"][name], outputs[name] = measure(cls, pcode)
+    if args.baseline:
+        report["identical_output"] = outputs["baseline"] == outputs["current"]
+        report["retained_ratio"] = round(
+            report["results"]["current"]["retained_bytes"] / report["results"]["baseline"]["retained_bytes"], 3)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Pcode → 四元式翻译吞吐量基准
+
+用法:
+    python benchmarks/bench_translate.py [--size N] [--repeat R]
+    python benchmarks/bench_translate.py --baseline /path/to/old_quadruple.py
+
+--baseline 指向另一个版本的 quadruple.py（例如 git show <rev>:quadruple.py 导出的文件），
+两者在同一份 Pcode 上对比，并检查翻译结果一致。结果以 JSON 输出。
+"""
+import argparse
+import gc
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quadruple import PcodeToQuadsTranslator  # noqa: E402
+
+
+BINARY = ["ADD", "SUB", "MUL", "DIV", "GT", "LT", "GE", "LE", "EQ", "AND", "OR"]
+
+
+def generate_pcode(functions=20, statements=500, seed=0):
+    """
+    生成与 Pcode 前端输出格式一致的合成 Pcode
+
+    Args:
+        functions: 函数个数（最后一个为 main）
+        statements: 每个函数的语句数
+        seed: 随机种子
+
+    Returns:
+        str: Pcode 文本
+    """
+    rng = random.Random(seed)
+    out = []
+    label = 0
+    for f in range(functions):
+        name = "main" if f == functions - 1 else f"f{f}"
+        out.append(f"FUNC @{name}")
+        params = [f"p{k}" for k in range(rng.randint(0, 3))] if name != "main" else []
+        for p in params:
+            out.append(f"ARG {p}")
+        local_vars = [f"v{k}" for k in range(6)]
+        for v in local_vars:
+            out.append(f"INT {v}")
+        names = local_vars + params
+        for _ in range(statements):
+            kind = rng.random()
+            if kind < 0.15:
+                # while 循环骨架
+                begin, end = label, label + 1
+                label += 2
+                out += [f"LABEL L{begin}", f"LOD {rng.choice(names)}", "LIT 0", "GT", f"JZ L{end}",
+                        f"LOD {rng.choice(names)}", "LIT 1", "SUB", f"STO {rng.choice(local_vars)}",
+                        f"JMP L{begin}", f"LABEL L{end}"]
+                continue
+            # 赋值语句: 随机表达式
+            depth = rng.randint(1, 4)
+            out.append(f"LOD {rng.choice(names)}")
+            for _ in range(depth):
+                out.append(f"LIT {rng.randint(0, 99)}" if rng.random() < 0.4 else f"LOD {rng.choice(names)}")
+                out.append(rng.choice(BINARY))
+            out.append(f"STO {rng.choice(local_vars)}")
+        out.append("LIT 0")
+        out.append("STOP" if name == "main" else "RET")
+        out.append("END FUNC\n")
+    return "\n".join(out) + "\n"
+
+
+def count_instructions(pcode):
+    return sum(1 for line in pcode.split("\n") if line.strip())
+
+
+def load_translator(path):
+    """从指定文件加载 PcodeToQuadsTranslator"""
+    spec = importlib.util.spec_from_file_location("baseline_quadruple", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PcodeToQuadsTranslator
+
+
+def measure(translator_cls, pcode):
+    """
+    翻译一次并计时；与 timeit 一样，计时期间关闭垃圾回收
+
+    Returns:
+        tuple: (耗时秒数, 翻译结果)
+    """
+    translator = translator_cls()
+    sink = io.StringIO()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        with redirect_stdout(sink):
+            result = translator.translate(pcode)
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pcode → 四元式翻译吞吐量基准")
+    parser.add_argument("--functions", type=int, default=20)
+    parser.add_argument("--size", type=int, default=2000, help="每个函数的语句数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", help="作为对照的另一个 quadruple.py")
+    args = parser.parse_args()
+
+    pcode = generate_pcode(args.functions, args.size)
+    instructions = count_instructions(pcode)
+    report = {"instructions": instructions, "results": {}}
+
+    candidates = [("current", PcodeToQuadsTranslator)]
+    if args.baseline:
+        candidates.insert(0, ("baseline", load_translator(args.baseline)))
+
+    # 各版本交替运行，取各自的最好成绩，减少机器负载波动的影响
+    best = {name: float("inf") for name, _ in candidates}
+    outputs = {}
+    for _ in range(args.repeat):
+        for name, cls in candidates:
+            seconds, outputs[name] = measure(cls, pcode)
+            best[name] = min(best[name], seconds)
+
+    for name, _ in candidates:
+        seconds = best[name]
+        report["results"][name] = {
+            "seconds": round(seconds, 6),
+            "instructions_per_second": round(instructions / seconds),
+        }
+    if args.baseline:
+        report["identical_output"] = outputs["baseline"] == outputs["current"]
+        report["speedup"] = round(report["results"]["baseline"]["seconds"] / report["results"]["current"]["seconds"], 3)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
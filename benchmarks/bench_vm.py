@@ -0,0 +1,278 @@
+"""
+四元式执行引擎基准: 逐条解释 (QuadVM) 与编译执行 (CompiledVM) 对比
+
+用法:
+    python benchmarks/bench_vm.py [--scale N] [--repeat R] [--no-optimize]
+
+每个程序先翻译（默认再经 QuadOptimizer 优化）为四元式，两个引擎交替运行、
+各取最好成绩，并检查两者的输出与执行的四元式条数一致。编译耗时
+（CompiledProgram 的构造，每个程序只需一次）单独列出。结果以 JSON 输出。
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from optimizer import QuadOptimizer  # noqa: E402
+from quadruple import PcodeToQuadsTranslator  # noqa: E402
+from vm import CompiledProgram, CompiledVM, QuadVM  # noqa: E402
+
+
+def collatz(n):
+    """1..n 的 Collatz 步数之和: 循环、除法、分支与调用"""
+    return f"""FUNC @collatz
+ARG n
+INT c
+LIT 0
+STO c
+LABEL L0
+LOD n
+LIT 1
+GT
+JZ L1
+LOD n
+LOD n
+LIT 2
+DIV
+LIT 2
+MUL
+SUB
+JZ L2
+LOD n
+LIT 3
+MUL
+LIT 1
+ADD
+STO n
+JMP L3
+LABEL L2
+LOD n
+LIT 2
+DIV
+STO n
+LABEL L3
+LOD c
+LIT 1
+ADD
+STO c
+JMP L0
+LABEL L1
+LOD c
+RET
+END FUNC
+
+FUNC @main
+INT i
+INT s
+LIT 1
+STO i
+LIT 0
+STO s
+LABEL L4
+LOD i
+LIT {n}
+LT
+JZ L5
+LOD s
+LOD i
+CALL collatz
+ADD
+STO s
+LOD i
+LIT 1
+ADD
+STO i
+JMP L4
+LABEL L5
+LOD s
+OUT
+LIT 0
+STOP
+END FUNC
+"""
+
+
+def fib(n):
+    """递归 Fibonacci: 以函数调用为主"""
+    return f"""FUNC @fib
+ARG n
+LOD n
+LIT 2
+LT
+JZ L0
+LOD n
+RET
+LABEL L0
+LOD n
+LIT 1
+SUB
+CALL fib
+LOD n
+LIT 2
+SUB
+CALL fib
+ADD
+RET
+END FUNC
+
+FUNC @main
+LIT {n}
+CALL fib
+OUT
+LIT 0
+STOP
+END FUNC
+"""
+
+
+def nested(n):
+    """二重循环中的乘方、除法与输入: 以算术为主"""
+    return f"""FUNC @main
+INT i
+INT j
+INT s
+INT k
+IN
+STO k
+LIT 0
+STO s
+LIT 0
+STO i
+LABEL L0
+LOD i
+LIT {n}
+LT
+JZ L1
+LIT 0
+STO j
+LABEL L2
+LOD j
+LIT 100
+LT
+JZ L3
+LOD s
+LOD i
+LOD j
+ADD
+LIT 3
+POW
+LOD k
+DIV
+ADD
+LOD i
+LOD j
+MUL
+LIT 7
+LOD j
+LIT 1
+ADD
+DIV
+SUB
+ADD
+STO s
+LOD j
+LIT 1
+ADD
+STO j
+JMP L2
+LABEL L3
+LOD i
+LIT 1
+ADD
+STO i
+JMP L0
+LABEL L1
+LOD s
+OUT
+LIT 0
+STOP
+END FUNC
+"""
+
+
+PROGRAMS = {
+    "collatz": (collatz, 5000, ""),
+    "fib": (fib, 22, ""),
+    "nested": (nested, 300, "13"),
+}
+
+
+def load(pcode, optimize):
+    with redirect_stdout(io.StringIO()):
+        functions = PcodeToQuadsTranslator().translate(pcode)["functions"]
+    if optimize:
+        functions = {name: QuadOptimizer.optimize(quads) for name, quads in functions.items()}
+    return functions
+
+
+def measure(make_vm, input_str):
+    """
+    运行一次并计时；与 timeit 一样，计时期间关闭垃圾回收
+
+    Returns:
+        tuple: (耗时秒数, 运行结果)
+    """
+    vm = make_vm()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = vm.run(input_str)
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="四元式执行引擎基准")
+    parser.add_argument("--scale", type=float, default=1.0, help="各程序规模的倍数")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-optimize", action="store_true", help="不经 QuadOptimizer 优化")
+    args = parser.parse_args()
+
+    report = {"optimized": not args.no_optimize, "results": {}}
+    for name, (make_pcode, size, input_str) in PROGRAMS.items():
+        # fib 的规模按指数增长，只放大其它程序
+        size = size if name == "fib" else max(1, int(size * args.scale))
+        functions = load(make_pcode(size), not args.no_optimize)
+
+        start = time.perf_counter()
+        program = CompiledProgram(functions)
+        compile_seconds = time.perf_counter() - start
+
+        engines = {
+            "interpreter": lambda: QuadVM(functions, max_steps=1 << 62),
+            "compiled": lambda: CompiledVM(program, max_steps=1 << 62),
+        }
+        best = {engine: float("inf") for engine in engines}
+        results = {}
+        for _ in range(args.repeat):
+            for engine, make_vm in engines.items():
+                seconds, results[engine] = measure(make_vm, input_str)
+                best[engine] = min(best[engine], seconds)
+
+        steps = results["interpreter"].steps
+        entry = {"size": size, "steps": steps, "compile_seconds": round(compile_seconds, 6)}
+        for engine in engines:
+            entry[engine] = {
+                "seconds": round(best[engine], 6),
+                "steps_per_second": round(steps / best[engine]),
+            }
+        entry["identical_output"] = all(
+            (r.returncode, r.stdout, r.steps) == (results["interpreter"].returncode,
+                                                  results["interpreter"].stdout, steps)
+            for r in results.values())
+        entry["speedup"] = round(best["interpreter"] / best["compiled"], 3)
+        report["results"][name] = entry
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+控制流图模块
+
+把一个函数的四元式列表划分为基本块，建立块之间的前驱/后继关系，
+并能把（优化后的）基本块重新拼接为线性的四元式列表。
+
+四元式为 (op, arg1, arg2, result) 元组，控制流相关的四元式:
+    ('LABEL', '_', '_', L)   标签，总是基本块的开头
+    ('j', '_', '_', L)       无条件跳转
+    ('jz', cond, '_', L)     cond 为 0 时跳转，否则顺序执行
+    ('return', v, '_', '_')  函数返回
+    ('halt', '_', '_', '_')  程序结束
+"""
+
+# 结束基本块的四元式
+JUMP_OPS = frozenset(('j', 'jz'))
+EXIT_OPS = frozenset(('return', 'halt'))
+TERMINATOR_OPS = JUMP_OPS | EXIT_OPS
+
+
+class BasicBlock:
+    """基本块: 一段只能从开头进入、从结尾离开的四元式"""
+
+    __slots__ = ('index', 'label', 'quads', 'succs', 'preds')
+
+    def __init__(self, index, quads, label=None):
+        self.index = index  # 在 ControlFlowGraph.blocks 中的下标
+        self.label = label  # 块开头的标签名，没有则为 None
+        self.quads = quads  # 四元式列表
+        self.succs = []  # 后继块下标
+        self.preds = []  # 前驱块下标
+
+    @property
+    def terminator(self):
+        """块的最后一条四元式为跳转/返回时返回它，否则为 None"""
+        if self.quads and self.quads[-1][0] in TERMINATOR_OPS:
+            return self.quads[-1]
+        return None
+
+    def __repr__(self):
+        return f"BasicBlock({self.index}, label={self.label}, quads={len(self.quads)}, succs={self.succs})"
+
+
+class ControlFlowGraph:
+    """
+    一个函数的控制流图
+
+    blocks[0] 为入口块；块的顺序即线性代码中的顺序，顺序执行的后继总是下一个块。
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.label_index = {block.label: block.index for block in blocks if block.label is not None}
+        self.link()
+
+    @classmethod
+    def from_quads(cls, quads):
+        """
+        由四元式列表构建控制流图
+
+        Args:
+            quads: 四元式序列（列表、QuadBuffer 等）
+
+        Returns:
+            ControlFlowGraph: 控制流图
+        """
+        blocks = []
+        current = []
+        label = None
+        for quad in quads:
+            op = quad[0]
+            if op == 'LABEL':
+                # 标签开始新块（空的当前块直接沿用）
+                if current:
+                    blocks.append(BasicBlock(len(blocks), current, label))
+                    current = []
+                label = quad[3]
+                current.append(quad)
+            else:
+                current.append(quad)
+                if op in TERMINATOR_OPS:
+                    # 跳转/返回结束当前块
+                    blocks.append(BasicBlock(len(blocks), current, label))
+                    current = []
+                    label = None
+        if current or not blocks:
+            blocks.append(BasicBlock(len(blocks), current, label))
+        return cls(blocks)
+
+    def link(self):
+        """根据每个块的最后一条四元式重新计算前驱与后继"""
+        blocks = self.blocks
+        label_index = self.label_index
+        for block in blocks:
+            block.succs = []
+            block.preds = []
+        last = len(blocks) - 1
+        for block in blocks:
+            succs = block.succs
+            term = block.terminator
+            if term is None:
+                if block.index < last:
+                    succs.append(block.index + 1)
+            elif term[0] in JUMP_OPS:
+                target = label_index.get(term[3])
+                if term[0] == 'jz' and block.index < last:
+                    succs.append(block.index + 1)
+                # 跳转到不存在的标签时视为离开函数
+                if target is not None and target not in succs:
+                    succs.append(target)
+            for succ in succs:
+                blocks[succ].preds.append(block.index)
+
+    def successors(self, index):
+        return self.blocks[index].succs
+
+    def predecessors(self, index):
+        return self.blocks[index].preds
+
+    def postorder(self):
+        """
+        从入口块出发的深度优先后序（不含不可达块）
+
+        Returns:
+            list: 块下标列表
+        """
+        blocks = self.blocks
+        if not blocks:
+            return []
+        order = []
+        visited = bytearray(len(blocks))
+        visited[0] = 1
+        # 显式栈，避免长函数递归过深: (块下标, 下一个要访问的后继序号)
+        stack = [(0, 0)]
+        while stack:
+            index, i = stack[-1]
+            succs = blocks[index].succs
+            if i < len(succs):
+                stack[-1] = (index, i + 1)
+                succ = succs[i]
+                if not visited[succ]:
+                    visited[succ] = 1
+                    stack.append((succ, 0))
+            else:
+                stack.pop()
+                order.append(index)
+        return order
+
+    def reverse_postorder(self):
+        """逆后序，前向数据流分析的常用遍历顺序"""
+        order = self.postorder()
+        order.reverse()
+        return order
+
+    def reachable(self):
+        """从入口可达的块下标集合"""
+        return set(self.postorder())
+
+    def to_quads(self):
+        """
+        按块顺序拼接回线性四元式列表
+
+        Returns:
+            list: 四元式列表
+        """
+        quads = []
+        for block in self.blocks:
+            quads.extend(block.quads)
+        return quads
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+
+def build_cfg(quads):
+    """由四元式列表构建控制流图，等价于 ControlFlowGraph.from_quads"""
+    return ControlFlowGraph.from_quads(quads)
@@ -0,0 +1,641 @@
+"""
+四元式到 x86-64 汇编的代码生成模块
+
+把（经 QuadOptimizer 优化后的）四元式直接翻译为 NASM 汇编。调用约定、输入输出
+方式与 acc 一致（Linux/macOS 为 System V ABI，Windows 为 x64 ABI 并预留影子空间），
+生成的汇编可以用同样的 nasm/gcc 命令构建。
+
+与 acc 的栈式代码不同，这里对每个函数做线性扫描寄存器分配: 变量与临时变量按
+活跃区间分配到通用寄存器，跨越函数调用的区间只使用被调用者保存的寄存器，
+寄存器不够时溢出到栈帧。rax/rcx/rdx 不参与分配，留作指令选择的临时寄存器。
+"""
+import platform
+from bisect import bisect_left
+
+from cfg import ControlFlowGraph
+from dataflow import PURE_OPS, eliminate_dead_code, is_constant, is_variable, liveness, quad_def, quad_uses
+from optimizer import QuadOptimizer
+from quadruple import PcodeToQuadsTranslator
+
+
+# 调用约定: 参数寄存器、影子空间与可分配的寄存器
+SYSV_ABI = {
+    "name": "Linux/macOS (System V ABI)",
+    "arg_regs": ("rdi", "rsi", "rdx", "rcx", "r8", "r9"),
+    "shadow_space": 0,
+    "callee_saved": ("rbx", "r12", "r13", "r14", "r15"),
+    "caller_saved": ("rsi", "rdi", "r8", "r9", "r10", "r11"),
+}
+WIN64_ABI = {
+    "name": "Windows (x64 ABI)",
+    "arg_regs": ("rcx", "rdx", "r8", "r9"),
+    "shadow_space": 32,
+    "callee_saved": ("rbx", "rsi", "rdi", "r12", "r13", "r14", "r15"),
+    "caller_saved": ("r8", "r9", "r10", "r11"),
+}
+
+# 64 位寄存器 -> 低 32 位寄存器
+REG32 = {
+    "rax": "eax", "rbx": "ebx", "rcx": "ecx", "rdx": "edx", "rsi": "esi", "rdi": "edi",
+    "r8": "r8d", "r9": "r9d", "r10": "r10d", "r11": "r11d",
+    "r12": "r12d", "r13": "r13d", "r14": "r14d", "r15": "r15d",
+}
+
+# 比较运算 -> 条件码，及其取反、交换操作数后的条件码
+CONDITION_CODES = {'>': 'g', '<': 'l', '>=': 'ge', '<=': 'le', '==': 'e', '!=': 'ne'}
+NEGATED = {'g': 'le', 'l': 'ge', 'ge': 'l', 'le': 'g', 'e': 'ne', 'ne': 'e'}
+SWAPPED = {'g': 'l', 'l': 'g', 'ge': 'le', 'le': 'ge', 'e': 'e', 'ne': 'ne'}
+
+ARITH_INSNS = {'+': 'add', '-': 'sub', '*': 'imul'}
+
+# 会调用外部函数、破坏调用者保存寄存器的四元式
+CALL_OPS = frozenset(('call', 'in', 'out'))
+
+
+def _fits_imm32(value):
+    return -(1 << 31) <= value < (1 << 31)
+
+
+def _is_reg(location):
+    return location in REG32
+
+
+def _log2(operand):
+    """operand 为 2 的正整数次幂常量时返回指数，否则为 None"""
+    if not is_constant(operand):
+        return None
+    value = int(operand)
+    if value <= 0 or value & (value - 1):
+        return None
+    return value.bit_length() - 1
+
+
+def _live_intervals(cfg, live_in, live_out):
+    """
+    求每个变量在块线性顺序上的活跃区间
+
+    第 i 条四元式占两个位置: 2i 读操作数，2i+1 写结果。在某条四元式最后一次
+    被读取的变量与该四元式的结果区间不重叠，可以共用寄存器。
+
+    Returns:
+        tuple: (start, end, calls)，calls 为调用外部函数的四元式的读位置（升序）
+    """
+    start = {}
+    end = {}
+    calls = []
+
+    def extend(name, at):
+        if name not in start or at < start[name]:
+            start[name] = at
+        if name not in end or at > end[name]:
+            end[name] = at
+
+    # 形参在函数入口同时接收（并行传送），都从最后一条参数接收四元式处开始
+    quads = [quad for block in cfg.blocks for quad in block.quads]
+    params_end = 0
+    while params_end < len(quads) and quads[params_end][0] in ('func', 'param'):
+        params_end += 1
+
+    pos = 0
+    for block in cfg.blocks:
+        if not block.quads:
+            continue
+        first = pos
+        for quad in block.quads:
+            for name in quad_uses(quad):
+                extend(name, 2 * pos)
+            target = quad_def(quad)
+            if target is not None and is_variable(target):
+                extend(target, 2 * max(pos, params_end - 1) + 1 if quad[0] == 'param' else 2 * pos + 1)
+            if quad[0] in CALL_OPS:
+                calls.append(2 * pos)
+            pos += 1
+        # 跨块活跃: 区间延伸到块首/块尾
+        for name in live_in[block.index]:
+            extend(name, 2 * first)
+        for name in live_out[block.index]:
+            extend(name, 2 * pos - 1)
+    return start, end, calls
+
+
+def _fuse_copies(cfg, live_out):
+    """
+    t = a op b; x := t 且 t 此后不再活跃时，直接把结果写入 x，删除复制
+
+    循环变量的自增（i = i + 1 翻译为 t = i + 1; i := t）由此不再需要额外的寄存器与 mov。
+
+    Returns:
+        int: 删除的复制条数
+    """
+    fused = 0
+    for block in cfg.blocks:
+        quads = block.quads
+        # 逆向扫描找出源操作数此后不再活跃的复制
+        dead_after = set()
+        live = set(live_out[block.index])
+        for i in range(len(quads) - 1, -1, -1):
+            quad = quads[i]
+            if quad[0] == ':=' and is_variable(quad[1]) and quad[1] not in live:
+                dead_after.add(i)
+            target = quad_def(quad)
+            if target is not None:
+                live.discard(target)
+            live.update(quad_uses(quad))
+        if not dead_after:
+            continue
+        out = []
+        for i, quad in enumerate(quads):
+            if i in dead_after and out:
+                prev = out[-1]
+                if prev[3] == quad[1] and (prev[0] in PURE_OPS or prev[0] == 'call' or prev[0] == 'in'):
+                    out[-1] = (prev[0], prev[1], prev[2], quad[3])
+                    fused += 1
+                    continue
+            out.append(quad)
+        block.quads = out
+    return fused
+
+
+class X86Generator:
+    """四元式 -> NASM 汇编生成器"""
+
+    def __init__(self, windows=None):
+        """
+        Args:
+            windows: 是否按 Windows x64 ABI 生成，None 表示与当前平台一致
+        """
+        if windows is None:
+            windows = platform.system() == "Windows"
+        self.abi = WIN64_ABI if windows else SYSV_ABI
+        self.lines = []
+        self.loc = {}  # 变量 -> 寄存器或栈槽
+        self.frame_slots = 0  # 当前函数已使用的栈槽数
+        self.saved = []  # 当前函数使用的被调用者保存寄存器 [(寄存器, 栈槽)]
+        self.label_counter = 0  # 生成的内部标签计数
+
+    def generate(self, functions):
+        """
+        生成整个程序的汇编
+
+        Args:
+            functions: {函数名: 四元式列表}，即 PcodeToQuadsTranslator 结果中的 functions
+
+        Returns:
+            str: NASM 汇编文本
+        """
+        self.lines = [
+            f"; Generated for {self.abi['name']}",
+            "default rel",
+            "section .data",
+            '    fmt_out db "%ld", 10, 0',
+            '    fmt_in  db "%ld", 0',
+            "section .text",
+            "    extern printf, scanf",
+            "    global main",
+            "",
+        ]
+        self.label_counter = 0
+        for name, quads in functions.items():
+            self.generate_function(name, quads)
+        return "\n".join(self.lines) + "\n"
+
+    def generate_function(self, name, quads):
+        """生成一个函数的汇编，追加到 self.lines"""
+        cfg = ControlFlowGraph.from_quads(quads)
+        # 区间基于强活跃性，先删除死代码，保证每个被读取的变量都持有有效值
+        eliminate_dead_code(cfg, frozenset())
+        live_in, live_out = liveness(cfg, frozenset())
+        if _fuse_copies(cfg, live_out):
+            live_in, live_out = liveness(cfg, frozenset())
+        self._allocate(cfg, live_in, live_out)
+
+        emit = self.lines.append
+        emit(f"{self._symbol(name)}:")
+        emit("    push rbp")
+        emit("    mov rbp, rsp")
+        in_slot = None
+        if any(quad[0] == 'in' for block in cfg.blocks for quad in block.quads):
+            # scanf 的输入缓冲区
+            in_slot = self._new_slot()
+        frame = 8 * self.frame_slots
+        frame += frame % 16
+        if frame:
+            emit(f"    sub rsp, {frame}")
+        for reg, slot in self.saved:
+            emit(f"    mov {slot}, {reg}")
+        self._receive_params(cfg)
+
+        # 不可达的块（如 return 之后前端补充的 RET）不生成代码
+        reachable = cfg.reachable()
+        blocks = [block for block in cfg.blocks if block.index in reachable]
+        pending_args = []
+        falls_through = True  # 控制能否顺序执行到当前位置
+        for n, block in enumerate(blocks):
+            next_label = blocks[n + 1].label if n + 1 < len(blocks) else None
+            block_quads = block.quads
+            i = 0
+            while i < len(block_quads):
+                op, arg1, arg2, result = block_quads[i]
+                i += 1
+                falls_through = op not in ('j', 'return', 'halt')
+                if op == 'LABEL':
+                    emit(f".{result}:")
+                elif op == ':=':
+                    self._mov(self.loc[result], self._operand(arg1))
+                elif op in ARITH_INSNS:
+                    self._arith(op, arg1, arg2, result)
+                elif op == '/':
+                    self._divide(arg1, arg2, result)
+                elif op in CONDITION_CODES:
+                    following = block_quads[i] if i < len(block_quads) else None
+                    if (following is not None and following[0] == 'jz' and following[1] == result
+                            and result not in live_out[block.index]):
+                        # 比较结果只用于紧随的条件跳转: cmp + jcc，不生成 0/1 值
+                        cc = self._compare(arg1, arg2, CONDITION_CODES[op])
+                        emit(f"    j{NEGATED[cc]} .{following[3]}")
+                        i += 1
+                    else:
+                        self._set_compare(arg1, arg2, result, CONDITION_CODES[op])
+                elif op == 'AND' or op == 'OR':
+                    self._logical(op, arg1, arg2, result)
+                elif op == '**':
+                    self._power(arg1, arg2, result)
+                elif op == 'jz':
+                    self._jump_if_zero(arg1, result)
+                elif op == 'j':
+                    if not (i == len(block_quads) and result == next_label):
+                        emit(f"    jmp .{result}")
+                elif op == 'param':
+                    if result == '_':
+                        pending_args.append(arg1)
+                elif op == 'call':
+                    self._call(arg1, pending_args, result)
+                    pending_args = []
+                elif op == 'in':
+                    self._input(in_slot, result)
+                elif op == 'out':
+                    self._output(arg1)
+                elif op == 'return':
+                    self._mov("rax", self._operand(arg1) if arg1 != '_' else "0")
+                    self._epilogue()
+                elif op == 'halt':
+                    emit("    xor eax, eax")
+                    self._epilogue()
+                # declare / func 不生成代码
+        if falls_through:
+            # 函数末尾没有返回语句
+            emit("    xor eax, eax")
+            self._epilogue()
+        emit("")
+        return self.lines
+
+    # ---------- 寄存器分配 ----------
+
+    def _allocate(self, cfg, live_in, live_out):
+        """线性扫描寄存器分配，结果写入 self.loc 与 self.saved"""
+        start, end, calls = _live_intervals(cfg, live_in, live_out)
+        # 复制与运算的结果优先使用其第一个操作数的寄存器，省去一次 mov
+        hints = {}
+        for block in cfg.blocks:
+            for op, arg1, arg2, result in block.quads:
+                if (op == ':=' or op in ARITH_INSNS) and is_variable(arg1):
+                    hints.setdefault(result, arg1)
+
+        self.loc = {}
+        self.frame_slots = 0
+        callee_saved = self.abi["callee_saved"]
+        any_reg = self.abi["caller_saved"] + tuple(r for r in callee_saved if r not in self.abi["caller_saved"])
+        free = set(any_reg)
+        used_callee = set()
+        active = []  # [(区间终点, 变量)]
+        for name in sorted(start, key=start.__getitem__):
+            begin = start[name]
+            finish = end[name]
+            # 释放已结束的区间
+            expired = [item for item in active if item[0] < begin]
+            if expired:
+                active = [item for item in active if item[0] >= begin]
+                free.update(self.loc[victim] for _, victim in expired)
+            # 区间内有调用时只能使用被调用者保存的寄存器
+            k = bisect_left(calls, begin)
+            crosses_call = k < len(calls) and calls[k] + 1 <= finish
+            candidates = callee_saved if crosses_call else any_reg
+            reg = None
+            hint = self.loc.get(hints.get(name))
+            if hint in free and hint in candidates:
+                reg = hint
+            else:
+                reg = next((r for r in candidates if r in free), None)
+            if reg is None:
+                # 溢出: 在可用寄存器中选区间结束最晚的变量
+                victims = [item for item in active if self.loc[item[1]] in candidates]
+                victim = max(victims, default=None)
+                if victim is not None and victim[0] > finish:
+                    reg = self.loc[victim[1]]
+                    self.loc[victim[1]] = self._new_slot()
+                    active.remove(victim)
+                    free.add(reg)
+            if reg is None:
+                self.loc[name] = self._new_slot()
+                continue
+            free.discard(reg)
+            self.loc[name] = reg
+            active.append((finish, name))
+            if reg in callee_saved:
+                used_callee.add(reg)
+        self.saved = [(reg, self._new_slot()) for reg in callee_saved if reg in used_callee]
+
+    def _new_slot(self):
+        self.frame_slots += 1
+        return f"qword [rbp - {8 * self.frame_slots}]"
+
+    # ---------- 指令选择 ----------
+
+    @staticmethod
+    def _symbol(name):
+        # $ 前缀使函数名不会与 NASM 的保留字（寄存器名、指令名）冲突
+        return name if name == "main" else f"${name}"
+
+    def _operand(self, x):
+        """四元式操作数 -> 立即数、寄存器或栈槽"""
+        if is_constant(x):
+            return str(int(x))
+        return self.loc[x]
+
+    def _mov(self, dst, src):
+        """dst <- src，src 可以是立即数、寄存器或栈槽"""
+        if dst == src:
+            return
+        emit = self.lines.append
+        if is_constant(src):
+            value = int(src)
+            if _is_reg(dst):
+                emit(f"    xor {REG32[dst]}, {REG32[dst]}" if value == 0 else f"    mov {dst}, {value}")
+                return
+            if _fits_imm32(value):
+                emit(f"    mov {dst}, {value}")
+                return
+            emit(f"    mov rax, {value}")
+            src = "rax"
+        elif not _is_reg(dst) and not _is_reg(src):
+            emit(f"    mov rax, {src}")
+            src = "rax"
+        emit(f"    mov {dst}, {src}")
+
+    def _source(self, x, scratch):
+        """可作为算术指令第二操作数的形式，超出 32 位的立即数先装入 scratch"""
+        operand = self._operand(x)
+        if is_constant(operand) and not _fits_imm32(int(operand)):
+            self._mov(scratch, operand)
+            return scratch
+        return operand
+
+    def _arith(self, op, a, b, r):
+        emit = self.lines.append
+        insn = ARITH_INSNS[op]
+        if op != '-' and is_constant(a) and not is_constant(b):
+            a, b = b, a
+        dst = self.loc[r]
+        left = self._operand(a)
+        right = self._operand(b)
+        if not _is_reg(dst):
+            # 结果在栈槽中，在 rax 中计算
+            self._mov("rax", left)
+            emit(f"    {insn} rax, {self._source(b, 'rcx')}")
+            self._mov(dst, "rax")
+        elif right != dst or left == dst:
+            self._mov(dst, left)
+            shift = _log2(right) if op == '*' else None
+            if shift is not None:
+                # 乘以 2 的幂改为移位
+                if shift:
+                    emit(f"    shl {dst}, {shift}")
+            else:
+                emit(f"    {insn} {dst}, {self._source(b, 'rcx')}")
+        elif op == '-':
+            # 结果寄存器就是减数: dst = -b + a
+            emit(f"    neg {dst}")
+            emit(f"    add {dst}, {self._source(a, 'rcx')}")
+        else:
+            # 可交换运算，结果寄存器就是第二操作数
+            emit(f"    {insn} {dst}, {self._source(a, 'rcx')}")
+
+    def _divide(self, a, b, r):
+        emit = self.lines.append
+        self._mov("rax", self._operand(a))
+        divisor = self._operand(b)
+        shift = _log2(divisor)
+        if shift is not None:
+            # 除以 2 的幂: 负数先加上 2^k-1 再算术右移，商向 0 取整
+            if shift:
+                emit("    mov rdx, rax")
+                emit("    sar rdx, 63")
+                emit(f"    shr rdx, {64 - shift}")
+                emit("    add rax, rdx")
+                emit(f"    sar rax, {shift}")
+            self._mov(self.loc[r], "rax")
+            return
+        if is_constant(divisor):
+            self._mov("rcx", divisor)
+            divisor = "rcx"
+        emit("    cqo")
+        emit(f"    idiv {divisor}")
+        self._mov(self.loc[r], "rax")
+
+    def _compare(self, a, b, cc):
+        """生成 cmp，返回（可能因交换操作数而改变的）条件码"""
+        left = self._operand(a)
+        right = self._operand(b)
+        if is_constant(left) and not is_constant(right):
+            left, right, a, b = right, left, b, a
+            cc = SWAPPED[cc]
+        if is_constant(left) or (not _is_reg(left) and not _is_reg(right)):
+            self._mov("rax", left)
+            left = "rax"
+        self.lines.append(f"    cmp {left}, {self._source(b, 'rcx')}")
+        return cc
+
+    def _set_compare(self, a, b, r, cc):
+        emit = self.lines.append
+        cc = self._compare(a, b, cc)
+        emit(f"    set{cc} al")
+        dst = self.loc[r]
+        if _is_reg(dst):
+            emit(f"    movzx {REG32[dst]}, al")
+        else:
+            emit("    movzx eax, al")
+            emit(f"    mov {dst}, rax")
+
+    def _logical(self, op, a, b, r):
+        emit = self.lines.append
+        for x, reg, low in ((a, "rax", "al"), (b, "rcx", "cl")):
+            operand = self._operand(x)
+            if _is_reg(operand):
+                emit(f"    test {operand}, {operand}")
+            elif is_constant(operand):
+                self._mov(reg, operand)
+                emit(f"    test {reg}, {reg}")
+            else:
+                emit(f"    cmp {operand}, 0")
+            emit(f"    setne {low}")
+        emit(f"    {op.lower()} al, cl")
+        dst = self.loc[r]
+        if _is_reg(dst):
+            emit(f"    movzx {REG32[dst]}, al")
+        else:
+            emit("    movzx eax, al")
+            emit(f"    mov {dst}, rax")
+
+    def _power(self, a, b, r):
+        # 快速幂，与 acc 相同: 指数按无符号数逐位右移
+        emit = self.lines.append
+        n = self.label_counter
+        self.label_counter += 1
+        self._mov("rcx", self._operand(b))
+        self._mov("rdx", self._operand(a))
+        emit("    mov eax, 1")
+        emit(f".pow{n}:")
+        emit("    test rcx, rcx")
+        emit(f"    jz .pow{n}_done")
+        emit("    test cl, 1")
+        emit(f"    jz .pow{n}_even")
+        emit("    imul rax, rdx")
+        emit(f".pow{n}_even:")
+        emit("    imul rdx, rdx")
+        emit("    shr rcx, 1")
+        emit(f"    jmp .pow{n}")
+        emit(f".pow{n}_done:")
+        self._mov(self.loc[r], "rax")
+
+    def _jump_if_zero(self, condition, label):
+        emit = self.lines.append
+        operand = self._operand(condition)
+        if is_constant(operand):
+            if int(operand) == 0:
+                emit(f"    jmp .{label}")
+            return
+        if _is_reg(operand):
+            emit(f"    test {operand}, {operand}")
+        else:
+            emit(f"    cmp {operand}, 0")
+        emit(f"    jz .{label}")
+
+    def _parallel_move(self, moves):
+        """
+        同时完成一组 寄存器 <- 操作数 的传送
+
+        目标寄存器同时是其他传送的源时，经栈中转，避免先写后读。
+        """
+        emit = self.lines.append
+        moves = [(dst, src) for dst, src in moves if dst != src]
+        sources = {src for _, src in moves}
+        if not any(dst in sources for dst, _ in moves):
+            for dst, src in moves:
+                self._mov(dst, src)
+            return
+        for _, src in moves:
+            self._push(src)
+        for dst, _ in reversed(moves):
+            emit(f"    pop {dst}")
+
+    def _push(self, operand):
+        if is_constant(operand) and not _fits_imm32(int(operand)):
+            self._mov("rax", operand)
+            operand = "rax"
+        self.lines.append(f"    push {operand}")
+
+    def _receive_params(self, cfg):
+        """函数入口: 把参数从参数寄存器（或调用者栈帧）移到分配的位置"""
+        arg_regs = self.abi["arg_regs"]
+        params = [
+            (arg1, int(result[3:]))
+            for block in cfg.blocks for op, arg1, arg2, result in block.quads
+            if op == 'param' and result != '_' and arg1 in self.loc
+        ]
+        moves = [(self.loc[name], arg_regs[i]) for name, i in params if i < len(arg_regs)]
+        in_regs = [(dst, src) for dst, src in moves if _is_reg(dst)]
+        # 先写入栈槽（不会覆盖任何参数寄存器），再做寄存器之间的并行传送
+        for dst, src in moves:
+            if not _is_reg(dst):
+                self._mov(dst, src)
+        self._parallel_move(in_regs)
+        for name, i in params:
+            if i >= len(arg_regs):
+                offset = 16 + self.abi["shadow_space"] + 8 * (i - len(arg_regs))
+                self._mov(self.loc[name], f"qword [rbp + {offset}]")
+
+    def _call(self, func_name, args, r):
+        emit = self.lines.append
+        arg_regs = self.abi["arg_regs"]
+        shadow = self.abi["shadow_space"]
+        stack_args = args[len(arg_regs):]
+        padding = 8 * (len(stack_args) % 2)  # 保持调用时 rsp 16 字节对齐
+        if padding:
+            emit(f"    sub rsp, {padding}")
+        for x in reversed(stack_args):
+            self._push(self._operand(x))
+        self._parallel_move([(reg, self._operand(x)) for reg, x in zip(arg_regs, args)])
+        if shadow:
+            emit(f"    sub rsp, {shadow}")
+        emit(f"    call {self._symbol(func_name)}")
+        cleanup = shadow + 8 * len(stack_args) + padding
+        if cleanup:
+            emit(f"    add rsp, {cleanup}")
+        if r in self.loc:
+            self._mov(self.loc[r], "rax")
+
+    def _call_runtime(self, func_name):
+        emit = self.lines.append
+        shadow = self.abi["shadow_space"]
+        if shadow:
+            emit(f"    sub rsp, {shadow}")
+        emit("    xor eax, eax")
+        emit(f"    call {func_name}")
+        if shadow:
+            emit(f"    add rsp, {shadow}")
+
+    def _input(self, slot, r):
+        arg_regs = self.abi["arg_regs"]
+        emit = self.lines.append
+        # 读入失败（如输入结束）时结果为 0
+        emit(f"    mov {slot}, 0")
+        emit(f"    lea {arg_regs[1]}, {slot[6:]}")
+        emit(f"    lea {arg_regs[0]}, [fmt_in]")
+        self._call_runtime("scanf")
+        if r in self.loc:
+            self._mov(self.loc[r], slot)
+
+    def _output(self, v):
+        arg_regs = self.abi["arg_regs"]
+        self._mov(arg_regs[1], self._operand(v))
+        self.lines.append(f"    lea {arg_regs[0]}, [fmt_out]")
+        self._call_runtime("printf")
+
+    def _epilogue(self):
+        emit = self.lines.append
+        for reg, slot in self.saved:
+            emit(f"    mov {reg}, {slot}")
+        emit("    leave")
+        emit("    ret")
+
+
+def compile_pcode(pcode, optimize=True, windows=None, stats=None, passes=None):
+    """
+    Pcode -> 四元式 -> （QuadOptimizer 优化）-> NASM 汇编
+
+    Args:
+        pcode: Pcode 文本
+        optimize: 是否先优化四元式
+        windows: 是否按 Windows x64 ABI 生成，None 表示与当前平台一致
+        stats: 可选的统计字典，传给 QuadOptimizer.optimize
+        passes: 可选的 passes.PassManager，给出时按其优化级别运行四元式流水线，代替 optimize
+
+    Returns:
+        str: NASM 汇编文本
+    """
+    functions = PcodeToQuadsTranslator().translate(pcode)["functions"]
+    if passes is not None:
+        functions = passes.optimize_quads(functions, stats)
+    elif optimize:
+        functions = {name: QuadOptimizer.optimize(quads, stats) for name, quads in functions.items()}
+    return X86Generator(windows).generate(functions)
@@ -0,0 +1,139 @@
+/*
+ * serve.h —— 前端工具常驻模式 (--serve)
+ *
+ * 普通模式下每个工具从 stdin 读入整个源程序、输出一次后退出；
+ * 常驻模式下工具在一个进程内循环处理多个请求，由 worker_pool.py 通过管道驱动。
+ *
+ * 请求帧:  "<len>\n" 后跟 len 字节源代码 (len < 0 表示心跳检测)
+ * 响应帧:  "<status> <out_len> <err_len>\n" 后跟 stdout 内容与 stderr 内容
+ *
+ * 用法: 工具把一次完整处理 (重置全局状态 + 解析 + 输出) 封装为 run_once()，
+ *       main 中判断 --serve 参数后调用 serve_loop(run_once)。
+ *       原本调用 exit() 的错误处理应改为 serve_exit()。
+ */
+#ifndef ACLANG_SERVE_H
+#define ACLANG_SERVE_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <setjmp.h>
+
+#if defined(_WIN32)
+    #include <io.h>
+    #include <fcntl.h>
+    #define SERVE_DUP(fd)      _dup(fd)
+    #define SERVE_DUP2(a, b)   _dup2(a, b)
+    #define SERVE_FILENO(f)    _fileno(f)
+#else
+    #include <unistd.h>
+    #define SERVE_DUP(fd)      dup(fd)
+    #define SERVE_DUP2(a, b)   dup2(a, b)
+    #define SERVE_FILENO(f)    fileno(f)
+#endif
+
+extern void yyrestart(FILE* input_file);
+extern int yylineno;
+
+static jmp_buf serve_env;
+static int serve_active = 0;
+static int serve_status = 0;
+
+/* 替代 exit(): 常驻模式下放弃当前请求并回到请求循环，否则直接退出 */
+static void serve_exit(int status) {
+    if (serve_active) {
+        serve_status = status ? status : 1;
+        longjmp(serve_env, 1);
+    }
+    exit(status);
+}
+
+/* 把临时文件的全部内容写入应答流 */
+static long serve_copy(FILE* src, FILE* dst) {
+    char buf[4096];
+    long total = 0;
+    size_t n;
+    rewind(src);
+    while ((n = fread(buf, 1, sizeof(buf), src)) > 0) {
+        fwrite(buf, 1, n, dst);
+        total += (long)n;
+    }
+    return total;
+}
+
+static long serve_size(FILE* f) {
+    fseek(f, 0, SEEK_END);
+    return ftell(f);
+}
+
+/* 请求循环: stdin 关闭 (EOF) 时返回 */
+static int serve_loop(int (*run_once)(void)) {
+    long len;
+    /* 应答写到原始 stdout 的副本上，工具自身的输出被重定向到临时文件 */
+    FILE* reply = fdopen(SERVE_DUP(SERVE_FILENO(stdout)), "wb");
+    if (!reply) return 1;
+#if defined(_WIN32)
+    _setmode(_fileno(stdin), _O_BINARY);
+    _setmode(_fileno(reply), _O_BINARY);
+#endif
+
+    while (fscanf(stdin, "%ld", &len) == 1) {
+        fgetc(stdin); /* 跳过长度后的换行 */
+
+        if (len < 0) {
+            fprintf(reply, "0 0 0\n");
+            fflush(reply);
+            continue;
+        }
+
+        FILE* src_f = tmpfile();
+        FILE* out_f = tmpfile();
+        FILE* err_f = tmpfile();
+        if (!src_f || !out_f || !err_f) return 1;
+
+        char buf[4096];
+        long left = len;
+        while (left > 0) {
+            size_t n = fread(buf, 1, left < (long)sizeof(buf) ? (size_t)left : sizeof(buf), stdin);
+            if (n == 0) return 1; /* 请求帧不完整，管道已断开 */
+            fwrite(buf, 1, n, src_f);
+            left -= (long)n;
+        }
+        rewind(src_f);
+
+        fflush(stdout);
+        fflush(stderr);
+        SERVE_DUP2(SERVE_FILENO(out_f), SERVE_FILENO(stdout));
+        SERVE_DUP2(SERVE_FILENO(err_f), SERVE_FILENO(stderr));
+
+        yylineno = 1;
+        yyrestart(src_f);
+        if (setjmp(serve_env) == 0) {
+            serve_active = 1;
+            serve_status = run_once();
+        }
+        serve_active = 0;
+
+        fflush(stdout);
+        fflush(stderr);
+        fprintf(reply, "%d %ld %ld\n", serve_status, serve_size(out_f), serve_size(err_f));
+        serve_copy(out_f, reply);
+        serve_copy(err_f, reply);
+        fflush(reply);
+
+        fclose(src_f);
+        fclose(out_f);
+        fclose(err_f);
+    }
+    return 0;
+}
+
+/* main 入口的统一写法 */
+static int serve_main(int argc, char* argv[], int (*run_once)(void)) {
+    if (argc > 1 && strcmp(argv[1], "--serve") == 0) {
+        return serve_loop(run_once);
+    }
+    return run_once();
+}
+
+#endif
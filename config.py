@@ -0,0 +1,79 @@
+"""
+服务配置模块
+
+main.py（Flask）与 asgi.py（ASGI）共用的配置: 前端工具路径、由环境变量给出的
+进程池/缓存/运行限制，以及前端结果缓存。这里只创建两种入口都要用的对象，
+进程池、运行器等与并发模型相关的对象由各入口自己创建。
+"""
+import os
+import sys
+
+from result_cache import ResultCache
+
+
+def is_windows():
+    return sys.platform.startswith("win")
+
+
+EXE_SUFFIX = ".exe" if is_windows() else ""
+
+# 前端工具: 工具名 -> 可执行文件路径
+TOOLS = {
+    "Lexical": "./output/exe/Lexical" + EXE_SUFFIX,
+    "symbol_table": "./output/exe/symbol_table" + EXE_SUFFIX,
+    "pcode": "./output/exe/pcode" + EXE_SUFFIX,
+    "ast": "./output/exe/ast" + EXE_SUFFIX,
+    "acc": "./output/test/acc" + EXE_SUFFIX,
+}
+
+# 每个前端工具的常驻进程数，设为 0 时退回到每个请求启动一次新进程
+POOL_SIZE = int(os.environ.get("ACLANG_POOL_SIZE", "2"))
+
+# 编译结果缓存，设置 ACLANG_CACHE_DIR 时启用磁盘层
+cache = ResultCache(
+    max_entries=int(os.environ.get("ACLANG_CACHE_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("ACLANG_CACHE_BYTES", str(64 << 20))),
+    disk_dir=os.environ.get("ACLANG_CACHE_DIR") or None,
+    disk_max_bytes=int(os.environ.get("ACLANG_CACHE_DISK_BYTES", str(1 << 30))),
+)
+
+# /run 的构建与运行: ACLANG_RUN_CONCURRENCY 限制同时进行的构建/运行数量，
+# 构建好的可执行文件缓存在 ACLANG_EXE_CACHE_DIR，占用上限 ACLANG_EXE_CACHE_BYTES，
+# 程序输出超过 ACLANG_RUN_OUTPUT_BYTES 字节时被终止
+EXE_CACHE_DIR = os.environ.get("ACLANG_EXE_CACHE_DIR", "./output/cache/exe")
+EXE_CACHE_BYTES = int(os.environ.get("ACLANG_EXE_CACHE_BYTES", str(512 << 20)))
+RUN_CONCURRENCY = int(os.environ.get("ACLANG_RUN_CONCURRENCY", "0")) or None
+RUN_DIR = os.environ.get("ACLANG_RUN_DIR") or None
+RUN_OUTPUT_BYTES = int(os.environ.get("ACLANG_RUN_OUTPUT_BYTES", str(1 << 20)))
+
+# /run 的 "mode": "vm": 每次运行最多执行 ACLANG_VM_MAX_STEPS 条四元式；ACLANG_VM_ENGINE 选择执行引擎
+# （默认 "compiled" 把四元式编译为 Python 代码对象，"interpreter" 逐条解释）
+VM_MAX_STEPS = int(os.environ.get("ACLANG_VM_MAX_STEPS", str(10_000_000)))
+VM_ENGINE = os.environ.get("ACLANG_VM_ENGINE", "compiled")
+
+# 关键字说明，/keyword 返回
+KEYWORDS = {
+    "T_IntConstant": "整型常量",
+    "T_Identifier": "标识符（变量名或函数名）",
+
+    "T_Void": "空类型",
+    "T_Int": "整型类型",
+    "T_While": "while 循环语句",
+    "T_If": "条件判断 if",
+    "T_Else": "条件分支 else",
+    "T_Return": "函数返回语句",
+    "T_Explain": "注释或说明关键字",
+    "T_Break": "跳出循环",
+    "T_Continue": "跳过本次循环",
+
+    "T_Le": "小于等于运算符",
+    "T_Ge": "大于等于运算符",
+    "T_Eq": "等于比较运算符",
+    "T_Ne": "不等于比较运算符",
+    "T_And": "逻辑与运算符",
+    "T_Or": "逻辑或运算符",
+
+    "T_inputInt": "输入整数函数",
+    "T_outputInt": "输出整数函数",
+    "T_Power": "幂运算函数"
+}
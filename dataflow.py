@@ -0,0 +1,690 @@
+"""
+四元式数据流分析模块
+
+提供四元式的定值/使用信息、基于控制流图（cfg.py）的活跃变量分析，
+以及建立在这些分析之上的变换: 死代码消除、常量与复写传播、值编号和
+临时变量压缩。QuadOptimizer 通过这些函数实现各个优化。
+"""
+import heapq
+
+from quadruple import TEMP_PREFIX
+
+# 纯运算: 除写入 result 外没有其他作用，result 不活跃时可以删除
+BINARY_OPS = frozenset(('+', '-', '*', '/', '>', '<', '>=', '<=', '==', '!=', 'AND', 'OR', '**'))
+PURE_OPS = BINARY_OPS | {':='}
+# 输入输出 ('in', '_', '_', t) 读入整数到 t、('out', v, '_', '_') 输出 v 有副作用，不属于纯运算
+
+
+def is_variable(operand):
+    """操作数是否为变量（不是占位符 '_' 也不是整数常量）"""
+    return bool(operand) and operand != '_' and operand[0] not in CONST_START
+
+
+# 整数常量的首字符
+CONST_START = frozenset('-0123456789')
+
+
+def is_temp(name):
+    """是否为转换器生成的临时变量 %tN"""
+    return name.startswith(TEMP_PREFIX) and name[len(TEMP_PREFIX):].isdigit()
+
+
+def quad_def(quad):
+    """
+    四元式定值的变量
+
+    Returns:
+        str: 变量名，不定值任何变量时为 None
+    """
+    op, arg1, arg2, result = quad
+    if op in PURE_OPS or op == 'call' or op == 'in':
+        return result
+    if op == 'param' and result != '_':
+        # 函数入口的参数接收: (param, a, _, arg0)
+        return arg1
+    return None
+
+
+def quad_uses(quad):
+    """
+    四元式使用的变量
+
+    Returns:
+        tuple: 变量名
+    """
+    op, arg1, arg2, result = quad
+    if op in BINARY_OPS:
+        return tuple(a for a in (arg1, arg2) if is_variable(a))
+    if op == ':=' or op == 'jz' or op == 'return' or op == 'out' or (op == 'param' and result == '_'):
+        return (arg1,) if is_variable(arg1) else ()
+    return ()
+
+
+def local_names(quads):
+    """
+    函数内的局部名字: 函数内声明的变量、形参与临时变量
+
+    其余变量视为全局变量，在函数返回和调用其他函数时都是活跃的。
+    """
+    names = set()
+    results = set()
+    for op, arg1, arg2, result in quads:
+        if op == 'declare':
+            names.add(result)
+        elif op == 'param':
+            if result != '_':
+                names.add(arg1)
+        elif op in PURE_OPS or op == 'call' or op == 'in':
+            results.add(result)
+    # 临时变量只在本函数内定值
+    names.update(name for name in results if is_temp(name))
+    return names
+
+
+def global_names(quads, locals_=None):
+    """函数中出现的全局变量: 被定值或使用、但不是局部名字的变量"""
+    if locals_ is None:
+        locals_ = local_names(quads)
+    names = set()
+    for op, arg1, arg2, result in quads:
+        if op in PURE_OPS:
+            names.add(result)
+            names.add(arg1)
+            names.add(arg2)
+        elif op == 'jz' or op == 'return' or op == 'param' or op == 'out':
+            names.add(arg1)
+        elif op == 'call' or op == 'in':
+            names.add(result)
+    return {name for name in names - locals_ if is_variable(name)}
+
+
+def _transfer(quads, live, globals_, remove=False):
+    """
+    对一个基本块做逆向传递: 由块出口的活跃变量得到块入口的活跃变量
+
+    定值不活跃的纯运算不计入其使用的变量（强活跃性），所以只被死代码使用的
+    变量也是死的，一次分析即可找出所有死代码。
+
+    Args:
+        quads: 基本块的四元式
+        live: 块出口活跃变量集合，会被就地修改为入口活跃集合
+        globals_: 全局变量集合（调用其他函数时活跃）
+        remove: 为 True 时返回删除死代码后的四元式列表
+
+    Returns:
+        list: remove 为 True 时返回保留的四元式（逆序），否则为 None
+    """
+    kept = [] if remove else None
+    const_start = CONST_START
+    for quad in reversed(quads):
+        op, arg1, arg2, result = quad
+        if op in PURE_OPS:
+            if result not in live:
+                # 死代码
+                continue
+            live.discard(result)
+            if arg1 != '_' and arg1[0] not in const_start:
+                live.add(arg1)
+            if arg2 != '_' and arg2[0] not in const_start:
+                live.add(arg2)
+        elif op == 'call':
+            live.discard(result)
+            live.update(globals_)
+        else:
+            target = quad_def(quad)
+            if target is not None:
+                live.discard(target)
+            live.update(quad_uses(quad))
+        if remove:
+            kept.append(quad)
+    return kept
+
+
+def liveness(cfg, globals_=frozenset()):
+    """
+    活跃变量分析（逆向数据流，工作表迭代到不动点）
+
+    Args:
+        cfg: ControlFlowGraph
+        globals_: 全局变量集合，在函数出口处活跃
+
+    Returns:
+        tuple: (live_in, live_out)，均为按块下标排列的集合列表
+    """
+    blocks = cfg.blocks
+    n = len(blocks)
+    live_in = [set() for _ in range(n)]
+    live_out = [set() for _ in range(n)]
+
+    # 逆向分析按后序处理收敛最快；不可达块放在最后
+    order = cfg.postorder()
+    seen = set(order)
+    order.extend(i for i in range(n) if i not in seen)
+    # 工作表按栈使用，先弹出的在后序中靠前
+    worklist = order[::-1]
+    queued = bytearray([1]) * n
+
+    while worklist:
+        index = worklist.pop()
+        queued[index] = 0
+        block = blocks[index]
+
+        out = set()
+        for succ in block.succs:
+            out |= live_in[succ]
+        if not block.succs:
+            # 函数出口（返回、结束或跳出函数）: 全局变量活跃
+            out |= globals_
+        live_out[index] = out
+
+        new_in = set(out)
+        _transfer(block.quads, new_in, globals_)
+        if new_in != live_in[index]:
+            live_in[index] = new_in
+            for pred in block.preds:
+                if not queued[pred]:
+                    queued[pred] = 1
+                    worklist.append(pred)
+
+    return live_in, live_out
+
+
+def eliminate_dead_code(cfg, globals_=frozenset()):
+    """
+    根据活跃变量分析删除所有定值不活跃的纯运算，就地修改各基本块
+
+    Args:
+        cfg: ControlFlowGraph
+        globals_: 全局变量集合
+
+    Returns:
+        int: 删除的四元式条数
+    """
+    _, live_out = liveness(cfg, globals_)
+    removed = 0
+    for block in cfg.blocks:
+        kept = _transfer(block.quads, set(live_out[block.index]), globals_, remove=True)
+        kept.reverse()
+        removed += len(block.quads) - len(kept)
+        block.quads = kept
+    return removed
+
+
+# ---------- 常量与复写传播 ----------
+
+_WORD = 1 << 64
+
+
+def _wrap(value):
+    """按 64 位有符号整数回绕（与生成的汇编一致）"""
+    value &= _WORD - 1
+    return value - _WORD if value >= _WORD >> 1 else value
+
+
+def is_constant(operand):
+    """操作数是否为整数常量"""
+    return bool(operand) and operand != '_' and operand[0] in CONST_START
+
+
+def eval_binary(op, left, right):
+    """
+    计算两个整数常量的二元运算
+
+    Args:
+        op: 运算符
+        left, right: 常量字符串
+
+    Returns:
+        str: 结果常量，无法在编译期计算（如除数为 0）时为 None
+    """
+    a = int(left)
+    b = int(right)
+    if op == '+':
+        value = a + b
+    elif op == '-':
+        value = a - b
+    elif op == '*':
+        value = a * b
+    elif op == '/':
+        if b == 0 or (a == -(_WORD >> 1) and b == -1):
+            # 运行时除法异常，保留原运算
+            return None
+        # 与 idiv 一致，商向 0 取整
+        value = abs(a) // abs(b)
+        if (a < 0) != (b < 0):
+            value = -value
+    elif op == '>':
+        value = int(a > b)
+    elif op == '<':
+        value = int(a < b)
+    elif op == '>=':
+        value = int(a >= b)
+    elif op == '<=':
+        value = int(a <= b)
+    elif op == '==':
+        value = int(a == b)
+    elif op == '!=':
+        value = int(a != b)
+    elif op == 'AND':
+        value = int(a != 0 and b != 0)
+    elif op == 'OR':
+        value = int(a != 0 or b != 0)
+    elif op == '**':
+        if b < 0:
+            # 汇编中指数按无符号数处理，不在编译期计算
+            return None
+        value = pow(a, b, _WORD)
+    else:
+        return None
+    return str(_wrap(value))
+
+
+class _Facts:
+    """
+    一个程序点上已知的事实: 变量 -> 常量或与之相等的另一个变量
+
+    copies 为反向索引（变量 -> 以它为值的变量集合），变量被重新定值时据此
+    同时删除依赖它的复写关系。
+    """
+
+    __slots__ = ('values', 'copies')
+
+    def __init__(self, values):
+        self.values = values
+        self.copies = {}
+        for name, value in values.items():
+            if value[0] not in CONST_START:
+                self.copies.setdefault(value, set()).add(name)
+
+    def get(self, operand):
+        return self.values.get(operand, operand)
+
+    def kill(self, name):
+        """name 被重新定值"""
+        values = self.values
+        old = values.pop(name, None)
+        if old is not None and old in self.copies:
+            self.copies[old].discard(name)
+        for other in self.copies.pop(name, ()):
+            if values.get(other) == name:
+                del values[other]
+
+    def bind(self, name, value):
+        """记录 name == value（value 为常量或变量），调用前应已 kill(name)"""
+        if value == name:
+            return
+        self.values[name] = value
+        if value[0] not in CONST_START:
+            self.copies.setdefault(value, set()).add(name)
+
+
+def _propagate_block(quads, facts, globals_, rewrite):
+    """
+    在一个基本块内正向传递常量/复写事实
+
+    Args:
+        quads: 基本块的四元式
+        facts: 块入口的 _Facts，会被就地修改为出口事实
+        globals_: 全局变量集合（调用其他函数时可能被修改）
+        rewrite: 为 True 时返回替换、折叠后的四元式列表
+
+    Returns:
+        list: rewrite 为 True 时返回新的四元式列表，否则为 None
+    """
+    out = [] if rewrite else None
+    get = facts.get
+    kill = facts.kill
+    for quad in quads:
+        op, arg1, arg2, result = quad
+        if op == ':=':
+            value = get(arg1)
+            kill(result)
+            facts.bind(result, value)
+            if rewrite:
+                out.append((op, value, arg2, result))
+        elif op in BINARY_OPS:
+            left = get(arg1)
+            right = get(arg2)
+            folded = None
+            if is_constant(left) and is_constant(right):
+                folded = eval_binary(op, left, right)
+            kill(result)
+            if folded is not None:
+                facts.bind(result, folded)
+                if rewrite:
+                    out.append((':=', folded, '_', result))
+            elif rewrite:
+                out.append((op, left, right, result))
+        elif op == 'jz':
+            condition = get(arg1)
+            if is_constant(condition):
+                # 条件已知: 必然跳转或必然不跳转
+                if rewrite and int(condition) == 0:
+                    out.append(('j', '_', '_', result))
+            elif rewrite:
+                out.append((op, condition, arg2, result))
+        elif op == 'return' or op == 'out' or (op == 'param' and result == '_'):
+            if rewrite:
+                out.append((op, get(arg1), arg2, result))
+        elif op == 'call':
+            kill(result)
+            for name in globals_:
+                kill(name)
+            if rewrite:
+                out.append(quad)
+        else:
+            target = quad_def(quad)
+            if target is not None:
+                kill(target)
+            if rewrite:
+                out.append(quad)
+    return out
+
+
+def _meet(envs):
+    """多个前驱出口事实的交集: 只保留所有前驱都一致的事实"""
+    envs = iter(envs)
+    result = dict(next(envs))
+    for env in envs:
+        if not result:
+            break
+        for name in [name for name, value in result.items() if env.get(name) != value]:
+            del result[name]
+    return result
+
+
+def propagate_constants(cfg, globals_=frozenset()):
+    """
+    全局常量与复写传播（正向数据流，工作表迭代到不动点），就地改写各基本块
+
+    把使用处的变量替换为已知的常量或原变量，折叠常量运算、比较与逻辑运算，
+    条件已知的 jz 改为 j 或删除。改写后原来的复写赋值多半成为死代码，
+    由 eliminate_dead_code 删除。
+
+    Args:
+        cfg: ControlFlowGraph
+        globals_: 全局变量集合
+
+    Returns:
+        int: 被改写的四元式条数
+    """
+    blocks = cfg.blocks
+    n = len(blocks)
+    if not n:
+        return 0
+    out_env = [None] * n  # None 表示尚未到达
+
+    def entry_env(index):
+        if index == 0:
+            return {}
+        envs = [out_env[pred] for pred in blocks[index].preds if out_env[pred] is not None]
+        return _meet(envs) if envs else None
+
+    order = cfg.reverse_postorder()
+    worklist = order[::-1]
+    queued = bytearray(n)
+    for index in order:
+        queued[index] = 1
+
+    while worklist:
+        index = worklist.pop()
+        queued[index] = 0
+        env = entry_env(index)
+        if env is None:
+            continue
+        facts = _Facts(env)
+        _propagate_block(blocks[index].quads, facts, globals_, rewrite=False)
+        # 临时变量只在块内使用，不带出块外，保持事实集合小
+        new_out = {name: value for name, value in facts.values.items() if not is_temp(name)}
+        if new_out != out_env[index]:
+            out_env[index] = new_out
+            for succ in blocks[index].succs:
+                if not queued[succ]:
+                    queued[succ] = 1
+                    worklist.append(succ)
+
+    changed = 0
+    for block in blocks:
+        env = entry_env(block.index)
+        if env is None:
+            # 不可达块保持原样
+            continue
+        quads = _propagate_block(block.quads, _Facts(env), globals_, rewrite=True)
+        changed += sum(1 for old, new in zip(block.quads, quads) if old != new)
+        changed += abs(len(block.quads) - len(quads))
+        block.quads = quads
+    return changed
+
+
+# ---------- 值编号（公共子表达式消除） ----------
+
+# 可交换的二元运算，编号时操作数排序
+COMMUTATIVE_OPS = frozenset(('+', '*', '==', '!=', 'AND', 'OR'))
+
+
+class _ValueTable:
+    """
+    值编号表: 变量与表达式 -> 值编号，值编号 -> 持有该值的常量或变量
+
+    复制一份即可把表传给扩展基本块中的后继块。
+    """
+
+    __slots__ = ('var_vn', 'expr_vn', 'vn_const', 'vn_vars', 'counter')
+
+    def __init__(self, counter):
+        self.var_vn = {}  # 变量 -> 当前值编号
+        self.expr_vn = {}  # (op, vn1, vn2) 或 ('const', 值) -> 值编号
+        self.vn_const = {}  # 值编号 -> 常量
+        self.vn_vars = {}  # 值编号 -> 曾持有该值的变量（按出现顺序）
+        self.counter = counter  # 共享的值编号计数器 [n]
+
+    def copy(self):
+        other = _ValueTable(self.counter)
+        other.var_vn = dict(self.var_vn)
+        other.expr_vn = dict(self.expr_vn)
+        other.vn_const = dict(self.vn_const)
+        other.vn_vars = {vn: list(names) for vn, names in self.vn_vars.items()}
+        return other
+
+    def _new(self):
+        self.counter[0] += 1
+        return self.counter[0]
+
+    def operand(self, operand):
+        """操作数的值编号，首次出现的变量视为未知值"""
+        if is_constant(operand):
+            key = ('const', operand)
+            vn = self.expr_vn.get(key)
+            if vn is None:
+                vn = self.expr_vn[key] = self._new()
+                self.vn_const[vn] = operand
+            return vn
+        vn = self.var_vn.get(operand)
+        if vn is None:
+            vn = self.var_vn[operand] = self._new()
+            self.vn_vars[vn] = [operand]
+        return vn
+
+    def holder(self, vn):
+        """当前持有值 vn 的常量或变量，没有时为 None"""
+        const = self.vn_const.get(vn)
+        if const is not None:
+            return const
+        var_vn = self.var_vn
+        for name in self.vn_vars.get(vn, ()):
+            if var_vn.get(name) == vn:
+                return name
+        return None
+
+    def canonical(self, operand):
+        """操作数替换为持有同一值的最早的常量或变量"""
+        if operand == '_':
+            return operand
+        holder = self.holder(self.operand(operand))
+        return holder if holder is not None else operand
+
+    def assign(self, name, vn=None):
+        """name 被定值为 vn（None 表示新的未知值）"""
+        if vn is None:
+            vn = self._new()
+        self.var_vn[name] = vn
+        self.vn_vars.setdefault(vn, []).append(name)
+        return vn
+
+    def forget(self, name):
+        """name 的值变为未知（如调用其他函数后的全局变量）"""
+        self.var_vn.pop(name, None)
+
+
+def _number_block(quads, table, globals_):
+    """
+    对一个基本块做值编号，返回 (改写后的四元式, 消除的重复计算条数)
+
+    重复计算的表达式改为从已有变量复制，使用处替换为最早持有同一值的变量，
+    多余的复制由随后的死代码消除删除。
+    """
+    out = []
+    eliminated = 0
+    for quad in quads:
+        op, arg1, arg2, result = quad
+        if op == ':=':
+            vn = table.operand(arg1)
+            source = table.holder(vn) or arg1
+            table.assign(result, vn)
+            out.append((op, source, arg2, result))
+        elif op in BINARY_OPS:
+            left_vn = left = table.operand(arg1)
+            right_vn = right = table.operand(arg2)
+            if op in COMMUTATIVE_OPS and right < left:
+                left, right = right, left
+            key = (op, left, right)
+            vn = table.expr_vn.get(key)
+            holder = table.holder(vn) if vn is not None else None
+            if holder is not None:
+                # 同一表达式已经计算过
+                table.assign(result, vn)
+                out.append((':=', holder, '_', result))
+                eliminated += 1
+            else:
+                new_quad = (op, table.holder(left_vn) or arg1, table.holder(right_vn) or arg2, result)
+                vn = table.assign(result)
+                table.expr_vn[key] = vn
+                out.append(new_quad)
+        elif op == 'jz' or op == 'return' or op == 'out' or (op == 'param' and result == '_'):
+            out.append((op, table.canonical(arg1), arg2, result))
+        elif op == 'call':
+            for name in globals_:
+                table.forget(name)
+            table.assign(result)
+            out.append(quad)
+        else:
+            target = quad_def(quad)
+            if target is not None:
+                table.assign(target)
+            out.append(quad)
+    return out, eliminated
+
+
+def number_values(cfg, globals_=frozenset(), extended=False):
+    """
+    基于值编号的公共子表达式消除，就地改写各基本块
+
+    Args:
+        cfg: ControlFlowGraph
+        globals_: 全局变量集合（调用其他函数后值未知）
+        extended: 为 True 时在扩展基本块上进行: 只有一个前驱的块继承前驱
+                  出口处的值编号表，跨块消除重复计算
+
+    Returns:
+        int: 消除的重复计算条数
+    """
+    blocks = cfg.blocks
+    counter = [0]
+    eliminated = 0
+    if not extended:
+        for block in blocks:
+            block.quads, n = _number_block(block.quads, _ValueTable(counter), globals_)
+            eliminated += n
+        return eliminated
+
+    # 扩展基本块: 以入口块和有多个（或没有）前驱的块为根，向只有一个前驱的后继延伸
+    for root in blocks:
+        if root.index != 0 and len(root.preds) == 1:
+            continue
+        stack = [(root.index, _ValueTable(counter))]
+        while stack:
+            index, table = stack.pop()
+            block = blocks[index]
+            block.quads, n = _number_block(block.quads, table, globals_)
+            eliminated += n
+            children = [succ for succ in block.succs if succ != 0 and len(blocks[succ].preds) == 1]
+            for i, succ in enumerate(children):
+                # 最后一个后继直接沿用本块的表，其余复制一份
+                stack.append((succ, table if i == len(children) - 1 else table.copy()))
+    return eliminated
+
+
+# ---------- 临时变量压缩 ----------
+
+def compact_temps(cfg, globals_=frozenset()):
+    """
+    按活跃区间为临时变量分配可复用的槽位（线性扫描），就地改写各基本块
+
+    在块的线性顺序上为每个临时变量求出覆盖其所有定值、使用以及跨块活跃范围
+    的区间；区间不重叠的临时变量共用同一个槽位。同一条四元式中先读后写，
+    所以一个区间在某条四元式结束时，该四元式的结果可以复用它的槽位。
+    槽位仍命名为 %t0, %t1, ...
+
+    Args:
+        cfg: ControlFlowGraph
+        globals_: 全局变量集合
+
+    Returns:
+        tuple: (压缩前的临时变量个数, 压缩后的槽位个数)
+    """
+    live_in, live_out = liveness(cfg, globals_)
+    start = {}
+    end = {}
+    pos = 0
+    for block in cfg.blocks:
+        first = pos
+        for op, arg1, arg2, result in block.quads:
+            for name in (arg1, arg2, result):
+                if is_temp(name):
+                    if name not in start:
+                        start[name] = pos
+                    end[name] = pos
+            pos += 1
+        last = pos - 1 if pos > first else first
+        # 跨块活跃: 区间延伸到块首/块尾
+        for names, at in ((live_in[block.index], first), (live_out[block.index], last)):
+            for name in names:
+                if is_temp(name):
+                    if name not in start or at < start[name]:
+                        start[name] = at
+                    if name not in end or at > end[name]:
+                        end[name] = at
+
+    # 线性扫描: 按区间起点分配，区间已结束的槽位放回空闲池
+    mapping = {}
+    active = []  # (区间终点, 槽位) 的最小堆
+    free = []  # 空闲槽位（最小堆，优先复用编号小的）
+    slots = 0
+    for name in sorted(start, key=start.__getitem__):
+        begin = start[name]
+        while active and active[0][0] <= begin:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            slot = heapq.heappop(free)
+        else:
+            slot = slots
+            slots += 1
+        mapping[name] = f"{TEMP_PREFIX}{slot}"
+        heapq.heappush(active, (end[name], slot))
+
+    for block in cfg.blocks:
+        block.quads = [
+            (op, mapping.get(arg1, arg1), mapping.get(arg2, arg2), mapping.get(result, result))
+            for op, arg1, arg2, result in block.quads
+        ]
+    return len(start), slots
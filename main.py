@@ -1,18 +1,79 @@
 import subprocess
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import json
 from flask_cors import CORS
 import sys
 from quadruple import PcodeToQuadsTranslator
 import os
-from AsmOptimizer import AsmOptimizer
-def is_windows():
-    return sys.platform.startswith("win")
+from worker_pool import ToolRunner
+from result_cache import tool_version
+from config import (TOOLS, KEYWORDS, POOL_SIZE, cache, EXE_CACHE_DIR, EXE_CACHE_BYTES, RUN_CONCURRENCY,
+                    RUN_DIR, RUN_OUTPUT_BYTES, VM_MAX_STEPS, VM_ENGINE)
+from runner import ProgramRunner, BuildError, ExecutableCache, sse_event
+from pipeline import compile_stages, compile_asm, FIELDS, BACKENDS, QUADS_BACKEND_SOURCES, ASM_OPTIMIZER_SOURCES
+from passes import PassManager, DEFAULT_LEVEL, normalize_level
+from vm import VMRunner, normalize_max_steps
 
 
 app = Flask(__name__)
 CORS(app)
 
+tools = ToolRunner(TOOLS, pool_size=POOL_SIZE)
+
+
+def run_stage(name, source_code, timeout=None):
+    """
+    调用前端工具，结果按 (源代码, 工具名, 工具版本) 缓存
+
+    Returns:
+        subprocess.CompletedProcess: 处理结果
+    """
+    key = cache.key(source_code, name, tool_version(TOOLS[name]))
+    result = cache.get(key)
+    if result is None:
+        result = tools.run(name, source_code, timeout)
+        # 进程异常退出（返回码为负，见 worker_pool.crash_returncode）的结果不缓存
+        if result.returncode >= 0:
+            cache.put(key, result)
+    return result
+
+
+# /run 的构建与运行器（配置见 config.py）
+exe_cache = ExecutableCache(EXE_CACHE_DIR, max_bytes=EXE_CACHE_BYTES)
+run_options = dict(
+    max_concurrency=RUN_CONCURRENCY,
+    workspace_root=RUN_DIR,
+    exe_cache=exe_cache,
+    max_output=RUN_OUTPUT_BYTES,
+)
+# 请求中给出优化级别 level 时，运行器以 compile_asm(source_code, level) 生成汇编
+runner = ProgramRunner(
+    lambda source_code, level=None: compile_asm(source_code, run_stage, "acc", timeout=10, level=level),
+    acc_path=TOOLS["acc"],
+    version_paths=ASM_OPTIMIZER_SOURCES,
+    **run_options,
+)
+# 各后端的运行器（见 pipeline.BACKENDS），共享可执行文件缓存
+runners = {
+    "acc": runner,
+    "quads": ProgramRunner(
+        lambda source_code, level=None: compile_asm(source_code, run_stage, "quads", timeout=10, level=level),
+        acc_path=TOOLS["pcode"],
+        compile_step="pcode",
+        version_paths=QUADS_BACKEND_SOURCES,
+        **run_options,
+    ),
+}
+
+# /run 的 "mode": "vm": 在进程内用四元式虚拟机运行，不需要 nasm/gcc
+vm_runner = VMRunner(
+    lambda source_code: run_stage("pcode", source_code, timeout=10),
+    max_steps=VM_MAX_STEPS,
+    max_output=run_options["max_output"],
+    engine=VM_ENGINE,
+    version_paths=(TOOLS["pcode"],),
+)
+
 
 
 @app.route("/keyword",methods=['GET'])
@@ -22,44 +83,14 @@ def get_keyword():
     T_Void T_Int T_While T_If T_Else T_Return T_Explain T_Break T_Continue 
     T_Le T_Ge T_Eq T_Ne T_And T_Or T_inputInt T_outputInt T_Power
     """
-    return jsonify({
-        "T_IntConstant": "整型常量",
-        "T_Identifier": "标识符（变量名或函数名）",
-
-        "T_Void": "空类型",
-        "T_Int": "整型类型",
-        "T_While": "while 循环语句",
-        "T_If": "条件判断 if",
-        "T_Else": "条件分支 else",
-        "T_Return": "函数返回语句",
-        "T_Explain": "注释或说明关键字",
-        "T_Break": "跳出循环",
-        "T_Continue": "跳过本次循环",
-
-        "T_Le": "小于等于运算符",
-        "T_Ge": "大于等于运算符",
-        "T_Eq": "等于比较运算符",
-        "T_Ne": "不等于比较运算符",
-        "T_And": "逻辑与运算符",
-        "T_Or": "逻辑或运算符",
-
-        "T_inputInt": "输入整数函数",
-        "T_outputInt": "输出整数函数",
-        "T_Power": "幂运算函数"
-    })
+    return jsonify(KEYWORDS)
 
 
 @app.route("/check", methods=["POST"])
 def syntaxAnalysis():
     source_code = request.json["code"]
 
-    result = subprocess.run(
-        ["./output/exe/Lexical"+(".exe" if is_windows() else "")],
-        input=source_code,
-        text=True,
-        encoding="utf-8",
-        capture_output=True
-    )
+    result = run_stage("Lexical", source_code)
 
     print(result.stdout)
     data = json.loads(result.stdout)
@@ -75,14 +106,7 @@ def get_symbol_table():
     try:
         source_code = request.json["code"]
 
-        result = subprocess.run(
-            ["./output/exe/symbol_table"+(".exe" if is_windows() else "")],
-            input=source_code,
-            text=True,
-            encoding="utf-8",
-            capture_output=True,
-            timeout=10  # 添加超时防止卡死
-        )
+        result = run_stage("symbol_table", source_code, timeout=10)  # 添加超时防止卡死
 
         # 检查返回码
         if result.returncode == 0:
@@ -113,29 +137,38 @@ def get_symbol_table():
 
 @app.route("/pcode", methods=["POST"])
 def getPcode():
+    """
+    生成 P-code 与四元式
+
+    请求体: {"code": 源代码, "level": 优化级别}，给出 level（O0/O1/O2/Os）时四元式按该级别优化，
+    响应中的 optimization 给出各优化遍的耗时与四元式条数变化
+    """
     try:
         source_code = request.json['code']
-        result = subprocess.run(
-            ["./output/exe/pcode"+(".exe" if is_windows() else "")],
-            input=source_code,
-            text=True,
-            encoding="utf-8",
-            capture_output=True,
-            timeout=10  # 添加超时防止卡死
-        )
+        try:
+            level = normalize_level(request.json.get('level'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        result = run_stage("pcode", source_code, timeout=10)  # 添加超时防止卡死
 
         # 检查返回码
         if result.returncode == 0:
             data = result.stdout
             print(data)
             pt= PcodeToQuadsTranslator()
-            print(pt.translate(data))
-            return jsonify({
+            # 逐行翻译，每个函数的四元式在读到 END FUNC 时产出
+            quads = {"functions": dict(pt.translate_stream(data.splitlines()))}
+            payload = {
                 "success": True,
                 "code": len(source_code),
                 "pcode": list(map(str,data.split('\n'))),
-                "quads":json.loads(json.dumps(pt.translate(data)))
-            })
+            }
+            if level is not None:
+                manager = PassManager(level)
+                quads["functions"] = manager.optimize_quads(quads["functions"])
+                payload["optimization"] = manager.summary()
+            payload["quads"] = json.loads(json.dumps(quads))
+            return jsonify(payload)
         else:
             # 失败 - stderr可能包含错误信息
             error_message = result.stderr if result.stderr else "编译过程出错"
@@ -157,14 +190,7 @@ def getPcode():
 def getAST():
     try:
         source_code = request.json['code']
-        result = subprocess.run(
-            ["./output/exe/ast"+(".exe" if is_windows() else "")],
-            input=source_code,
-            text=True,
-            encoding="utf-8",
-            capture_output=True,
-            timeout=10  # 添加超时防止卡死
-        )
+        result = run_stage("ast", source_code, timeout=10)  # 添加超时防止卡死
 
         # 检查返回码
         if result.returncode == 0:
@@ -196,16 +222,23 @@ def getAST():
 
 @app.route("/asm", methods=["POST"],strict_slashes=False)
 def getASM():
+    """
+    生成汇编
+
+    请求体: {"code": 源代码, "backend": 后端, "level": 优化级别}，backend 为 "acc"（默认，栈式代码）
+    或 "quads"（由优化后的四元式做寄存器分配生成）。给出 level（O0/O1/O2/Os）时按该级别
+    运行四元式（quads 后端）与汇编优化遍，响应中的 optimization 给出各遍的耗时与指令条数变化
+    """
     try:
         source_code = request.json['code']
-        result = subprocess.run(
-            ["./output/test/acc"+(".exe" if is_windows() else "")],
-            input=source_code,
-            text=True,
-            encoding="utf-8",
-            capture_output=True,
-            timeout=10  # 添加超时防止卡死
-        )
+        backend = request.json.get('backend', 'acc')
+        if backend not in BACKENDS:
+            return jsonify({"success": False, "error": f"未知的后端: {backend}"}), 400
+        try:
+            level = normalize_level(request.json.get('level'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        result = compile_asm(source_code, run_stage, backend, timeout=10, level=level)  # 添加超时防止卡死
 
         # 检查返回码
         if result.returncode == 0:
@@ -213,11 +246,14 @@ def getASM():
             print(data)
             # pt= PcodeToQuadsTranslator()
             # print(pt.translate(data))
-            return jsonify({
+            payload = {
                 "success": True,
                 "code": len(source_code),
                 "data": data,
-            })
+            }
+            if level is not None:
+                payload["optimization"] = result.optimization
+            return jsonify(payload)
         else:
             # 失败 - stderr可能包含错误信息
             error_message = result.stderr if result.stderr else "编译过程出错"
@@ -235,92 +271,142 @@ def getASM():
     except Exception as e:
         return jsonify({"success": False, "error": f"服务器内部错误: {str(e)}"}), 500
 
+@app.route("/compile", methods=["POST"])
+def compile_all():
+    """
+    一次请求返回多个阶段的结果
+
+    请求体: {"code": 源代码, "fields": [阶段名, ...]}，fields 省略时返回全部阶段:
+    tokens, symbol_table, ast, pcode, quads, asm, optimized_asm
+    """
+    try:
+        source_code = request.json['code']
+        fields = request.json.get('fields') or list(FIELDS)
+        data, errors = compile_stages(source_code, fields, run_stage, timeout=10)
+        return jsonify({
+            "success": not errors,
+            "code": len(source_code),
+            "data": data,
+            "errors": errors
+        })
+    except KeyError:
+        return jsonify({"success": False, "error": "缺少code字段"}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": f"服务器内部错误: {str(e)}"}), 500
+
 
 import platform
 
 def is_windows():
     return platform.system() == "Windows"
 
+@app.route("/workers", methods=["GET"])
+def get_workers():
+    """常驻进程池状态，同时对空闲进程做一次心跳检测"""
+    restarted = tools.health_check()
+    return jsonify({
+        "success": True,
+        "restarted": restarted,
+        "pools": tools.stats()
+    })
+
+@app.route("/cache", methods=["GET"])
+def get_cache_stats():
+    """编译结果缓存的命中统计"""
+    return jsonify({
+        "success": True,
+        "stats": cache.stats(),
+        "executables": runner.exe_cache.stats()
+    })
+
 @app.route("/optimize", methods=["POST"])
 def optimize_route():
+    """
+    优化汇编
+
+    请求体: {"asm": 汇编, "level": 优化级别}，level 未给出或为 null 时为 O2（启用全部汇编优化遍）
+    """
     try:
         source_asm = request.json.get('asm', '')
         if not source_asm:
             return jsonify({"success": False, "error": "No ASM code provided"}), 400
-        
-        optimizer = AsmOptimizer(source_asm)
-        result = optimizer.optimize()
-        
+        try:
+            manager = PassManager(normalize_level(request.json.get('level')) or DEFAULT_LEVEL)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        result = manager.optimize_asm(source_asm)
+
         return jsonify({
             "success": True,
             "optimized_asm": result["data"],
-            "stats": result["stats"]
+            "stats": result["stats"],
+            "optimization": manager.summary()
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
     
 @app.route("/run", methods=["POST"])
 def getResult():
+    """
+    构建并运行程序
+
+    请求体: {"code": 源代码, "input_str": 标准输入, "stream": 是否流式返回,
+             "mode": 运行方式, "backend": 后端, "max_steps": 指令数上限, "level": 优化级别}
+    stream 为 true 时返回 text/event-stream: 若干 stdout 事件，最后一个 exit 事件
+    mode 为 "native"（默认）时构建可执行文件运行，backend 与 /asm 相同，默认 "acc"；
+    为 "vm" 时用四元式虚拟机在进程内运行，以 max_steps 条四元式代替超时（1 到 ACLANG_VM_MAX_STEPS
+    的整数，默认为 ACLANG_VM_MAX_STEPS），响应中带 steps
+    level（O0/O1/O2/Os）与 /asm 相同；vm 模式下只影响四元式的优化
+    """
     try:
         source_code = request.json['code']
-        with open("./output/test/tmp.ac","w") as f:
-            f.write(source_code)
-        
         input_str = request.json.get('input_str', '')
-        print("=========================================== ")
-        print(input_str)
-        ac_file = "tmp.ac"
-        workdir = "./output/test"
-
-        if sys.platform.startswith("win"):
-            # Windows → PowerShell
-            cmd = [
-                "powershell",
-                "-ExecutionPolicy", "Bypass",
-                "-File", "build.ps1",
-                ac_file
-            ]
+        mode = request.json.get('mode', 'native')
+        try:
+            options = {"level": normalize_level(request.json.get('level'))}
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if mode == 'vm':
+            runner = vm_runner
+            try:
+                options["max_steps"] = normalize_max_steps(request.json.get('max_steps'), VM_MAX_STEPS)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+        elif mode == 'native':
+            backend = request.json.get('backend', 'acc')
+            if backend not in runners:
+                return jsonify({"success": False, "error": f"未知的后端: {backend}"}), 400
+            runner = runners[backend]
         else:
-            # Linux / macOS / WSL → bash
-            cmd = [
-                "bash",
-                "build.sh",
-                ac_file
-            ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=workdir,
-            capture_output=True,
-            text=True
-        )
-        print( os.getcwd())
-        print("./output/test/tmp"+(".exe" if is_windows() else ""))
-
-        result = subprocess.run(
-            ["./output/test/tmp/tmp"+(".exe" if is_windows() else "")],
-            input=input_str,
-            text=True,
-            encoding="utf-8",
-            capture_output=True,
-            timeout=10  # 添加超时防止卡死
-        )
-        # return jsonify({
-        #     "stdout": result.stdout,
-        #     "stderr": result.stderr,
-        #     "returncode": result.returncode
-        # })
-        # # 检查返回码
+            return jsonify({"success": False, "error": f"未知的运行方式: {mode}"}), 400
+
+        if request.json.get('stream'):
+            # 流式输出: 以 server-sent events 逐块返回程序输出
+            events = runner.stream(source_code, input_str, timeout=10, **options)
+            next(events)  # 构建并启动程序，构建失败时在这里抛出 BuildError
+            return Response(
+                (sse_event(event, {"data": data} if event == "stdout" else data) for event, data in events),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        # 每次运行使用独立的临时工作目录，可并行处理
+        result = runner.run(source_code, input_str, timeout=10, **options)  # 添加超时防止卡死
+
+        # 检查返回码
         if result.returncode == 0:
             data = result.stdout
-            # print(data)
-            # pt= PcodeToQuadsTranslator()
-            # print(pt.translate(data))
-            return jsonify({
+            payload = {
                 "success": True,
                 "code": len(source_code),
                 "data": data,
-            })
+            }
+            if mode == 'vm':
+                payload["steps"] = result.steps
+            return jsonify(payload)
         else:
             # 失败 - stderr可能包含错误信息
             error_message = result.stderr if result.stderr else "编译过程出错"
@@ -329,8 +415,18 @@ def getResult():
                 "error": error_message,
                 "returncode": result.returncode,
                 "raw_stderr": result.stderr,
-                "raw_stdout": json.loads(result.stdout)
+                "raw_stdout": result.stdout
             }), 400
+    except BuildError as e:
+        # 构建失败（acc / nasm / gcc）
+        return jsonify({
+            "success": False,
+            "error": e.result.stderr if e.result.stderr else "编译过程出错",
+            "step": e.step,
+            "returncode": e.result.returncode,
+            "raw_stderr": e.result.stderr,
+            "raw_stdout": e.result.stdout
+        }), 400
     except KeyError:
         return jsonify({"success": False, "error": "缺少code字段"}), 400
     except subprocess.TimeoutExpired:
@@ -339,4 +435,4 @@ def getResult():
         return jsonify({"success": False, "error": f"服务器内部错误: {str(e)}"}), 500
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
\ No newline at end of file
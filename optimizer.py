@@ -1,6 +1,9 @@
 """
 四元式优化器模块
 """
+from cfg import ControlFlowGraph
+from dataflow import compact_temps, eliminate_dead_code, global_names, number_values, propagate_constants
+
 
 class QuadOptimizer:
     """四元式优化器"""
@@ -8,7 +11,11 @@ class QuadOptimizer:
     @staticmethod
     def constant_folding(quads):
         """
-        常数折叠优化
+        常数折叠与常量/复写传播
+        
+        在控制流图上做正向数据流分析，跨基本块把变量的使用替换为已知的常量
+        或与之相等的原变量，折叠算术、比较与逻辑运算，条件已知的 jz 改为
+        无条件跳转或删除。
         
         Args:
             quads: 四元式列表
@@ -16,101 +23,94 @@ class QuadOptimizer:
         Returns:
             list: 优化后的四元式列表
         """
-        optimized = []
-        const_map = {}  # 临时变量到常数的映射
-        
-        for quad in quads:
-            op, arg1, arg2, result = quad
-            
-            # 检查是否可以进行常数折叠
-            if op == ':=' and arg1.isdigit():
-                const_map[result] = arg1
-                optimized.append(quad)
-                continue
-            
-            # 如果是二元运算，且两个操作数都是常数
-            if op in '+-*/' and arg1 in const_map and arg2 in const_map:
-                try:
-                    val1 = int(const_map[arg1])
-                    val2 = int(const_map[arg2])
-                    if op == '+':
-                        result_val = val1 + val2
-                    elif op == '-':
-                        result_val = val1 - val2
-                    elif op == '*':
-                        result_val = val1 * val2
-                    elif op == '/':
-                        if val2 != 0:
-                            result_val = val1 // val2
-                        else:
-                            optimized.append(quad)
-                            continue
-                    
-                    const_map[result] = str(result_val)
-                    # 用赋值替换运算
-                    optimized.append((':=', str(result_val), '_', result))
-                except:
-                    optimized.append(quad)
-            else:
-                optimized.append(quad)
-        
-        return optimized
+        quads = list(quads)
+        cfg = ControlFlowGraph.from_quads(quads)
+        propagate_constants(cfg, global_names(quads))
+        return cfg.to_quads()
     
     @staticmethod
     def dead_code_elimination(quads):
         """
         死代码消除
         
+        在控制流图上做活跃变量分析，一次删除所有结果不再被使用的赋值与运算，
+        包括循环中的死代码。函数外定义的（全局）变量在返回及调用时视为活跃。
+        
         Args:
             quads: 四元式列表
             
         Returns:
             list: 优化后的四元式列表
         """
-        used_vars = set()
-        optimized = []
+        quads = list(quads)
+        cfg = ControlFlowGraph.from_quads(quads)
+        eliminate_dead_code(cfg, global_names(quads))
+        return cfg.to_quads()
+    
+    @staticmethod
+    def common_subexpression_elimination(quads, extended=True, stats=None):
+        """
+        公共子表达式消除（值编号）
         
-        # 反向扫描，标记使用的变量
-        for quad in reversed(quads):
-            op, arg1, arg2, result = quad
-            
-            # 收集使用的变量
-            if arg1 and not arg1.isdigit() and arg1 not in '_-':
-                used_vars.add(arg1)
-            if arg2 and not arg2.isdigit() and arg2 not in '_-':
-                used_vars.add(arg2)
-            
-            # 如果是赋值给临时变量，但临时变量未被使用，则是死代码
-            if op == ':=' and result.startswith('t') and result not in used_vars:
-                continue  # 跳过这个四元式
+        重复计算的表达式改为从先前的结果复制，使用处替换为最早持有同一值的
+        变量；产生的多余复制由 dead_code_elimination 删除。
+        
+        Args:
+            quads: 四元式列表
+            extended: 为 True 时在扩展基本块上跨块编号，否则只在基本块内
+            stats: 可选的统计字典，累加 cse_eliminated（消除的重复计算条数）
             
-            optimized.append(quad)
+        Returns:
+            list: 优化后的四元式列表
+        """
+        quads = list(quads)
+        cfg = ControlFlowGraph.from_quads(quads)
+        eliminated = number_values(cfg, global_names(quads), extended)
+        if stats is not None:
+            stats['cse_eliminated'] = stats.get('cse_eliminated', 0) + eliminated
+        return cfg.to_quads()
+    
+    @staticmethod
+    def compact_temps(quads, stats=None):
+        """
+        临时变量压缩
         
-        optimized.reverse()
-        return optimized
+        按活跃区间把临时变量映射到尽量少的可复用槽位（仍命名为 %t0, %t1, ...），
+        生成代码时每个槽位只需一个栈位置或寄存器。
+        
+        Args:
+            quads: 四元式列表
+            stats: 可选的统计字典，累加 temps_before / temps_after
+            
+        Returns:
+            list: 改写后的四元式列表
+        """
+        quads = list(quads)
+        cfg = ControlFlowGraph.from_quads(quads)
+        before, after = compact_temps(cfg, global_names(quads))
+        if stats is not None:
+            stats['temps_before'] = stats.get('temps_before', 0) + before
+            stats['temps_after'] = stats.get('temps_after', 0) + after
+        return cfg.to_quads()
     
     @staticmethod
-    def optimize(quads):
+    def optimize(quads, stats=None):
         """
         综合优化
         
         Args:
             quads: 四元式列表
+            stats: 可选的统计字典，记录各优化的效果
             
         Returns:
             list: 优化后的四元式列表
         """
-        optimized = quads.copy()
-        
-        # 多次优化，直到不再变化
-        while True:
-            old_len = len(optimized)
-            
-            # 应用各种优化
-            optimized = QuadOptimizer.constant_folding(optimized)
-            optimized = QuadOptimizer.dead_code_elimination(optimized)
-            
-            if len(optimized) == old_len:
-                break
-        
-        return optimized
\ No newline at end of file
+        optimized = QuadOptimizer.constant_folding(quads)
+        optimized = QuadOptimizer.common_subexpression_elimination(optimized, stats=stats)
+        # 活跃变量分析一次即可找出全部死代码，不需要反复执行
+        optimized = QuadOptimizer.dead_code_elimination(optimized)
+        optimized = QuadOptimizer.compact_temps(optimized, stats=stats)
+        if stats is not None:
+            stats['quads_before'] = stats.get('quads_before', 0) + len(quads)
+            stats['quads_after'] = stats.get('quads_after', 0) + len(optimized)
+        return optimized
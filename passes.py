@@ -0,0 +1,151 @@
+"""
+优化遍管理模块
+
+四元式级与汇编级的优化遍在这里登记，按优化级别组成流水线:
+
+    O0  不做任何优化
+    O1  常量传播与死代码消除；汇编只做窥孔与 push/pop 配对，编译最快
+    O2  QuadOptimizer.optimize 的完整流水线；汇编启用 AsmOptimizer 的全部遍（默认）
+    Os  在 O2 的基础上，值编号之后再做一次常量/复写传播，以更长的编译时间换取更少的指令
+
+PassManager 按级别运行流水线，并记录每个遍的耗时与指令条数的变化。
+"""
+import time
+
+from AsmOptimizer import PASSES as ASM_PASSES, AsmOptimizer
+from optimizer import QuadOptimizer
+
+
+# 四元式优化遍: 遍名 -> 函数 f(quads, stats)，对一个函数的四元式列表做变换并返回新列表
+QUAD_PASSES = {
+    "constant_folding": lambda quads, stats: QuadOptimizer.constant_folding(quads),
+    "local_cse": lambda quads, stats: QuadOptimizer.common_subexpression_elimination(quads, False, stats),
+    "cse": lambda quads, stats: QuadOptimizer.common_subexpression_elimination(quads, True, stats),
+    "dead_code_elimination": lambda quads, stats: QuadOptimizer.dead_code_elimination(quads),
+    "compact_temps": lambda quads, stats: QuadOptimizer.compact_temps(quads, stats),
+}
+
+# 优化级别 -> (四元式流水线, 汇编优化遍)；汇编优化遍按 AsmOptimizer.PASSES 的顺序执行
+LEVELS = {
+    "O0": ((), ()),
+    "O1": (("constant_folding", "dead_code_elimination"), ("peephole", "push_pop")),
+    "O2": (("constant_folding", "cse", "dead_code_elimination", "compact_temps"), ASM_PASSES),
+    "Os": (("constant_folding", "cse", "constant_folding", "dead_code_elimination", "compact_temps"), ASM_PASSES),
+}
+
+DEFAULT_LEVEL = "O2"
+
+
+def register_quad_pass(name, function):
+    """
+    登记一个四元式优化遍，之后可以在 PassManager 的自定义流水线中使用
+
+    Args:
+        name: 遍名
+        function: f(quads, stats)，返回优化后的四元式列表；stats 为统计字典，可以累加计数
+    """
+    QUAD_PASSES[name] = function
+
+
+def normalize_level(level):
+    """
+    把 "O2"、"-O2"、"2"、2 等写法统一为 LEVELS 中的级别名，None 原样返回（表示未指定）
+
+    Raises:
+        ValueError: 未知的优化级别
+    """
+    if level is None:
+        return None
+    name = str(level).lstrip("-")
+    if not name.startswith("O"):
+        name = "O" + name
+    if name not in LEVELS:
+        raise ValueError(f"未知的优化级别: {level}，可选: {', '.join(LEVELS)}")
+    return name
+
+
+class PassManager:
+    """按优化级别运行四元式与汇编优化遍，report 记录每个遍的耗时与指令条数变化"""
+
+    def __init__(self, level=DEFAULT_LEVEL, quad_passes=None, asm_passes=None):
+        """
+        Args:
+            level: 优化级别（见 LEVELS，接受 normalize_level 的各种写法）
+            quad_passes: 自定义的四元式流水线（QUAD_PASSES 中的遍名），None 表示使用级别的设置
+            asm_passes: 自定义的汇编优化遍（AsmOptimizer.PASSES 中的遍名），None 表示使用级别的设置
+
+        Raises:
+            ValueError: 未知的优化级别（包括 None）或优化遍
+        """
+        if level is None:
+            raise ValueError(f"未指定优化级别，可选: {', '.join(LEVELS)}")
+        self.level = normalize_level(level)
+        default_quad, default_asm = LEVELS[self.level]
+        self.quad_passes = tuple(default_quad if quad_passes is None else quad_passes)
+        self.asm_passes = tuple(default_asm if asm_passes is None else asm_passes)
+        unknown = [name for name in self.quad_passes if name not in QUAD_PASSES]
+        unknown += [name for name in self.asm_passes if name not in ASM_PASSES]
+        if unknown:
+            raise ValueError(f"未知的优化遍: {', '.join(unknown)}")
+        self.report = []
+
+    def optimize_quads(self, functions, stats=None):
+        """
+        对每个函数的四元式运行四元式流水线
+
+        每个遍依次作用于所有函数，report 中每个遍一项:
+        {"stage": "quads", "name", "seconds", "before", "after"}，before/after 为所有函数的四元式总条数。
+
+        Args:
+            functions: {函数名: 四元式列表}
+            stats: 可选的统计字典，传给各个遍（如 cse_eliminated、temps_before/temps_after）
+
+        Returns:
+            dict: {函数名: 优化后的四元式列表}
+        """
+        functions = {name: list(quads) for name, quads in functions.items()}
+        stats = {} if stats is None else stats
+        for name in self.quad_passes:
+            function = QUAD_PASSES[name]
+            before = sum(map(len, functions.values()))
+            start = time.perf_counter()
+            functions = {fname: function(quads, stats) for fname, quads in functions.items()}
+            self.report.append({
+                "stage": "quads",
+                "name": name,
+                "seconds": round(time.perf_counter() - start, 6),
+                "before": before,
+                "after": sum(map(len, functions.values())),
+            })
+        return functions
+
+    def optimize_asm(self, asm):
+        """
+        用 AsmOptimizer 运行汇编优化遍
+
+        report 中每个遍一项: {"stage": "asm", "name", "seconds", "before", "after"}，
+        before/after 为该遍累计删除的行数折算出的前后行数（各遍交替执行，按 PASSES 顺序累计）。
+
+        Returns:
+            dict: AsmOptimizer.optimize 的结果 {"data": 优化后的汇编, "stats": 统计}
+        """
+        result = AsmOptimizer(asm, self.asm_passes).optimize()
+        count = result["stats"]["original"]
+        for name, entry in result["stats"]["profile"].items():
+            self.report.append({
+                "stage": "asm",
+                "name": name,
+                "seconds": entry["seconds"],
+                "before": count,
+                "after": count - entry["removed"],
+            })
+            count -= entry["removed"]
+        return result
+
+    def summary(self):
+        """level、各遍的报告以及总耗时，作为接口响应中的 "optimization" 字段"""
+        return {
+            "level": self.level,
+            "passes": list(self.report),
+            "seconds": round(sum(entry["seconds"] for entry in self.report), 6),
+        }
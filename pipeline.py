@@ -0,0 +1,222 @@
+"""
+编译流水线模块
+
+一次请求内按需调用各前端工具，并由同一份工具输出派生出所有阶段的结果：
+词法单元、符号表、语法树、P-code、四元式、汇编以及优化后的汇编。
+未请求的阶段不会被计算。
+"""
+import asyncio
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import AsmOptimizer as asm_optimizer
+import cfg
+import codegen
+import dataflow
+import optimizer
+import passes
+import quadruple
+from quadruple import PcodeToQuadsTranslator
+from AsmOptimizer import AsmOptimizer
+from passes import PassManager, normalize_level
+
+
+# 阶段名 -> 产生该阶段所需的前端工具
+STAGE_TOOLS = {
+    "tokens": "Lexical",
+    "symbol_table": "symbol_table",
+    "ast": "ast",
+    "pcode": "pcode",
+    "quads": "pcode",
+    "asm": "acc",
+    "optimized_asm": "acc",
+}
+
+FIELDS = tuple(STAGE_TOOLS)
+
+# 不检查返回码的工具（词法分析总是输出完整的 token 列表，错误以 LEX_ERROR 表示）
+_ALWAYS_OK = {"Lexical"}
+
+_executor = ThreadPoolExecutor(max_workers=len(set(STAGE_TOOLS.values())))
+
+# /asm 与 /run 可选的汇编后端:
+#   acc   前端工具 acc 直接生成的栈式代码
+#   quads Pcode -> 四元式 -> QuadOptimizer -> codegen 寄存器分配后生成的代码
+BACKENDS = ("acc", "quads")
+
+# 按优化级别优化汇编用到的 Python 源文件
+ASM_OPTIMIZER_SOURCES = tuple(module.__file__ for module in (asm_optimizer, passes))
+
+# quads 后端生成汇编用到的 Python 源文件，计入可执行文件缓存的工具链版本
+QUADS_BACKEND_SOURCES = tuple(module.__file__ for module in (quadruple, cfg, dataflow, optimizer, codegen)) \
+    + ASM_OPTIMIZER_SOURCES
+
+
+def _derive(field, stdout):
+    """由工具输出得到某个阶段的结果"""
+    if field in ("tokens", "ast"):
+        return json.loads(stdout)
+    if field == "symbol_table":
+        return json.loads(stdout.strip() if stdout else "{}")
+    if field == "pcode":
+        return stdout.split('\n')
+    if field == "quads":
+        return PcodeToQuadsTranslator().translate(stdout)
+    if field == "asm":
+        return stdout
+    if field == "optimized_asm":
+        result = AsmOptimizer(stdout).optimize()
+        return {"data": result["data"], "stats": result["stats"]}
+    raise KeyError(field)
+
+
+def _check_fields(fields):
+    unknown = [field for field in fields if field not in STAGE_TOOLS]
+    if unknown:
+        raise ValueError(f"未知的阶段: {', '.join(unknown)}")
+    return sorted({STAGE_TOOLS[field] for field in fields})
+
+
+def _collect(fields, outputs):
+    """由各工具的输出组装阶段结果，工具输出为 None 表示超时"""
+    data = {}
+    errors = {}
+    for field in fields:
+        result = outputs[STAGE_TOOLS[field]]
+        if result is None:
+            errors[field] = {"error": "处理超时"}
+        elif result.returncode != 0 and STAGE_TOOLS[field] not in _ALWAYS_OK:
+            errors[field] = {
+                "error": result.stderr if result.stderr else "编译过程出错",
+                "returncode": result.returncode,
+            }
+        else:
+            try:
+                data[field] = _derive(field, result.stdout)
+            except Exception as e:
+                errors[field] = {"error": f"结果解析失败: {str(e)}"}
+    return data, errors
+
+
+def compile_stages(source_code, fields, run_stage, timeout=10):
+    """
+    运行流水线，只计算请求的阶段
+
+    Args:
+        source_code: 源代码
+        fields: 需要的阶段名列表（见 FIELDS）
+        run_stage: 可调用对象 run_stage(tool_name, source_code, timeout)，返回 CompletedProcess
+        timeout: 每个前端工具的超时时间（秒）
+
+    Returns:
+        tuple: (data, errors)，data 为 {阶段名: 结果}，errors 为 {阶段名: 错误信息}
+
+    Raises:
+        ValueError: 请求了未知的阶段
+    """
+    tool_names = _check_fields(fields)
+
+    def call(name):
+        try:
+            return run_stage(name, source_code, timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    # 各工具互不依赖，并行调用
+    outputs = dict(zip(tool_names, _executor.map(call, tool_names)))
+    return _collect(fields, outputs)
+
+
+async def compile_stages_async(source_code, fields, run_stage, timeout=10):
+    """
+    compile_stages 的 asyncio 版本
+
+    Args:
+        run_stage: 协程函数 run_stage(tool_name, source_code, timeout)
+
+    Returns:
+        tuple: (data, errors)
+    """
+    tool_names = _check_fields(fields)
+
+    async def call(name):
+        try:
+            return await run_stage(name, source_code, timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    results = await asyncio.gather(*(call(name) for name in tool_names))
+    # 四元式翻译与汇编优化是纯 Python 计算，放到线程中避免阻塞事件循环
+    return await asyncio.to_thread(_collect, fields, dict(zip(tool_names, results)))
+
+
+def _backend_tool(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的后端: {backend}，可选: {', '.join(BACKENDS)}")
+    return "acc" if backend == "acc" else "pcode"
+
+
+def _quads_asm(result):
+    """由 pcode 工具的输出生成 quads 后端的汇编，结果与 acc 的输出形式相同"""
+    if result.returncode != 0:
+        return result
+    return subprocess.CompletedProcess(result.args, 0, codegen.compile_pcode(result.stdout), result.stderr)
+
+
+def _leveled_asm(result, backend, level):
+    """
+    按优化级别生成汇编: quads 后端运行该级别的四元式流水线，两个后端的汇编
+    再经过该级别的汇编优化遍；结果的 optimization 属性为 PassManager.summary()
+    """
+    if result.returncode != 0:
+        return result
+    manager = PassManager(level)
+    asm = result.stdout if backend == "acc" else codegen.compile_pcode(result.stdout, passes=manager)
+    if manager.asm_passes:
+        asm = manager.optimize_asm(asm)["data"] + "\n"
+    leveled = subprocess.CompletedProcess(result.args, 0, asm, result.stderr)
+    leveled.optimization = manager.summary()
+    return leveled
+
+
+def compile_asm(source_code, run_stage, backend="acc", timeout=10, level=None):
+    """
+    用指定后端生成汇编
+
+    Args:
+        source_code: 源代码
+        run_stage: 可调用对象 run_stage(tool_name, source_code, timeout)，返回 CompletedProcess
+        backend: 后端名（见 BACKENDS）
+        timeout: 前端工具的超时时间（秒）
+        level: 优化级别（见 passes.LEVELS），None 表示 acc 的输出不做优化、
+            quads 后端使用 QuadOptimizer.optimize
+
+    Returns:
+        subprocess.CompletedProcess: stdout 为汇编文本；前端工具失败时为其原始结果。
+            指定 level 时 optimization 属性给出各优化遍的耗时与指令条数变化
+
+    Raises:
+        ValueError: 未知的后端或优化级别
+    """
+    tool = _backend_tool(backend)
+    level = normalize_level(level)
+    result = run_stage(tool, source_code, timeout)
+    if level is not None:
+        return _leveled_asm(result, backend, level)
+    return result if tool == "acc" else _quads_asm(result)
+
+
+async def compile_asm_async(source_code, run_stage, backend="acc", timeout=10, level=None):
+    """
+    compile_asm 的 asyncio 版本
+
+    Args:
+        run_stage: 协程函数 run_stage(tool_name, source_code, timeout)
+    """
+    tool = _backend_tool(backend)
+    level = normalize_level(level)
+    result = await run_stage(tool, source_code, timeout)
+    if level is not None:
+        return await asyncio.to_thread(_leveled_asm, result, backend, level)
+    return result if tool == "acc" else await asyncio.to_thread(_quads_asm, result)
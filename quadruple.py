@@ -1,6 +1,32 @@
 """
 Pcode到四元式转换器核心模块
+
+P-code 是操作数栈上的指令序列（由 Pcode/Pcode.y 生成），各指令的栈效果与生成的四元式:
+
+    LIT n / LOD x     压栈                           (:=, n/x, _, t)
+    STO x             弹出一个值存入 x                (:=, t, _, x)
+    ADD SUB MUL DIV GT LT GE LE EQ NE AND OR POW
+                      弹出两个值，结果压栈            (op, a, b, t)
+    CALL f            弹出 f 的形参个数个实参，返回值压栈
+                                                     (param, a, _, _)... (call, f, _, t)
+    POP               丢弃栈顶（作为语句的调用的返回值）
+    IN                读入整数压栈                    (in, _, _, t)
+    OUT               弹出并输出                      (out, t, _, _)
+    RET / STOP        弹出返回值返回 / 结束程序       (return, t, _, _) / (halt, _, _, _)
+    JMP L / JZ L      跳转 / 弹出并为零时跳转         (j, _, _, L) / (jz, t, _, L)
+    LABEL L           标签，不影响操作数栈            (LABEL, _, _, L)
+
+CALL 调用尚未定义的函数时参数个数未知，弹出整个栈。没有 POP 的旧 P-code 也能翻译:
+作为语句的调用的返回值留在栈上，但之后的 CALL 只弹出自己的实参，不会把它当作实参。
+
+表中的 t 是转换器生成的临时变量，命名为 %t0, %t1, ...
 """
+from array import array
+from itertools import chain
+
+# 临时变量名的前缀: '%' 不能出现在源程序的标识符中，临时变量不会与用户变量重名
+TEMP_PREFIX = '%t'
+
 
 class Quadruple:
     """四元式类"""
@@ -19,6 +45,162 @@ class Quadruple:
     def to_tuple(self):
         return (self.op, self.arg1, self.arg2, self.result)
 
+
+# 四元式运算符 -> 整数编码
+OPCODES = (
+    ':=', '+', '-', '*', '/', '>', '<', '>=', '<=', '==', '!=', 'AND', 'OR',
+    'declare', 'func', 'param', 'call', 'return', 'halt', 'j', 'jz', 'LABEL',
+    '**', 'in', 'out',
+)
+OPCODE_INDEX = {op: code for code, op in enumerate(OPCODES)}
+
+# 占位操作数 '_' 的编号
+BLANK = 0
+
+
+class OperandPool:
+    """
+    操作数驻留表: 每个不同的操作数只保存一份，四元式中以整数编号引用
+
+    临时变量 %tN 不保存字符串，编号为负数 ~N（即 -N-1），只在转换为元组视图时生成名字。
+    """
+
+    def __init__(self):
+        self.symbols = []  # 编号 -> 字符串
+        self.index = {}  # 字符串 -> 编号
+        self.intern('_')  # 占位符 '_' 的编号固定为 BLANK
+
+    def intern(self, symbol):
+        """返回操作数的编号，首次出现时登记"""
+        code = self.index.get(symbol)
+        if code is None:
+            code = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    @staticmethod
+    def temp(n):
+        """第 n 个临时变量的编号"""
+        return ~n
+
+    def name(self, code):
+        """编号 -> 操作数字符串"""
+        return self.symbols[code] if code >= 0 else f"{TEMP_PREFIX}{~code}"
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+class QuadBuffer:
+    """
+    紧凑的四元式序列
+
+    所有四元式依次以 (运算符编码, arg1, arg2, result) 四个整数保存在同一个数组中，
+    操作数为 OperandPool 编号，每条四元式只占 16 字节，不再为每条四元式及
+    每个临时变量名创建对象。迭代与下标访问得到 (op, arg1, arg2, result) 元组，
+    与原先的列表接口一致。
+    """
+
+    def __init__(self, pool=None, quads=()):
+        """
+        Args:
+            pool: 共享的 OperandPool，省略时新建
+            quads: 初始四元式（元组序列）
+        """
+        self.pool = pool if pool is not None else OperandPool()
+        self.codes = array('i')
+        self.extend(quads)
+
+    def append(self, op, arg1, arg2, result):
+        """
+        追加一条四元式
+
+        Raises:
+            ValueError: 未知的运算符
+        """
+        code = OPCODE_INDEX.get(op)
+        if code is None:
+            raise ValueError(f"未知的四元式运算符: {op}")
+        intern = self.pool.intern
+        self.codes.extend((code, intern(arg1), intern(arg2), intern(result)))
+
+    def append_codes(self, op, arg1, arg2, result):
+        """按编码追加一条四元式（op 为运算符编码，其余为操作数编号）"""
+        self.codes.extend((op, arg1, arg2, result))
+
+    def extend(self, quads):
+        for quad in quads:
+            self.append(*quad)
+
+    def __len__(self):
+        return len(self.codes) >> 2
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("四元式下标越界")
+        op, arg1, arg2, result = self.codes[4 * i:4 * i + 4]
+        name = self.pool.name
+        return (OPCODES[op], name(arg1), name(arg2), name(result))
+
+    def __iter__(self):
+        return iter(self.to_tuples())
+
+    def copy(self):
+        """复制四元式序列（共享操作数表）"""
+        other = QuadBuffer(self.pool)
+        other.codes = array('i', self.codes)
+        return other
+
+    def to_tuples(self):
+        """转换为 [(op, arg1, arg2, result), ...]，供 JSON 接口使用"""
+        codes = self.codes
+        symbols = self.pool.symbols
+        n = len(self)
+        names = [symbols[c] if c >= 0 else f"{TEMP_PREFIX}{~c}" for c in codes[1::4] + codes[2::4] + codes[3::4]]
+        return list(zip(map(OPCODES.__getitem__, codes[0::4]), names[:n], names[n:2 * n], names[2 * n:]))
+
+    def nbytes(self):
+        """数组占用的字节数（不含操作数表）"""
+        return self.codes.itemsize * len(self.codes)
+
+
+# 二元运算 Pcode 操作码 -> 四元式运算符
+BINARY_OPS = {
+    'ADD': '+',
+    'SUB': '-',
+    'MUL': '*',
+    'DIV': '/',
+    'GT': '>',
+    'LT': '<',
+    'GE': '>=',
+    'LE': '<=',
+    'EQ': '==',
+    'NE': '!=',
+    'AND': 'AND',
+    'OR': 'OR',
+    'POW': '**',
+}
+BINARY_CODES = {opcode: OPCODE_INDEX[op] for opcode, op in BINARY_OPS.items()}
+
+
+def tokenize_pcode(pcode_code):
+    """
+    把 Pcode 文本一次性切分为指令列表，空行与注释被丢弃
+
+    Args:
+        pcode_code: Pcode代码字符串
+
+    Returns:
+        list: 每条指令按空白切分后的列表 [操作码, 操作数...]
+    """
+    tokens = [parts for parts in map(str.split, pcode_code.split('\n')) if parts]
+    if '#' in pcode_code:
+        tokens = [parts for parts in tokens if parts[0][0] != '#']
+    return tokens
+
+
 class PcodeToQuadsTranslator:
     """Pcode到四元式转换器"""
     
@@ -29,18 +211,34 @@ class PcodeToQuadsTranslator:
         Args:
             optimize: 是否进行优化
         """
-        self.quads = []  # 主程序四元式列表
-        self.func_quads = {}  # 函数四元式字典 {函数名: [四元式列表]}
+        self.operands = OperandPool()  # 所有四元式共享的操作数表
+        self.quads = QuadBuffer(self.operands)  # 主程序四元式
+        self.func_quads = {}  # 函数四元式字典 {函数名: QuadBuffer}
         self.current_func = None  # 当前处理的函数名
         self.temp_counter = 0  # 临时变量计数器
         self.label_counter = 0  # 标签计数器
         self.symbol_table = {}  # 符号表
-        self.arg_stack = []  # 参数栈
+        self.arg_stack = []  # 参数栈（保存操作数编号）
+        self.func_arity = {}  # 已定义函数的参数个数 {函数名: 个数}
         self.optimize = optimize  # 优化标志
+
+        # 操作码分派表: 操作码 -> 处理函数(操作数)；LIT/LOD/STO 与二元运算在 _translate_body 中直接处理
+        self._handlers = {
+            'CALL': self._op_call,
+            'RET': self._op_ret,
+            'STOP': self._op_stop,
+            'JMP': self._op_jmp,
+            'JZ': self._op_jz,
+            'INT': self._op_int,
+            'LABEL': self._op_label,
+            'IN': self._op_in,
+            'OUT': self._op_out,
+            'POP': self._op_pop,
+        }
         
     def new_temp(self):
         """生成新的临时变量"""
-        temp = f"t{self.temp_counter}"
+        temp = f"{TEMP_PREFIX}{self.temp_counter}"
         self.temp_counter += 1
         return temp
     
@@ -60,28 +258,37 @@ class PcodeToQuadsTranslator:
             arg2: 操作数2
             result: 结果
         """
-        quad = Quadruple(op, arg1, arg2, result)
-        
+        self._scope().append(op, arg1, arg2, result)
+
+    def _scope(self):
+        """当前作用域的四元式序列: 当前函数或主程序"""
         if self.current_func:
-            # 添加到当前函数
             if self.current_func not in self.func_quads:
-                self.func_quads[self.current_func] = []
-            self.func_quads[self.current_func].append(quad)
-        else:
-            # 添加到主程序
-            self.quads.append(quad)
-        
-        return quad
+                self.func_quads[self.current_func] = QuadBuffer(self.operands)
+            return self.func_quads[self.current_func]
+        return self.quads
+
+    def _emit(self, op, arg1, arg2, result):
+        """按编码添加四元式到当前作用域（op 为运算符，操作数为 OperandPool 编号）"""
+        self._scope().append_codes(OPCODE_INDEX[op], arg1, arg2, result)
+
+    def _new_temp_code(self):
+        """生成新的临时变量，返回其操作数编号"""
+        code = ~self.temp_counter
+        self.temp_counter += 1
+        return code
 
     def clear(self):
         """清除所有状态"""
-        self.quads.clear()
+        self.operands = OperandPool()
+        self.quads = QuadBuffer(self.operands)
         self.func_quads.clear()
         self.current_func = None
         self.temp_counter = 0
         self.label_counter = 0
         self.symbol_table.clear()
         self.arg_stack.clear()
+        self.func_arity.clear()
     
     def translate(self, pcode_code):
         """
@@ -94,265 +301,219 @@ class PcodeToQuadsTranslator:
             dict: 包含四元式的字典
         """
         self.clear()
-        lines = pcode_code.strip().split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            if not line or line.startswith('#'):
-                # 空行或注释，跳过
-                i += 1
-                continue
+        for _ in self._translate_tokens(tokenize_pcode(pcode_code)):
+            pass
+        return self.get_result()
+
+    def translate_stream(self, lines):
+        """
+        逐行翻译 Pcode，每读到一个 END FUNC 就产出该函数的四元式
+
+        lines 可以是任意按行迭代的对象（文件、子进程的 stdout、生成器等），
+        不需要先读入完整输出；已产出的函数不再保留在转换器中，内存占用只与
+        单个函数的大小有关。
+
+        Args:
+            lines: Pcode 文本行的可迭代对象
+
+        Yields:
+            tuple: (函数名, [(op, arg1, arg2, result), ...])
+        """
+        self.clear()
+        for func_name in self._translate_tokens(filter(None, map(str.split, lines))):
+            yield func_name, self.func_quads.pop(func_name).to_tuples()
+
+    def _translate_tokens(self, tokens):
+        """
+        翻译已切分的指令序列（不含空行），每翻译完一个函数产出其函数名
+
+        函数体在读取的同时逐条翻译，不必等到 END FUNC 才开始。
+        """
+        tokens = iter(tokens)
+        for parts in tokens:
+            opcode = parts[0]
             
-            if line.startswith('FUNC'):
+            if opcode == 'FUNC':
                 # 处理函数定义
-                func_name = line.split()[1].replace('@', '')
+                func_name = parts[1].replace('@', '')
                 self.current_func = func_name
-                i += 1
                 
                 # 处理参数
                 params = []
-                while i < len(lines) and lines[i].strip().startswith('ARG'):
-                    param = lines[i].strip().split()[1]
-                    params.append(param)
-                    i += 1
+                parts = next(tokens, None)
+                while parts is not None and parts[0] == 'ARG':
+                    params.append(parts[1])
+                    parts = next(tokens, None)
+                self._begin_func(func_name, params)
                 
-                # 处理函数体
-                func_body = []
-                while i < len(lines) and not lines[i].strip().startswith('END FUNC'):
-                    func_body.append(lines[i].strip())
-                    i += 1
-                
-                i += 1  # 跳过 END FUNC
-                
-                # 翻译函数体
-                self._translate_func_body(func_name, params, func_body)
+                # 翻译函数体: 到 END FUNC 为止，缺少 END FUNC 时到输入结尾为止
+                if parts is not None and parts[0] != 'END':
+                    self._translate_body(chain((parts,), tokens))
                 self.current_func = None
+                yield func_name
                 
-            elif line.startswith('INT') or line.startswith('VAR'):
+            elif opcode == 'INT' or opcode == 'VAR':
                 # 处理变量声明
-                parts = line.split()
                 if len(parts) >= 2:
                     var_name = parts[1]
-                    var_type = 'int' if line.startswith('INT') else 'var'
+                    var_type = 'int' if opcode == 'INT' else 'var'
                     self.symbol_table[var_name] = var_type
                     self.add_quad('declare', var_type, '_', var_name)
-                i += 1        
-        return self.get_result()
     
-    def _translate_func_body(self, func_name, params, body):
-        """翻译函数体"""
+    def _begin_func(self, func_name, params):
+        """生成函数入口与参数的四元式"""
         # 添加函数入口标签
         self.add_quad('func', '_', '_', func_name)
+        self.func_arity[func_name] = len(params)
         
         # 处理参数
         for i, param in enumerate(params):
             self.add_quad('param', param, '_', f"arg{i}")
-        
-        # 翻译函数体指令
-        for line in body:
-            if line:
-                self._translate_instruction(line)
-    
-    def _translate_instruction(self, instr):
-        """翻译单条指令"""
-        if not instr:
-            return
-        
-        parts = instr.split()
-        if not parts:
-            return
-        
-        opcode = parts[0]
-        
-        if opcode == 'LIT':
-            # 加载常数: LIT value
-            if len(parts) >= 2:
-                value = parts[1]
-                temp = self.new_temp()
-                self.add_quad(':=', value, '_', temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'LOD':
-            # 加载变量: LOD var_name
-            if len(parts) >= 2:
-                var_name = parts[1]
-                temp = self.new_temp()
-                self.add_quad(':=', var_name, '_', temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'STO':
-            # 存储到变量: STO var_name
-            if len(parts) >= 2 and self.arg_stack:
-                var_name = parts[1]
-                value = self.arg_stack.pop()
-                self.add_quad(':=', value, '_', var_name)
-        
-        elif opcode == 'ADD':
-            # 加法: ADD
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('+', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'SUB':
-            # 减法: SUB
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('-', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'MUL':
-            # 乘法: MUL
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('*', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'DIV':
-            # 除法: DIV
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('/', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'CALL':
-            # 函数调用: CALL func_name
-            if len(parts) >= 2:
-                func_name = parts[1].replace('@', '')
-                
-                # 获取参数（从栈中弹出）
-                args = []
-                while self.arg_stack:
-                    args.append(self.arg_stack.pop())
-                
-                # 注意：参数顺序需要反转，因为栈是后进先出
-                args.reverse()
-                
-                # 生成参数传递四元式
-                for arg in args:
-                    self.add_quad('param', arg, '_', '_')
-                
-                # 生成调用四元式
-                result_temp = self.new_temp()
-                self.add_quad('call', func_name, '_', result_temp)
-                self.arg_stack.append(result_temp)
-        
-        elif opcode == 'RET':
-            # 返回语句: RET
-            if self.arg_stack:
-                ret_value = self.arg_stack.pop()
-                self.add_quad('return', ret_value, '_', '_')
+
+    def _translate_body(self, body):
+        """
+        翻译当前函数的函数体
+
+        Args:
+            body: 已切分指令的迭代器，读到 END 时停止（END 本身被消耗）
+        """
+        # 翻译函数体指令: 最常见的 LIT/LOD/STO 与二元运算直接处理，其余按分派表调用
+        quads = self._scope()
+        # 先收集到列表中，遇到由处理函数生成的四元式前及函数结束时批量写入数组
+        pending = []
+        emit = pending.extend
+        flush = quads.codes.fromlist
+        intern = self.operands.intern
+        lookup = self.operands.index.get  # 已登记操作数直接查表，避免函数调用
+        assign = OPCODE_INDEX[':=']
+        blank = BLANK
+        stack = self.arg_stack
+        push = stack.append
+        pop = stack.pop
+        handlers = self._handlers
+        binary_codes = BINARY_CODES
+        counter = self.temp_counter  # 临时变量计数器的局部副本，调用处理函数前后同步
+        for parts in body:
+            opcode = parts[0]
+            if opcode == 'LOD' or opcode == 'LIT':
+                if len(parts) >= 2:
+                    operand = lookup(parts[1])
+                    if operand is None:
+                        operand = intern(parts[1])
+                    temp = ~counter
+                    counter += 1
+                    emit((assign, operand, blank, temp))
+                    push(temp)
+            elif opcode == 'STO':
+                if len(parts) >= 2 and stack:
+                    target = lookup(parts[1])
+                    if target is None:
+                        target = intern(parts[1])
+                    emit((assign, pop(), blank, target))
+            elif opcode in binary_codes:
+                if len(stack) >= 2:
+                    right = pop()
+                    temp = ~counter
+                    counter += 1
+                    emit((binary_codes[opcode], pop(), right, temp))
+                    push(temp)
             else:
-                self.add_quad('return', '_', '_', '_')
-        
-        elif opcode == 'STOP':
-            # 程序结束: STOP
-            self.add_quad('halt', '_', '_', '_')
-        
-        elif opcode == 'JMP':
-            # 无条件跳转: JMP label
-            if len(parts) >= 2:
-                label = parts[1]
-                self.add_quad('j', '_', '_', label)
-        
-        elif opcode == 'JZ':
-            # 条件跳转（为零跳转）: JZ label
-            if len(parts) >= 2 and self.arg_stack:
-                label = parts[1]
-                condition = self.arg_stack.pop()
-                self.add_quad('jz', condition, '_', label)
-
-        elif opcode == 'GT':
-            # 条件跳转（大于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('>', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'LT':
-            # 条件跳转（小于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('<', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'GE':
-            # 条件跳转（大于等于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('>=', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'LE':
-            # 条件跳转（小于等于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('<=', left, right, temp)
-                self.arg_stack.append(temp)
-        
-        elif opcode == 'AND':
-            # 条件跳转（小于等于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('AND', left, right, temp)
-                self.arg_stack.append(temp)
-
-        elif opcode == 'OR':
-            # 有一个为真: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('OR', left, right, temp)
-                self.arg_stack.append(temp)
-
-        elif opcode == 'EQ':
-            # 条件跳转（等于跳转）: 
-            if len(self.arg_stack) >= 2:
-                right = self.arg_stack.pop()
-                left = self.arg_stack.pop()
-                temp = self.new_temp()
-                self.add_quad('==', left, right, temp)
-                self.arg_stack.append(temp)
-
-        elif opcode == 'INT':
-            # 定义变量: INT var_name
-            if len(parts) >= 2:
-                var_name = parts[1]
-                var_type = 'int'
-                self.symbol_table[var_name] = var_type
-                self.add_quad('declare', var_type, '_', var_name)
-        
-        elif opcode == 'LABEL':
-            # 条件跳转（为零跳转）: JZ label
-            if len(parts) >= 2 and self.arg_stack:
-                label = parts[1]
-                condition = self.arg_stack.pop()
-                self.add_quad('LABEL', condition, '_', label)
-        
+                if opcode == 'END':
+                    # END FUNC: 函数体结束
+                    break
+                if opcode[0] == '#':
+                    # 注释
+                    continue
+                handler = handlers.get(opcode)
+                if handler is None:
+                    # 未知指令，忽略或警告
+                    print(f"警告: 未知指令 '{' '.join(parts)}'")
+                else:
+                    flush(pending)
+                    pending.clear()
+                    self.temp_counter = counter
+                    handler(parts[1] if len(parts) >= 2 else None)
+                    counter = self.temp_counter
+        flush(pending)
+        self.temp_counter = counter
+    
+    # ---------- 其余操作码的处理函数 ----------
+
+    def _op_call(self, operand):
+        # 函数调用: CALL func_name
+        if operand is not None:
+            func_name = operand.replace('@', '')
+            
+            # 获取参数（从栈中弹出）: 已知参数个数时只弹出对应个数，
+            # 否则（调用尚未定义的函数）弹出整个栈
+            arity = self.func_arity.get(func_name)
+            if arity is None or arity > len(self.arg_stack):
+                arity = len(self.arg_stack)
+            args = []
+            for _ in range(arity):
+                args.append(self.arg_stack.pop())
+            
+            # 注意：参数顺序需要反转，因为栈是后进先出
+            args.reverse()
+            
+            # 生成参数传递四元式
+            for arg in args:
+                self._emit('param', arg, BLANK, BLANK)
+            
+            # 生成调用四元式
+            result_temp = self._new_temp_code()
+            self._emit('call', self.operands.intern(func_name), BLANK, result_temp)
+            self.arg_stack.append(result_temp)
+
+    def _op_ret(self, operand):
+        # 返回语句: RET
+        if self.arg_stack:
+            ret_value = self.arg_stack.pop()
+            self._emit('return', ret_value, BLANK, BLANK)
         else:
-            # 未知指令，忽略或警告
-            print(f"警告: 未知指令 '{instr}'")
+            self._emit('return', BLANK, BLANK, BLANK)
+
+    def _op_stop(self, operand):
+        # 程序结束: STOP
+        self._emit('halt', BLANK, BLANK, BLANK)
+
+    def _op_jmp(self, operand):
+        # 无条件跳转: JMP label
+        if operand is not None:
+            self._emit('j', BLANK, BLANK, self.operands.intern(operand))
+
+    def _op_jz(self, operand):
+        # 条件跳转（为零跳转）: JZ label
+        if operand is not None and self.arg_stack:
+            condition = self.arg_stack.pop()
+            self._emit('jz', condition, BLANK, self.operands.intern(operand))
+
+    def _op_int(self, operand):
+        # 定义变量: INT var_name
+        if operand is not None:
+            self.symbol_table[operand] = 'int'
+            self.add_quad('declare', 'int', '_', operand)
+
+    def _op_label(self, operand):
+        # 标签: LABEL label（不影响操作数栈）
+        if operand is not None:
+            self._emit('LABEL', BLANK, BLANK, self.operands.intern(operand))
+
+    def _op_in(self, operand):
+        # 读入整数: IN，结果压栈
+        temp = self._new_temp_code()
+        self._emit('in', BLANK, BLANK, temp)
+        self.arg_stack.append(temp)
+
+    def _op_out(self, operand):
+        # 输出整数: OUT，弹出栈顶
+        if self.arg_stack:
+            self._emit('out', self.arg_stack.pop(), BLANK, BLANK)
+
+    def _op_pop(self, operand):
+        # 丢弃栈顶（作为语句的函数调用的返回值）: POP
+        if self.arg_stack:
+            self.arg_stack.pop()
 
     def get_result(self):
         """
@@ -363,7 +524,7 @@ class PcodeToQuadsTranslator:
         """
         return {
             'functions': {
-                func_name: [quad.to_tuple() for quad in quads]
+                func_name: quads.to_tuples()
                 for func_name, quads in self.func_quads.items()
             }
         }   
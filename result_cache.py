@@ -0,0 +1,250 @@
+"""
+编译结果缓存模块
+
+以 (源代码, 阶段, 工具版本) 的哈希为键缓存前端工具的输出。
+内存层为按条目数和字节数限制的 LRU，可选的磁盘层在重启后依然有效。
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+
+_version_memo = {}
+
+
+def tool_version(path):
+    """
+    计算工具可执行文件的版本指纹（文件内容的哈希）
+
+    按 (路径, 修改时间, 大小) 记忆，工具重新编译后自动失效。
+
+    Returns:
+        str: 版本指纹，文件不存在时返回 "missing"
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (st.st_mtime_ns, st.st_size)
+    memo = _version_memo.get(path)
+    if memo and memo[0] == stamp:
+        return memo[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    version = digest.hexdigest()[:16]
+    _version_memo[path] = (stamp, version)
+    return version
+
+
+def _result_size(result):
+    return len(result.stdout.encode("utf-8")) + len(result.stderr.encode("utf-8"))
+
+
+class ResultCache:
+    """两级结果缓存：内存 LRU + 可选磁盘目录"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 << 20,
+                 disk_dir=None, disk_max_entries=100000, disk_max_bytes=1 << 30):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存层最大条目数
+            max_bytes: 内存层最大字节数
+            disk_dir: 磁盘层目录，None 表示不启用磁盘层
+            disk_max_entries: 磁盘层最大条目数
+            disk_max_bytes: 磁盘层最大字节数
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self.memory = OrderedDict()  # key -> (result, size)
+        self.memory_bytes = 0
+        self.disk_index = OrderedDict()  # key -> size，按最近使用排序
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(source_code, stage, version):
+        """
+        计算缓存键
+
+        Args:
+            source_code: 源代码
+            stage: 阶段名（工具名）
+            version: 工具版本指纹
+
+        Returns:
+            str: 十六进制哈希
+        """
+        digest = hashlib.sha256()
+        for part in (stage, version, source_code):
+            data = part.encode("utf-8")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    # ---------- 磁盘层 ----------
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _load_disk_index(self):
+        """启动时扫描磁盘目录，按修改时间重建 LRU 顺序"""
+        entries = []
+        for sub in os.listdir(self.disk_dir):
+            sub_dir = os.path.join(self.disk_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if not name.endswith(".json"):
+                    continue
+                st = os.stat(os.path.join(sub_dir, name))
+                entries.append((st.st_mtime, name[:-5], st.st_size))
+        entries.sort()
+        for _, key, size in entries:
+            self.disk_index[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _disk_get(self, key):
+        if key not in self.disk_index:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.disk_bytes -= self.disk_index.pop(key)
+            return None
+        self.disk_index.move_to_end(key)
+        try:
+            os.utime(self._disk_path(key))
+        except OSError:
+            pass
+        return subprocess.CompletedProcess(data["args"], data["returncode"], data["stdout"], data["stderr"])
+
+    def _disk_put(self, key, result):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps({
+            "args": result.args,
+            "returncode": result.returncode,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+        }, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        if key in self.disk_index:
+            self.disk_bytes -= self.disk_index.pop(key)
+        self.disk_index[key] = len(payload)
+        self.disk_bytes += len(payload)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while self.disk_index and (len(self.disk_index) > self.disk_max_entries
+                                   or self.disk_bytes > self.disk_max_bytes):
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            self.counters["disk_evictions"] += 1
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    # ---------- 内存层 ----------
+
+    def _memory_put(self, key, result, size):
+        if key in self.memory:
+            self.memory_bytes -= self.memory.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self.memory[key] = (result, size)
+        self.memory_bytes += size
+        while len(self.memory) > self.max_entries or self.memory_bytes > self.max_bytes:
+            _, (_, old_size) = self.memory.popitem(last=False)
+            self.memory_bytes -= old_size
+            self.counters["memory_evictions"] += 1
+
+    # ---------- 对外接口 ----------
+
+    def get(self, key):
+        """
+        查找缓存
+
+        Returns:
+            subprocess.CompletedProcess 或 None
+        """
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+            if self.disk_dir:
+                result = self._disk_get(key)
+                if result is not None:
+                    self._memory_put(key, result, _result_size(result))
+                    self.counters["disk_hits"] += 1
+                    return result
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, result):
+        """写入缓存（内存层与磁盘层）"""
+        with self.lock:
+            self._memory_put(key, result, _result_size(result))
+            if self.disk_dir:
+                try:
+                    self._disk_put(key, result)
+                except OSError:
+                    pass
+            self.counters["stores"] += 1
+
+    def clear(self):
+        """清空内存层（磁盘层保留）"""
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+
+    def stats(self):
+        """
+        缓存统计信息
+
+        Returns:
+            dict: 命中/未命中计数与各层占用
+        """
+        with self.lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_enabled": bool(self.disk_dir),
+                "disk_entries": len(self.disk_index),
+                "disk_bytes": self.disk_bytes,
+            }
@@ -0,0 +1,707 @@
+"""
+程序构建与运行模块
+
+每次运行在独立的临时工作目录中完成 acc → nasm → gcc 构建并执行，
+多个请求可以并行，最大并发数由信号量限制，运行结束后清理工作目录。
+构建出的可执行文件按 (源代码, 工具链版本) 缓存，重复运行直接执行。
+程序输出可以边运行边逐块返回，总输出超过上限时结束程序。
+"""
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+from result_cache import tool_version
+from worker_pool import run_process_async
+
+
+def nasm_format():
+    """根据当前平台选择 NASM 输出格式（与 build.sh 一致）"""
+    system = platform.system()
+    is_64 = platform.machine().lower() in ("x86_64", "amd64", "arm64", "aarch64")
+    if system == "Windows" or system.startswith(("MINGW", "MSYS", "CYGWIN")):
+        return "win64" if is_64 else "win32"
+    if system == "Darwin":
+        return "macho64" if is_64 else "macho32"
+    return "elf64" if is_64 else "elf32"
+
+
+def sse_event(event, data):
+    """
+    格式化一条 server-sent event
+
+    Args:
+        event: 事件名
+        data: 可 JSON 序列化的数据
+
+    Returns:
+        str: SSE 文本
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _truncated_message(max_bytes):
+    return f"输出超过 {max_bytes} 字节，程序已被终止"
+
+
+def stream_process(proc, input_str, timeout, max_bytes, chunk_size=4096):
+    """
+    逐块读取子进程的标准输出
+
+    超时计时、写入标准输入与读取标准错误在调用时就开始，而不是等到第一次迭代，
+    因此调用方推迟迭代（如 Flask 在开始发送响应体时才迭代）期间程序也受超时限制。
+    不再迭代时应调用返回值的 close()，以结束子进程并关闭管道。
+
+    Args:
+        proc: subprocess.Popen，stdin/stdout/stderr 均为管道
+        input_str: 写入标准输入的内容
+        timeout: 超时时间（秒），超时后结束子进程
+        max_bytes: 标准输出字节数上限，超过后结束子进程
+        chunk_size: 单次读取的字节数
+
+    Returns:
+        generator: 产出 ("stdout", 文本块)，最后一项为 ("exit", {returncode, stderr, timeout, truncated, bytes})
+    """
+    events = _stream_process(proc, input_str, timeout, max_bytes, chunk_size)
+    next(events)  # 启动计时器与读写线程
+    return events
+
+
+def _stream_process(proc, input_str, timeout, max_bytes, chunk_size):
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        proc.kill()
+
+    def feed():
+        try:
+            proc.stdin.write((input_str or "").encode("utf-8"))
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    stderr_chunks = []
+
+    def drain_stderr():
+        size = 0
+        for chunk in iter(lambda: proc.stderr.read(chunk_size), b""):
+            if size < max_bytes:
+                stderr_chunks.append(chunk[:max_bytes - size])
+                size += len(chunk)
+
+    timer = threading.Timer(timeout, on_timeout) if timeout is not None else None
+    threads = [threading.Thread(target=feed, daemon=True), threading.Thread(target=drain_stderr, daemon=True)]
+    for t in threads:
+        t.start()
+    if timer is not None:
+        timer.start()
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    total = 0
+    truncated = False
+    try:
+        yield "start", None
+        fd = proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, chunk_size)
+            if not chunk:
+                break
+            if total + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - total]
+                truncated = True
+            total += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                yield "stdout", text
+            if truncated:
+                proc.kill()
+                break
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield "stdout", text
+        returncode = proc.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for t in threads:
+            t.join(1)
+        for pipe in (proc.stdout, proc.stderr):
+            pipe.close()
+
+    stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+    if truncated:
+        stderr += _truncated_message(max_bytes)
+    yield "exit", {
+        "returncode": returncode,
+        "stderr": stderr,
+        "timeout": timed_out.is_set(),
+        "truncated": truncated,
+        "bytes": total,
+    }
+
+
+class BuildError(Exception):
+    """构建失败"""
+
+    def __init__(self, step, result):
+        """
+        Args:
+            step: 失败的步骤（acc / nasm / gcc）
+            result: 该步骤的 subprocess.CompletedProcess
+        """
+        super().__init__(f"{step} failed")
+        self.step = step
+        self.result = result
+
+
+class ExecutableCache:
+    """
+    可执行文件缓存，按磁盘占用做 LRU 淘汰
+
+    get / put 返回的文件在调用 release 之前处于占用状态，淘汰时跳过，
+    避免并发请求正要运行的文件被删除。
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 << 20):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存目录占用上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index = OrderedDict()  # 文件名 -> 大小，按最近使用排序
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.key_locks = {}  # 键 -> [锁, 持有或等待该锁的线程数]
+        self.pins = {}  # 键 -> 占用数
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            st = os.stat(os.path.join(cache_dir, name))
+            entries.append((st.st_mtime, name, st.st_size))
+        entries.sort()
+        for _, name, size in entries:
+            self.index[name] = size
+            self.total_bytes += size
+        with self.lock:
+            self._evict()
+
+    @contextmanager
+    def key_lock(self, key):
+        """
+        同一个键的构建互斥，避免并发请求重复构建同一程序
+
+        锁在没有线程持有或等待时才从 key_locks 中移除。
+        """
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.key_locks[key]
+
+    def get(self, key, record=True):
+        """
+        查找已构建的可执行文件，找到时占用该条目，用完后需调用 release(key)
+
+        Args:
+            key: 缓存键
+            record: 是否计入命中/未命中统计
+
+        Returns:
+            str 或 None: 可执行文件路径
+        """
+        with self.lock:
+            if key not in self.index:
+                if record:
+                    self.counters["misses"] += 1
+                return None
+            self.index.move_to_end(key)
+            self.pins[key] = self.pins.get(key, 0) + 1
+            if record:
+                self.counters["hits"] += 1
+        path = os.path.join(self.cache_dir, key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, exe_file):
+        """
+        把构建好的可执行文件移入缓存并占用该条目，用完后需调用 release(key)
+
+        Returns:
+            str: 缓存中的可执行文件路径
+        """
+        path = os.path.join(self.cache_dir, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copy2(exe_file, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            if key in self.index:
+                self.total_bytes -= self.index.pop(key)
+            self.index[key] = size
+            self.total_bytes += size
+            self.counters["stores"] += 1
+            self.pins[key] = self.pins.get(key, 0) + 1
+            self._evict()
+        return path
+
+    def release(self, key):
+        """解除 get / put 对条目的一次占用，占用全部解除后按需淘汰"""
+        with self.lock:
+            count = self.pins.get(key, 0) - 1
+            if count > 0:
+                self.pins[key] = count
+            else:
+                self.pins.pop(key, None)
+                self._evict()
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        # 按最近使用顺序淘汰未被占用的条目
+        for key in [key for key in self.index if key not in self.pins]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.total_bytes -= self.index.pop(key)
+            self.counters["evictions"] += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """缓存统计信息"""
+        with self.lock:
+            return {**self.counters, "entries": len(self.index), "bytes": self.total_bytes,
+                    "pinned": len(self.pins)}
+
+
+class ProgramRunner:
+    """并行安全的程序构建与运行器"""
+
+    def __init__(self, compile_asm, max_concurrency=None, workspace_root=None,
+                 nasm="nasm", gcc="gcc", acc_path=None, exe_cache=None, max_output=1 << 20,
+                 compile_step="acc", version_paths=()):
+        """
+        初始化运行器
+
+        Args:
+            compile_asm: 可调用对象 compile_asm(source_code)，返回 stdout 为汇编的 CompletedProcess（如 acc 的输出）；
+                运行时指定了优化级别 level 时以 compile_asm(source_code, level) 调用
+            max_concurrency: 同时构建/运行的最大数量，默认等于 CPU 核数
+            workspace_root: 临时工作目录的父目录，None 表示系统临时目录
+            nasm: nasm 可执行文件
+            gcc: gcc 可执行文件
+            acc_path: acc 可执行文件路径，用于计算工具链版本
+            exe_cache: ExecutableCache，None 表示每次都重新构建
+            max_output: 程序标准输出的字节数上限，超过后结束程序
+            compile_step: compile_asm 失败时 BuildError 中的步骤名
+            version_paths: 其他参与生成汇编的文件（如 Python 代码生成器的源文件），计入工具链版本
+        """
+        self.compile_asm = compile_asm
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.workspace_root = workspace_root
+        self.nasm = nasm
+        self.gcc = gcc
+        self.acc_path = acc_path
+        self.exe_cache = exe_cache
+        self.max_output = max_output
+        self.compile_step = compile_step
+        self.version_paths = tuple(version_paths)
+        self.exe_suffix = ".exe" if platform.system() == "Windows" else ""
+        if workspace_root:
+            os.makedirs(workspace_root, exist_ok=True)
+
+    def toolchain_version(self):
+        """acc / nasm / gcc（及 version_paths）的版本指纹"""
+        parts = [nasm_format()]
+        for path in (self.acc_path, shutil.which(self.nasm), shutil.which(self.gcc), *self.version_paths):
+            parts.append(tool_version(path) if path else "missing")
+        return "-".join(parts)
+
+    def cache_key(self, source_code, level=None):
+        """可执行文件缓存键：源代码、工具链版本与优化级别的哈希"""
+        digest = hashlib.sha256()
+        digest.update(self.toolchain_version().encode("utf-8"))
+        digest.update(b"\0")
+        if level is not None:
+            digest.update(f"level={level}\0".encode("utf-8"))
+        digest.update(source_code.encode("utf-8"))
+        return digest.hexdigest()[:32] + self.exe_suffix
+
+    def _compile(self, source_code, level):
+        return self.compile_asm(source_code) if level is None else self.compile_asm(source_code, level)
+
+    def build(self, source_code, workdir, level=None):
+        """
+        在 workdir 中构建可执行文件
+
+        Returns:
+            str: 可执行文件路径
+
+        Raises:
+            BuildError: 任一步骤失败
+        """
+        result = self._compile(source_code, level)
+        if result.returncode != 0:
+            raise BuildError(self.compile_step, result)
+
+        asm_file = os.path.join(workdir, "prog.asm")
+        obj_file = os.path.join(workdir, "prog.o")
+        exe_file = os.path.join(workdir, "prog" + self.exe_suffix)
+        with open(asm_file, "w", encoding="utf-8") as f:
+            f.write(result.stdout)
+
+        result = subprocess.run(
+            [self.nasm, "-f", nasm_format(), asm_file, "-o", obj_file],
+            capture_output=True, text=True, timeout=30
+        )
+        if result.returncode != 0:
+            raise BuildError("nasm", result)
+
+        result = subprocess.run(
+            [self.gcc, obj_file, "-o", exe_file],
+            capture_output=True, text=True, timeout=30
+        )
+        if result.returncode != 0:
+            raise BuildError("gcc", result)
+        return exe_file
+
+    def _spawn(self, exe_file):
+        return subprocess.Popen(
+            [os.path.abspath(exe_file)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+    def execute(self, exe_file, input_str, timeout=10):
+        """
+        运行可执行文件，输出超过 max_output 字节时结束程序
+
+        Returns:
+            subprocess.CompletedProcess: 运行结果
+
+        Raises:
+            subprocess.TimeoutExpired: 运行超时
+        """
+        chunks = []
+        for event, data in stream_process(self._spawn(exe_file), input_str, timeout, self.max_output):
+            if event == "stdout":
+                chunks.append(data)
+            else:
+                info = data
+        if info["timeout"]:
+            raise subprocess.TimeoutExpired([exe_file], timeout)
+        return subprocess.CompletedProcess([exe_file], info["returncode"], "".join(chunks), info["stderr"])
+
+    def prepare(self, source_code, level=None):
+        """
+        得到源程序对应的可执行文件，命中缓存时跳过构建
+
+        Args:
+            source_code: 源代码
+            level: 优化级别，None 表示按 compile_asm 的默认方式生成汇编
+
+        Returns:
+            tuple: (可执行文件路径, 运行结束后调用的清理函数)；清理函数删除临时工作目录，
+                或解除缓存条目的占用
+
+        Raises:
+            BuildError: 构建失败
+        """
+        if self.exe_cache is None:
+            workdir = tempfile.mkdtemp(prefix="aclang-run-", dir=self.workspace_root)
+            try:
+                exe_file = self.build(source_code, workdir, level)
+            except BaseException:
+                shutil.rmtree(workdir, ignore_errors=True)
+                raise
+            return exe_file, lambda: shutil.rmtree(workdir, ignore_errors=True)
+
+        key = self.cache_key(source_code, level)
+        exe_file = self.exe_cache.get(key)
+        if exe_file is None:
+            with self.exe_cache.key_lock(key):
+                # 等锁期间可能已被其他请求构建完成
+                exe_file = self.exe_cache.get(key, record=False)
+                if exe_file is None:
+                    workdir = tempfile.mkdtemp(prefix="aclang-run-", dir=self.workspace_root)
+                    try:
+                        exe_file = self.exe_cache.put(key, self.build(source_code, workdir, level))
+                    finally:
+                        shutil.rmtree(workdir, ignore_errors=True)
+        return exe_file, lambda: self.exe_cache.release(key)
+
+    def run(self, source_code, input_str="", timeout=10, level=None):
+        """
+        构建并运行一个源程序
+
+        Args:
+            source_code: 源代码
+            input_str: 程序的标准输入
+            timeout: 运行超时时间（秒）
+            level: 优化级别，见 prepare
+
+        Returns:
+            subprocess.CompletedProcess: 运行结果
+
+        Raises:
+            BuildError: 构建失败
+            subprocess.TimeoutExpired: 运行超时
+        """
+        with self.slots:
+            exe_file, cleanup = self.prepare(source_code, level)
+            try:
+                return self.execute(exe_file, input_str, timeout)
+            finally:
+                cleanup()
+
+    def stream(self, source_code, input_str="", timeout=10, level=None):
+        """
+        构建并运行一个源程序，边运行边产出输出
+
+        第一次迭代完成构建并启动程序，产出 ("start", None)，构建失败时在此抛出
+        BuildError；之后产出 ("stdout", 文本块)，最后产出 ("exit", 信息)。
+        生成器被提前关闭时结束程序并清理工作目录。
+
+        Yields:
+            tuple: (事件名, 数据)
+        """
+        with self.slots:
+            exe_file, cleanup = self.prepare(source_code, level)
+            events = None
+            try:
+                # 超时从启动程序时开始计算
+                events = stream_process(self._spawn(exe_file), input_str, timeout, self.max_output)
+                yield "start", None
+                yield from events
+            finally:
+                if events is not None:
+                    events.close()
+                cleanup()
+
+
+class AsyncProgramRunner(ProgramRunner):
+    """ProgramRunner 的 asyncio 版本，构建与运行都以非阻塞方式等待子进程"""
+
+    def __init__(self, compile_asm, **kwargs):
+        """
+        Args:
+            compile_asm: 协程函数 compile_asm(source_code)，返回 acc 的 CompletedProcess；
+                指定优化级别时以 compile_asm(source_code, level) 调用
+            kwargs: 与 ProgramRunner 相同
+        """
+        super().__init__(compile_asm, **kwargs)
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.build_locks = {}  # 键 -> [锁, 持有或等待该锁的协程数]
+
+    @asynccontextmanager
+    async def _build_lock(self, key):
+        """同一个键的构建互斥；锁在没有协程持有或等待时才从 build_locks 中移除"""
+        entry = self.build_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.build_locks[key]
+
+    async def build(self, source_code, workdir, level=None):
+        """在 workdir 中构建可执行文件，失败时抛出 BuildError"""
+        result = await self._compile(source_code, level)
+        if result.returncode != 0:
+            raise BuildError(self.compile_step, result)
+
+        asm_file = os.path.join(workdir, "prog.asm")
+        obj_file = os.path.join(workdir, "prog.o")
+        exe_file = os.path.join(workdir, "prog" + self.exe_suffix)
+        with open(asm_file, "w", encoding="utf-8") as f:
+            f.write(result.stdout)
+
+        result = await run_process_async([self.nasm, "-f", nasm_format(), asm_file, "-o", obj_file], timeout=30)
+        if result.returncode != 0:
+            raise BuildError("nasm", result)
+
+        result = await run_process_async([self.gcc, obj_file, "-o", exe_file], timeout=30)
+        if result.returncode != 0:
+            raise BuildError("gcc", result)
+        return exe_file
+
+    async def prepare(self, source_code, level=None):
+        """得到可执行文件，返回 (路径, 运行结束后调用的清理函数)，见 ProgramRunner.prepare"""
+        if self.exe_cache is None:
+            workdir = tempfile.mkdtemp(prefix="aclang-run-", dir=self.workspace_root)
+            try:
+                exe_file = await self.build(source_code, workdir, level)
+            except BaseException:
+                shutil.rmtree(workdir, ignore_errors=True)
+                raise
+            return exe_file, lambda: shutil.rmtree(workdir, ignore_errors=True)
+
+        # 工具链版本要哈希文件，缓存查找要访问磁盘，都放到线程中
+        key = await asyncio.to_thread(self.cache_key, source_code, level)
+        exe_file = await asyncio.to_thread(self.exe_cache.get, key)
+        if exe_file is None:
+            async with self._build_lock(key):
+                # 等锁期间可能已被其他请求构建完成
+                exe_file = await asyncio.to_thread(self.exe_cache.get, key, False)
+                if exe_file is None:
+                    workdir = tempfile.mkdtemp(prefix="aclang-run-", dir=self.workspace_root)
+                    try:
+                        exe_file = await self.build(source_code, workdir, level)
+                        exe_file = await asyncio.to_thread(self.exe_cache.put, key, exe_file)
+                    finally:
+                        shutil.rmtree(workdir, ignore_errors=True)
+        return exe_file, lambda: self.exe_cache.release(key)
+
+    async def _stream_process(self, exe_file, input_str, timeout):
+        """stream_process 的 asyncio 版本"""
+        proc = await asyncio.create_subprocess_exec(
+            os.path.abspath(exe_file),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        max_bytes = self.max_output
+
+        async def feed():
+            try:
+                proc.stdin.write((input_str or "").encode("utf-8"))
+                await proc.stdin.drain()
+                proc.stdin.close()
+            except (OSError, ConnectionResetError):
+                pass
+
+        async def drain_stderr():
+            data = b""
+            while True:
+                chunk = await proc.stderr.read(4096)
+                if not chunk:
+                    return data
+                if len(data) < max_bytes:
+                    data += chunk[:max_bytes - len(data)]
+
+        feeder = asyncio.ensure_future(feed())
+        stderr_task = asyncio.ensure_future(drain_stderr())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        total = 0
+        truncated = False
+        timed_out = False
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                try:
+                    chunk = await asyncio.wait_for(proc.stdout.read(4096), remaining)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    proc.kill()
+                    break
+                if not chunk:
+                    break
+                if total + len(chunk) > max_bytes:
+                    chunk = chunk[:max_bytes - total]
+                    truncated = True
+                total += len(chunk)
+                text = decoder.decode(chunk)
+                if text:
+                    yield "stdout", text
+                if truncated:
+                    proc.kill()
+                    break
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield "stdout", text
+            returncode = await proc.wait()
+            stderr = (await stderr_task).decode("utf-8", errors="replace")
+        finally:
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+                await proc.wait()  # 回收子进程，避免留下僵尸进程
+            feeder.cancel()
+            stderr_task.cancel()
+
+        if truncated:
+            stderr += _truncated_message(max_bytes)
+        yield "exit", {
+            "returncode": returncode,
+            "stderr": stderr,
+            "timeout": timed_out,
+            "truncated": truncated,
+            "bytes": total,
+        }
+
+    async def execute(self, exe_file, input_str, timeout=10):
+        """运行可执行文件，超时时结束子进程并抛出 subprocess.TimeoutExpired"""
+        chunks = []
+        async for event, data in self._stream_process(exe_file, input_str, timeout):
+            if event == "stdout":
+                chunks.append(data)
+            else:
+                info = data
+        if info["timeout"]:
+            raise subprocess.TimeoutExpired([exe_file], timeout)
+        return subprocess.CompletedProcess([exe_file], info["returncode"], "".join(chunks), info["stderr"])
+
+    async def run(self, source_code, input_str="", timeout=10, level=None):
+        """
+        构建并运行一个源程序
+
+        Returns:
+            subprocess.CompletedProcess: 运行结果
+        """
+        async with self.slots:
+            exe_file, cleanup = await self.prepare(source_code, level)
+            try:
+                return await self.execute(exe_file, input_str, timeout)
+            finally:
+                cleanup()
+
+    async def stream(self, source_code, input_str="", timeout=10, level=None):
+        """
+        ProgramRunner.stream 的 asyncio 版本（异步生成器），事件格式相同
+        """
+        async with self.slots:
+            exe_file, cleanup = await self.prepare(source_code, level)
+            try:
+                yield "start", None
+                async for item in self._stream_process(exe_file, input_str, timeout):
+                    yield item
+            finally:
+                cleanup()
@@ -3,6 +3,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdarg.h>
+#include "serve.h"
 
 extern int yylineno;
 extern char* yytext;
@@ -384,12 +385,22 @@ expr
 %%
 
 
-int main() {
+/* 处理一个完整的源程序，常驻模式下每个请求调用一次 */
+int run_once() {
+    has_errors = 0;
+    first = 1;
+    scope_top = -1;
+    label_cnt = 0;
+    while_top = -1;
     printf("[\n");
     int status=yyparse();
     printf("]\n");
     return status | has_errors;
 }
+
+int main(int argc, char* argv[]) {
+    return serve_main(argc, argv, run_once);
+}
 #include <stdarg.h>
 
 // 增强版 yyerror
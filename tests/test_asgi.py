@@ -0,0 +1,66 @@
+"""asgi: 不依赖 Flask 的 ASGI 入口"""
+import asyncio
+import json
+import subprocess
+import sys
+
+
+def request(method, path, body=None):
+    """经 asgi.app 处理一个请求，返回 (状态码, 响应体)"""
+    import asgi
+
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path}
+    asyncio.run(asgi.app(scope, receive, send))
+    status = sent[0]["status"]
+    return status, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def test_import_without_flask():
+    code = ("import sys; sys.modules['flask'] = sys.modules['flask_cors'] = None; "
+            "import asgi; assert 'main' not in sys.modules")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_keyword():
+    from config import KEYWORDS
+
+    status, body = request("GET", "/keyword")
+    assert status == 200
+    assert json.loads(body) == KEYWORDS
+
+
+def test_optimize():
+    asm = "main:\n    push rax\n    pop rax\n    ret\n"
+    status, body = request("POST", "/optimize", {"asm": asm})
+    assert status == 200
+    assert json.loads(body)["success"]
+
+
+def test_optimize_level():
+    asm = "main:\n    push rax\n    pop rax\n    ret\n"
+    # level 为 null 时与未给出相同，使用默认级别
+    status, body = request("POST", "/optimize", {"asm": asm, "level": None})
+    assert status == 200
+    assert json.loads(body)["optimization"]["level"] == "O2"
+    status, body = request("POST", "/optimize", {"asm": asm, "level": "O9"})
+    assert status == 400
+    assert "O9" in json.loads(body)["error"]
+
+
+def test_run_rejects_invalid_max_steps():
+    from config import VM_MAX_STEPS
+
+    for max_steps in (0, -1, "5", True, 1.5, VM_MAX_STEPS + 1):
+        status, body = request("POST", "/run", {"code": "", "mode": "vm", "max_steps": max_steps})
+        assert status == 400, max_steps
+        assert "max_steps" in json.loads(body)["error"]
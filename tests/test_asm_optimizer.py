@@ -0,0 +1,57 @@
+"""AsmOptimizer: 各改写规则不改变程序的语义"""
+from AsmOptimizer import AsmOptimizer
+
+
+def optimize(*lines, passes=None):
+    asm = "main:\n" + "".join(f"    {line}\n" for line in lines)
+    optimizer = AsmOptimizer(asm) if passes is None else AsmOptimizer(asm, passes)
+    return [line.strip() for line in optimizer.optimize()["data"].splitlines()[1:] if line.strip()]
+
+
+def test_store_forwarding_through_frame_slot():
+    assert optimize("mov [rbp-8], rbx", "mov rax, 16", "mov rcx, [rbp-8]", "ret") \
+        == ["mov [rbp-8], rbx", "mov rax, 16", "mov rcx, rbx", "ret"]
+
+
+def test_store_forwarding_forgets_address_when_base_is_written():
+    lines = ["mov [rax], rbx", "mov rax, 16", "mov rcx, [rax]", "ret"]
+    assert optimize(*lines) == lines
+
+
+def test_push_pop_keeps_memory_source_when_base_is_written():
+    lines = ["push qword [rax]", "mov rax, 16", "pop rbx", "ret"]
+    assert optimize(*lines) == lines
+
+
+def test_branch_inversion_skips_indirect_jump():
+    lines = ["cmp rax, 0", "jz .L1", "jmp rax", ".L1:", "ret"]
+    assert optimize(*lines) == lines
+
+
+def test_jump_threading_stops_at_indirect_jump():
+    lines = ["cmp rax, 0", "jz .L1", "ret", ".L1:", "jmp rbx"]
+    assert optimize(*lines) == lines
+
+
+def test_jump_threading_through_label():
+    assert optimize("cmp rax, 0", "jz .L1", "ret", ".L1:", "jmp .L2", ".L2:", "mov rax, 1", "ret") \
+        == ["cmp rax, 0", "jz .L2", "ret", ".L2:", "mov rax, 1", "ret"]
+
+
+def test_peephole_rules():
+    assert optimize("push rax", "pop rax", "mov [rbp-8], rax", "mov rax, [rbp-8]", "imul rcx, 8", "add rbx, 0", "ret") \
+        == ["mov [rbp-8], rax", "shl rcx, 3", "ret"]
+
+
+def test_push_pop_to_mov():
+    assert optimize("push qword [rbp-8]", "push 3", "pop rbx", "pop rax", "add rax, rbx", "push rax", "pop rsi", "ret") \
+        == ["mov rbx, 3", "mov rax, qword [rbp-8]", "add rax, rbx", "mov rsi, rax", "ret"]
+
+
+def test_push_pop_keeps_memory_source_when_it_is_overwritten():
+    lines = ["push qword [rbp-8]", "mov [rbp-8], rcx", "pop rax", "ret"]
+    assert optimize(*lines) == lines
+
+
+def test_unreachable_code_and_dead_label():
+    assert optimize("jmp .L1", "mov rax, 1", ".L1:", "ret") == ["ret"]
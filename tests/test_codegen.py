@@ -0,0 +1,71 @@
+"""codegen: 生成的汇编经 nasm + gcc 构建后运行，输出与四元式虚拟机一致"""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from benchmarks.aclang_programs import SHAPES, Function, Program, generate_program, generate_shape
+from codegen import compile_pcode
+from passes import LEVELS, PassManager
+from quadruple import PcodeToQuadsTranslator
+from runner import ProgramRunner
+from vm import QuadVM
+
+# CI 设置 ACLANG_REQUIRE_NATIVE=1: 缺少 nasm 或 gcc 时测试失败而不是跳过
+pytestmark = pytest.mark.skipif(
+    not (shutil.which("nasm") and shutil.which("gcc")) and os.environ.get("ACLANG_REQUIRE_NATIVE") != "1",
+    reason="需要 nasm 与 gcc")
+
+INPUT = "7 -3 12 0 5 9 -8 2 4 1 6 3"
+
+
+def _weighted_sum(names):
+    """names[0] * 1 - names[1] * 2 + names[2] * 3 - ...: 乘以常数（imul reg, imm）"""
+    expr = ("var", names[0])
+    for k, name in enumerate(names[1:], 2):
+        expr = ("bin", "-" if k % 2 == 0 else "+", expr, ("bin", "*", ("var", name), ("num", k)))
+    return expr
+
+
+# 随机程序的函数最多 3 个参数；这里覆盖栈上传参（奇数个栈参数时的对齐填充）与超出 32 位的立即数
+WIDE_CALLS = Program([
+    Function("f7", list("abcdefg"), [], [("return", _weighted_sum("abcdefg"))]),
+    Function("f8", list("abcdefgh"), [], [
+        ("return", ("bin", "+", ("bin", "*", ("call", "f7", [("var", v) for v in "hgfedcb"]), ("num", 1000003)),
+                    ("var", "a"))),
+    ]),
+    Function("main", [], ["x"], [
+        ("assign", "x", ("in",)),
+        ("out", ("call", "f8", [("var", "x")] + [("num", k) for k in range(2, 9)])),
+        ("out", ("call", "f7", [("bin", "*", ("var", "x"), ("num", k)) for k in range(1, 8)])),
+        ("expr_call", "f8", [("num", k) for k in range(8)]),
+        ("out", ("bin", "*", ("var", "x"), ("num", 5000000000))),
+        ("out", ("bin", "+", ("var", "x"), ("num", -4000000000))),
+        ("return", ("num", 0)),
+    ]),
+])
+
+# 基准用到的程序: 各种形状（缩小规模）、若干随机程序与 WIDE_CALLS
+CORPUS = [(shape, generate_shape(shape, scale=0.3, seed=1)) for shape in SHAPES if shape != "big_loops"] \
+    + [(f"seed{seed}", generate_program(functions=4, statements=8, depth=2, seed=seed)) for seed in range(6)] \
+    + [("wide_calls", WIDE_CALLS)]
+
+
+def native_runner(level):
+    """以 P-code 为“源代码”、按 level 用 codegen 生成汇编的 ProgramRunner"""
+    def compile_asm(pcode):
+        manager = PassManager(level)
+        asm = manager.optimize_asm(compile_pcode(pcode, passes=manager))["data"]
+        return subprocess.CompletedProcess(["codegen"], 0, asm, "")
+    return ProgramRunner(compile_asm, compile_step="codegen")
+
+
+@pytest.mark.parametrize("level", list(LEVELS))
+@pytest.mark.parametrize("name,program", CORPUS, ids=[name for name, _ in CORPUS])
+def test_native_matches_vm(name, program, level):
+    pcode = program.to_pcode()
+    expected = QuadVM(PcodeToQuadsTranslator().translate(pcode)["functions"]).run(INPUT)
+    assert expected.returncode == 0
+    result = native_runner(level).run(pcode, INPUT, timeout=30)
+    assert (result.returncode, result.stdout) == (0, expected.stdout)
@@ -0,0 +1,29 @@
+"""main: Flask 入口的请求检查"""
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+
+def test_run_rejects_invalid_max_steps():
+    import main
+    from config import VM_MAX_STEPS
+
+    client = main.app.test_client()
+    for max_steps in (0, -1, "5", True, 1.5, VM_MAX_STEPS + 1):
+        response = client.post("/run", json={"code": "", "mode": "vm", "max_steps": max_steps})
+        assert response.status_code == 400, max_steps
+        assert "max_steps" in response.json["error"]
+
+
+def test_optimize_level():
+    import main
+
+    client = main.app.test_client()
+    asm = "main:\n    push rax\n    pop rax\n    ret\n"
+    response = client.post("/optimize", json={"asm": asm, "level": None})
+    assert response.status_code == 200
+    assert response.json["optimization"]["level"] == "O2"
+    response = client.post("/optimize", json={"asm": asm, "level": "O9"})
+    assert response.status_code == 400
+    assert "O9" in response.json["error"]
@@ -0,0 +1,70 @@
+"""optimizer: 四元式优化遍（dataflow.py）的单独测试"""
+from optimizer import QuadOptimizer
+
+
+def function(*body, variables=()):
+    """main 函数的四元式: 声明 variables 后接 body，以 halt 结束"""
+    return ([("func", "_", "_", "main")] + [("declare", "int", "_", name) for name in variables]
+            + list(body) + [("halt", "_", "_", "_")])
+
+
+def test_constant_folding_through_join():
+    # 两个分支给 x 赋相同的常量、给 y 赋不同的常量，汇合后 x 是常量而 y 不是
+    quads = function(
+        ("in", "_", "_", "c"),
+        ("jz", "c", "_", "L1"),
+        (":=", "5", "_", "x"),
+        (":=", "7", "_", "y"),
+        ("j", "_", "_", "L2"),
+        ("LABEL", "_", "_", "L1"),
+        (":=", "5", "_", "x"),
+        (":=", "8", "_", "y"),
+        ("LABEL", "_", "_", "L2"),
+        ("+", "x", "1", "%t0"),
+        ("out", "%t0", "_", "_"),
+        ("+", "y", "1", "%t1"),
+        ("out", "%t1", "_", "_"),
+        variables=("c", "x", "y"),
+    )
+    result = QuadOptimizer.constant_folding(quads)
+    assert ("out", "6", "_", "_") in result
+    assert ("+", "y", "1", "%t1") in result
+    assert ("out", "%t1", "_", "_") in result
+
+
+def test_cse_is_invalidated_by_store_to_operand():
+    quads = function(
+        ("in", "_", "_", "a"),
+        ("in", "_", "_", "b"),
+        ("+", "a", "b", "%t0"),
+        ("out", "%t0", "_", "_"),
+        ("+", "a", "b", "%t1"),
+        ("out", "%t1", "_", "_"),
+        ("*", "a", "b", "%t2"),
+        (":=", "%t2", "_", "a"),
+        ("+", "a", "b", "%t3"),
+        ("out", "%t3", "_", "_"),
+        variables=("a", "b"),
+    )
+    result = QuadOptimizer.common_subexpression_elimination(quads)
+    # 第二次 a + b 与第一次相同，改为复制；给 a 赋值之后的 a + b 必须重新计算
+    assert ("out", "%t0", "_", "_") in result and ("+", "a", "b", "%t1") not in result
+    recomputed = [q for q in result if q[3] == "%t3"]
+    assert len(recomputed) == 1 and recomputed[0][0] == "+"
+    assert ("out", "%t3", "_", "_") in result
+
+
+def test_compaction_keeps_overlapping_temps_apart():
+    quads = function(
+        ("in", "_", "_", "%t5"),
+        ("in", "_", "_", "%t6"),
+        ("+", "%t5", "%t6", "%t7"),
+        ("out", "%t7", "_", "_"),
+        ("in", "_", "_", "%t8"),
+        ("out", "%t8", "_", "_"),
+    )
+    result = QuadOptimizer.compact_temps(quads)
+    # %t5 与 %t6 同时活跃，不能共用一个槽位；%t7、%t8 可以复用已经结束的槽位
+    add = next(q for q in result if q[0] == "+")
+    assert add[1] != add[2]
+    assert {q[3] for q in result if q[0] == "in"} | {add[3]} == {"%t0", "%t1"}
@@ -0,0 +1,29 @@
+"""passes: 各优化级别的四元式流水线不改变随机程序的输出"""
+import pytest
+
+from benchmarks.aclang_programs import generate_program
+from passes import LEVELS, PassManager
+from quadruple import PcodeToQuadsTranslator
+from vm import CompiledProgram, CompiledVM, QuadVM
+
+INPUT = "7 -3 12 0 5 9 -8 2 4 1 6 3"
+MAX_STEPS = 2_000_000
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_levels_match_unoptimized(seed):
+    program = generate_program(functions=5, statements=10, depth=2, iterations=5, seed=seed)
+    functions = PcodeToQuadsTranslator().translate(program.to_pcode())["functions"]
+    expected = QuadVM(functions, MAX_STEPS).run(INPUT)
+    assert expected.returncode == 0, expected.stderr
+    for level in LEVELS:
+        optimized = PassManager(level).optimize_quads(functions)
+        for result in (QuadVM(optimized, MAX_STEPS).run(INPUT),
+                       CompiledVM(CompiledProgram(optimized), MAX_STEPS).run(INPUT)):
+            assert (result.returncode, result.stdout) == (0, expected.stdout), level
+
+
+@pytest.mark.parametrize("level", [None, "O9", "fast"])
+def test_unknown_level_is_value_error(level):
+    with pytest.raises(ValueError):
+        PassManager(level)
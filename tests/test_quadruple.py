@@ -0,0 +1,76 @@
+"""quadruple: P-code 到四元式的翻译"""
+from passes import LEVELS, PassManager
+from quadruple import PcodeToQuadsTranslator
+from vm import CompiledProgram, CompiledVM, QuadVM
+
+
+def translate(pcode):
+    return PcodeToQuadsTranslator().translate(pcode)["functions"]
+
+
+def test_expression_and_store():
+    quads = translate("FUNC @main\nINT a\nLIT 1\nLIT 2\nADD\nSTO a\nSTOP\nEND FUNC\n")["main"]
+    assert quads == [
+        ("func", "_", "_", "main"),
+        ("declare", "int", "_", "a"),
+        (":=", "1", "_", "%t0"),
+        (":=", "2", "_", "%t1"),
+        ("+", "%t0", "%t1", "%t2"),
+        (":=", "%t2", "_", "a"),
+        ("halt", "_", "_", "_"),
+    ]
+
+
+def test_label_does_not_touch_stack():
+    # 标签前留在栈上的值（此处为 LOD a）不被 LABEL 弹出，之后仍由 STO 使用
+    quads = translate("FUNC @main\nINT a\nLOD a\nLABEL L0\nSTO a\nSTOP\nEND FUNC\n")["main"]
+    assert ("LABEL", "_", "_", "L0") in quads
+    assert (":=", "%t0", "_", "a") in quads
+
+
+def test_translate_stream_matches_translate():
+    pcode = ("FUNC @f\nARG x\nLOD x\nLIT 1\nADD\nRET\nEND FUNC\n\n"
+             "FUNC @main\nLIT 2\nCALL f\nOUT\nSTOP\nEND FUNC\n")
+    streamed = dict(PcodeToQuadsTranslator().translate_stream(pcode.splitlines()))
+    assert streamed == translate(pcode)
+
+
+def test_call_pops_only_callee_arity():
+    pcode = ("FUNC @f\nARG x\nLOD x\nRET\nEND FUNC\n\n"
+             "FUNC @main\nLIT 7\nLIT 1\nCALL f\nADD\nOUT\nSTOP\nEND FUNC\n")
+    quads = translate(pcode)["main"]
+    # LIT 7 留在栈上，是 ADD 的左操作数而不是 f 的实参
+    assert [q for q in quads if q[0] == "param"] == [("param", "%t2", "_", "_")]
+    assert ("+", "%t1", "%t3", "%t4") in quads
+    assert ("out", "%t4", "_", "_") in quads
+
+
+def test_pop_discards_call_result():
+    pcode = ("FUNC @f\nRET\nEND FUNC\n\n"
+             "FUNC @g\nARG a\nLOD a\nRET\nEND FUNC\n\n"
+             "FUNC @main\nCALL f\nPOP\nLIT 1\nCALL g\nPOP\nSTOP\nEND FUNC\n")
+    quads = translate(pcode)["main"]
+    assert [q for q in quads if q[0] == "param"] == [("param", "%t2", "_", "_")]
+
+
+def test_io_and_operators():
+    pcode = "FUNC @main\nIN\nLIT 2\nPOW\nIN\nNE\nOUT\nSTOP\nEND FUNC\n"
+    ops = [q[0] for q in translate(pcode)["main"]]
+    assert ops == ["func", "in", ":=", "**", "in", "!=", "out", "halt"]
+
+
+def test_old_pcode_without_pop():
+    # 没有 POP 时调用语句的返回值留在栈上，不会成为之后调用的实参
+    pcode = ("FUNC @g\nARG a\nLOD a\nRET\nEND FUNC\n\n"
+             "FUNC @main\nLIT 1\nCALL g\nLIT 2\nCALL g\nSTOP\nEND FUNC\n")
+    quads = translate(pcode)["main"]
+    assert [q for q in quads if q[0] == "param"] == [("param", "%t1", "_", "_"), ("param", "%t3", "_", "_")]
+
+
+def test_user_variable_named_like_temp():
+    # 用户变量 t1 不能与临时变量重名: 3 + t1 应输出 8
+    functions = translate("FUNC @main\nINT t1\nLIT 5\nSTO t1\nLIT 3\nLOD t1\nADD\nOUT\nSTOP\nEND FUNC\n")
+    for level in LEVELS:
+        optimized = PassManager(level).optimize_quads(functions)
+        for result in (QuadVM(optimized).run(), CompiledVM(CompiledProgram(optimized)).run()):
+            assert (result.returncode, result.stdout.split()) == (0, ["8"]), level
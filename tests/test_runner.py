@@ -0,0 +1,114 @@
+"""runner: 可执行文件缓存的占用、淘汰与构建锁"""
+import asyncio
+import os
+import subprocess
+import threading
+import time
+
+from runner import AsyncProgramRunner, ExecutableCache, stream_process
+
+
+def make_exe(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_pinned_entry_is_not_evicted(tmp_path):
+    cache = ExecutableCache(str(tmp_path / "cache"), max_bytes=150)
+    cache.put("a", make_exe(tmp_path, "a"))
+    cache.release("a")
+    path = cache.get("a")
+    # 放入 b 使占用超过上限；a 正在被使用，不能淘汰
+    cache.put("b", make_exe(tmp_path, "b"))
+    cache.release("b")
+    assert os.path.exists(path)
+    assert "a" in cache.index
+    cache.release("a")
+    assert cache.total_bytes <= 150
+    assert cache.stats()["pinned"] == 0
+
+
+def test_release_evicts_least_recently_used(tmp_path):
+    cache = ExecutableCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in "abc":
+        cache.put(name, make_exe(tmp_path, name))
+    # 三个条目都被占用，暂时超过上限
+    assert len(cache.index) == 3
+    for name in "abc":
+        cache.release(name)
+    assert list(cache.index) == ["b", "c"]
+    assert not os.path.exists(os.path.join(cache.cache_dir, "a"))
+
+
+def test_key_lock_survives_eviction_while_held(tmp_path):
+    cache = ExecutableCache(str(tmp_path / "cache"), max_bytes=50)
+    with cache.key_lock("a"):
+        lock = cache.key_locks["a"][0]
+        cache.release("a")  # 触发淘汰
+        cache.put("b", make_exe(tmp_path, "b"))
+        cache.release("b")
+        assert cache.key_locks["a"][0] is lock
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(lock.acquire(timeout=0.2)))
+        waiter.start()
+        waiter.join()
+        assert acquired == [False]
+    assert "a" not in cache.key_locks
+
+
+def test_build_lock_is_removed_only_when_unused():
+    async def main():
+        runner = AsyncProgramRunner(None)
+        order = []
+
+        async def holder(name):
+            async with runner._build_lock("k"):
+                order.append(name)
+                await asyncio.sleep(0.01)
+                assert "k" in runner.build_locks
+
+        await asyncio.gather(holder(1), holder(2), holder(3))
+        return runner, order
+
+    runner, order = asyncio.run(main())
+    assert order == [1, 2, 3]
+    assert runner.build_locks == {}
+
+
+def spawn(*args):
+    return subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def test_stream_timeout_starts_at_spawn():
+    proc = spawn("sleep", "5")
+    events = stream_process(proc, "", 0.2, 1 << 20)
+    # 还没有开始迭代，程序也应在超时后被结束
+    time.sleep(0.6)
+    assert proc.poll() is not None
+    event, info = list(events)[-1]
+    assert event == "exit" and info["timeout"]
+
+
+def test_stream_close_before_iteration_kills_process():
+    proc = spawn("sleep", "5")
+    events = stream_process(proc, "", None, 1 << 20)
+    events.close()
+    assert proc.poll() is not None
+
+
+def test_async_stream_reaps_process(tmp_path):
+    script = tmp_path / "prog"
+    script.write_text("#!/bin/sh\necho $$\nexec sleep 5\n")
+    script.chmod(0o755)
+
+    async def main():
+        runner = AsyncProgramRunner(None)
+        events = runner._stream_process(str(script), "", 10)
+        event, text = await events.__anext__()
+        await events.aclose()
+        return int(text.split()[0])
+
+    pid = asyncio.run(main())
+    # 被回收的子进程不再出现在 /proc 中（僵尸进程仍然存在）
+    assert not os.path.exists(f"/proc/{pid}")
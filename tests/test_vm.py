@@ -0,0 +1,37 @@
+"""vm: 四元式虚拟机的运行限制"""
+import sys
+
+import pytest
+
+from quadruple import PcodeToQuadsTranslator
+from vm import MAX_DEPTH, CompiledProgram, CompiledVM, QuadVM
+
+# f(n) 递归 n 层: n 为 0 时返回 0，否则返回 f(n - 1) + 1
+RECURSION = PcodeToQuadsTranslator().translate(
+    "FUNC @f\nARG n\nLOD n\nJZ L0\nLOD n\nLIT 1\nSUB\nCALL f\nLIT 1\nADD\nRET\nLABEL L0\nLIT 0\nRET\nEND FUNC\n\n"
+    "FUNC @main\nIN\nCALL f\nOUT\nSTOP\nEND FUNC\n")["functions"]
+
+
+def engines(**limits):
+    return [QuadVM(RECURSION, **limits), CompiledVM(CompiledProgram(RECURSION), **limits)]
+
+
+def test_recursion_within_max_depth():
+    limit = sys.getrecursionlimit()
+    for vm in engines():
+        result = vm.run(str(MAX_DEPTH - 10))
+        assert (result.returncode, result.stdout) == (0, f"{MAX_DEPTH - 10}\n")
+    # 运行不修改解释器的递归上限
+    assert sys.getrecursionlimit() == limit
+
+
+def test_deep_recursion_is_runtime_error():
+    for vm in engines(max_depth=50):
+        assert vm.run("49").returncode == 0
+        result = vm.run("50")
+        assert result.returncode == 1 and result.stderr == "运行错误: 函数调用层数超过上限 50"
+
+
+def test_compiled_max_depth_is_bounded():
+    with pytest.raises(ValueError):
+        CompiledVM(RECURSION, max_depth=MAX_DEPTH + 1)
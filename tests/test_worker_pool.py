@@ -0,0 +1,66 @@
+"""worker_pool: 常驻进程应答异常时的处理"""
+import asyncio
+import stat
+import sys
+import time
+
+from worker_pool import AsyncWorkerPool, WorkerPool
+
+# 读入一帧请求后输出格式错误的应答头，然后一直不退出
+MALFORMED = """
+import sys, time
+sys.stdin.readline()
+sys.stdout.write("garbage\\n")
+sys.stdout.flush()
+time.sleep(60)
+"""
+
+# 读入一帧请求后以退出码 1 结束（如工具内部调用了 exit(1)）
+EXIT_1 = """
+import sys
+sys.stdin.readline()
+sys.exit(1)
+"""
+
+
+def make_tool(tmp_path, body):
+    path = tmp_path / "tool"
+    path.write_text(f"#!{sys.executable}\n{body}")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_malformed_header_kills_worker(tmp_path):
+    pool = WorkerPool(make_tool(tmp_path, MALFORMED), size=1)
+    start = time.monotonic()
+    result = pool.run("x", timeout=30)
+    assert time.monotonic() - start < 10
+    assert result.returncode < 0
+    assert pool.idle.qsize() == 1
+    pool.close()
+
+
+def test_exit_code_of_crash_is_negative(tmp_path):
+    pool = WorkerPool(make_tool(tmp_path, EXIT_1), size=1)
+    assert pool.run("x", timeout=30).returncode < 0
+    pool.close()
+
+
+def test_async_malformed_header_kills_worker(tmp_path):
+    async def main():
+        pool = AsyncWorkerPool(make_tool(tmp_path, MALFORMED), size=1)
+        result = await asyncio.wait_for(pool.run("x", timeout=30), 10)
+        await pool.close()
+        return result
+
+    assert asyncio.run(main()).returncode < 0
+
+
+def test_async_exit_code_of_crash_is_negative(tmp_path):
+    async def main():
+        pool = AsyncWorkerPool(make_tool(tmp_path, EXIT_1), size=1)
+        result = await pool.run("x", timeout=30)
+        await pool.close()
+        return result
+
+    assert asyncio.run(main()).returncode < 0
@@ -0,0 +1,690 @@
+"""
+四元式虚拟机模块
+
+在进程内直接执行 PcodeToQuadsTranslator 生成的四元式，不需要 acc / nasm / gcc，
+小程序的运行只需几毫秒。语义与生成的汇编一致: 64 位有符号整数回绕，除法
+向 0 取整，inputInt 按 "%ld" 读入、读入失败时为 0，outputInt 每个数占一行。
+程序的运行以执行的四元式条数（而不是墙钟时间）限制，结果与机器负载无关。
+"""
+import asyncio
+import hashlib
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+
+from optimizer import QuadOptimizer
+from passes import PassManager, normalize_level
+from quadruple import PcodeToQuadsTranslator
+from result_cache import tool_version
+from runner import BuildError
+
+_WORD = 1 << 64
+_MIN = -(1 << 63)
+
+# 函数调用的最大嵌套层数（默认值与上限）。CompiledVM 的每层调用是一个 Python 栈帧，
+# 在导入时一次性调高解释器的递归上限，运行时由生成的代码按 _max_depth 检查层数
+MAX_DEPTH = 10000
+if sys.getrecursionlimit() < MAX_DEPTH + 100:
+    sys.setrecursionlimit(MAX_DEPTH + 100)
+
+
+class VMError(Exception):
+    """程序运行错误（除数为 0、调用未定义的函数、超出限制等）"""
+
+
+def wrap(value):
+    """按 64 位有符号整数回绕"""
+    value &= _WORD - 1
+    return value - _WORD if value >= _WORD >> 1 else value
+
+
+def divide(a, b):
+    """
+    向 0 取整的整数除法
+
+    Raises:
+        VMError: 除数为 0 或商溢出
+    """
+    if b == 0:
+        raise VMError("除数为 0")
+    if a == _MIN and b == -1:
+        raise VMError("除法溢出")
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+
+def power(a, b):
+    """与汇编的快速幂一致: 指数按无符号 64 位整数处理"""
+    return wrap(pow(a, b & (_WORD - 1), _WORD))
+
+
+def apply_binary(op, a, b):
+    """
+    计算二元运算
+
+    Raises:
+        VMError: 除数为 0 或商溢出（与 idiv 一样是运行错误）
+    """
+    if op == '+':
+        return wrap(a + b)
+    if op == '-':
+        return wrap(a - b)
+    if op == '*':
+        return wrap(a * b)
+    if op == '/':
+        return divide(a, b)
+    if op == '>':
+        return int(a > b)
+    if op == '<':
+        return int(a < b)
+    if op == '>=':
+        return int(a >= b)
+    if op == '<=':
+        return int(a <= b)
+    if op == '==':
+        return int(a == b)
+    if op == '!=':
+        return int(a != b)
+    if op == 'AND':
+        return int(a != 0 and b != 0)
+    if op == 'OR':
+        return int(a != 0 or b != 0)
+    if op == '**':
+        return power(a, b)
+    raise VMError(f"未知的运算符: {op}")
+
+
+class InputReader:
+    """按 scanf("%ld") 的方式从输入文本中读取整数"""
+
+    def __init__(self, text):
+        self.tokens = iter((text or "").split())
+        self.failed = False  # scanf 遇到非整数后不再前进，之后的读入都失败
+
+    def read(self):
+        if self.failed:
+            return 0
+        token = next(self.tokens, None)
+        if token is None:
+            return 0
+        try:
+            return wrap(int(token))
+        except ValueError:
+            self.failed = True
+            return 0
+
+
+class QuadVM:
+    """四元式解释器"""
+
+    def __init__(self, functions, max_steps=10_000_000, max_output=1 << 20, max_depth=MAX_DEPTH):
+        """
+        Args:
+            functions: {函数名: 四元式列表}，即 PcodeToQuadsTranslator 结果中的 functions
+            max_steps: 最多执行的四元式条数
+            max_output: 标准输出的字节数上限
+            max_depth: 函数调用的最大嵌套层数
+        """
+        self.functions = functions
+        self.max_steps = max_steps
+        self.max_output = max_output
+        self.max_depth = max_depth
+        # 函数名 -> {标签: 四元式下标}
+        self.labels = {
+            name: {quad[3]: i for i, quad in enumerate(quads) if quad[0] == 'LABEL'}
+            for name, quads in functions.items()
+        }
+
+    def run(self, input_str=""):
+        """
+        从 main 开始执行程序
+
+        Returns:
+            subprocess.CompletedProcess: stdout 为程序输出；运行错误时 returncode 为 1，
+            stderr 为错误信息。steps 属性为执行的四元式条数。
+        """
+        output = []
+        self.output_bytes = 0
+        self.steps = 0
+        try:
+            self._execute(InputReader(input_str), output)
+            returncode, stderr = 0, ""
+        except VMError as e:
+            returncode, stderr = 1, f"运行错误: {e}"
+        result = subprocess.CompletedProcess(["quadvm"], returncode, "".join(output), stderr)
+        result.steps = self.steps
+        return result
+
+    def _write(self, output, value):
+        text = f"{value}\n"
+        self.output_bytes += len(text)
+        if self.output_bytes > self.max_output:
+            raise VMError(f"输出超过 {self.max_output} 字节，程序已被终止")
+        output.append(text)
+
+    def _execute(self, reader, output):
+        if 'main' not in self.functions:
+            raise VMError("缺少 main 函数")
+        functions = self.functions
+        max_steps = self.max_steps
+        name = 'main'
+        quads = functions[name]
+        labels = self.labels[name]
+        env = {}
+        args = []  # 当前函数收到的实参
+        pending = []  # 为下一次调用准备的实参
+        pc = 0
+        frames = []  # 调用者的 (函数名, pc, env, 实参, 接收返回值的变量)
+        steps = 0
+
+        def value(x):
+            if x[0] in '-0123456789':
+                return int(x)
+            return env.get(x, 0)
+
+        try:
+            while True:
+                if pc >= len(quads):
+                    # 没有 return 的函数末尾: 返回 0
+                    op, arg1, result = 'return', '_', '_'
+                else:
+                    op, arg1, arg2, result = quads[pc]
+                    pc += 1
+                    steps += 1
+                    if steps > max_steps:
+                        raise VMError(f"执行的指令数超过上限 {max_steps}")
+
+                if op == ':=':
+                    env[result] = value(arg1)
+                elif op == 'jz':
+                    if value(arg1) == 0:
+                        pc = labels[result]
+                elif op == 'j':
+                    pc = labels[result]
+                elif op == 'LABEL' or op == 'declare' or op == 'func':
+                    pass
+                elif op == 'param':
+                    if result == '_':
+                        pending.append(value(arg1))
+                    else:
+                        # 函数入口接收第 i 个参数: (param, a, _, argi)
+                        i = int(result[3:])
+                        env[arg1] = args[i] if i < len(args) else 0
+                elif op == 'call':
+                    if arg1 not in functions:
+                        raise VMError(f"调用了未定义的函数 {arg1}")
+                    if len(frames) >= self.max_depth:
+                        raise VMError(f"函数调用层数超过上限 {self.max_depth}")
+                    frames.append((name, pc, env, args, result))
+                    name = arg1
+                    quads = functions[name]
+                    labels = self.labels[name]
+                    env = {}
+                    args = pending
+                    pending = []
+                    pc = 0
+                elif op == 'return':
+                    ret = value(arg1) if arg1 != '_' else 0
+                    if not frames:
+                        return
+                    name, pc, env, args, target = frames.pop()
+                    quads = functions[name]
+                    labels = self.labels[name]
+                    env[target] = ret
+                elif op == 'halt':
+                    return
+                elif op == 'in':
+                    env[result] = reader.read()
+                elif op == 'out':
+                    self._write(output, value(arg1))
+                else:
+                    env[result] = apply_binary(op, value(arg1), value(arg2))
+        except KeyError as e:
+            raise VMError(f"跳转到不存在的标签 {e.args[0]}") from None
+        finally:
+            self.steps = steps
+
+
+# ---------- 编译执行: 四元式 -> Python 代码对象 ----------
+
+# 结果需要按 64 位回绕的运算: ((x + 2^63) & (2^64 - 1)) - 2^63
+_WRAPPED_OPS = {'+', '-', '*'}
+_COMPARE_OPS = {'>', '<', '>=', '<=', '==', '!='}
+_BLOCK_ENDS = {'j', 'jz', 'return', 'halt'}
+
+
+class _Halt(Exception):
+    """halt: 在任意调用层结束整个程序"""
+
+
+def _raise(message):
+    raise VMError(message)
+
+
+class CompiledProgram:
+    """
+    编译为 Python 代码对象的四元式程序
+
+    每个函数编译为一个 Python 函数: 变量成为局部变量（未赋值时为 0），
+    基本块按编号二分分派，跳转目标在编译时解析为块编号，指令数按基本块累加。
+    代码对象只生成一次，可以被多次、并发地运行（见 CompiledVM）。
+    """
+
+    def __init__(self, functions):
+        """
+        Args:
+            functions: {函数名: 四元式列表}
+        """
+        self.functions = functions
+        self.entries = {name: f"F{i}" for i, name in enumerate(functions)}
+        lines = []
+        for name, quads in functions.items():
+            lines += self._function(name, quads)
+        self.source = "\n".join(lines) + "\n"
+        self.code = compile(self.source, "<quads>", "exec")
+
+    def _function(self, name, quads):
+        names = {}
+
+        def var(x):
+            if x not in names:
+                names[x] = f"v{len(names)}"
+            return names[x]
+
+        def value(x):
+            if x[0] in '-0123456789':
+                return f"({int(x)})"
+            return var(x)
+
+        # 实参都紧挨在 call 前面时直接以列表传递，否则用 P 收集
+        direct = self._direct_params(quads)
+
+        blocks = self._blocks(quads)
+        labels = {}
+        for i, (start, end) in enumerate(blocks):
+            if quads[start][0] == 'LABEL':
+                labels[quads[start][3]] = i
+
+        def jump(label):
+            if label in labels:
+                return [f"b = {labels[label]}", "continue"]
+            return [f"_raise({'跳转到不存在的标签 ' + label!r})"]
+
+        bodies = []
+        for i, (start, end) in enumerate(blocks):
+            body = [f"_steps += {end - start}", "if _steps > _max_steps: _out_of_steps()"]
+            pending = []
+            for op, arg1, arg2, result in quads[start:end]:
+                if op == ':=':
+                    body.append(f"{var(result)} = {value(arg1)}")
+                elif op in _WRAPPED_OPS:
+                    body.append(f"{var(result)} = (({value(arg1)} {op} {value(arg2)} + {1 << 63}) "
+                                f"& {_WORD - 1}) - {1 << 63}")
+                elif op in _COMPARE_OPS:
+                    body.append(f"{var(result)} = 1 if {value(arg1)} {op} {value(arg2)} else 0")
+                elif op == 'AND' or op == 'OR':
+                    body.append(f"{var(result)} = 1 if {value(arg1)} {op.lower()} {value(arg2)} else 0")
+                elif op == '/' and arg2[0] in '0123456789' and int(arg2) > 0:
+                    # 正常数除数: 不会除以 0 或溢出，直接内联向 0 取整
+                    a = value(arg1)
+                    body.append(f"{var(result)} = {a} // {int(arg2)} if {a} >= 0 else -(-{a} // {int(arg2)})")
+                elif op == '/':
+                    body.append(f"{var(result)} = _divide({value(arg1)}, {value(arg2)})")
+                elif op == '**':
+                    body.append(f"{var(result)} = _power({value(arg1)}, {value(arg2)})")
+                elif op == 'jz':
+                    body.append(f"if not {value(arg1)}:")
+                    body += ["    " + line for line in jump(result)]
+                elif op == 'j':
+                    body += jump(result)
+                elif op in ('LABEL', 'declare', 'func'):
+                    pass
+                elif op == 'param':
+                    if result != '_':
+                        k = int(result[3:])
+                        body.append(f"{var(arg1)} = A[{k}] if len(A) > {k} else 0")
+                    elif direct:
+                        pending.append(value(arg1))
+                    else:
+                        body.append(f"P.append({value(arg1)})")
+                elif op == 'call':
+                    if arg1 not in self.entries:
+                        body.append(f"_raise({'调用了未定义的函数 ' + arg1!r})")
+                        continue
+                    args = f"[{', '.join(pending)}]" if direct else "P"
+                    target = "" if result == '_' else f"{var(result)} = "
+                    body.append(f"{target}{self.entries[arg1]}({args})")
+                    if not direct:
+                        body.append("P = []")
+                    pending = []
+                elif op == 'return':
+                    body += ["_depth -= 1", f"return {value(arg1) if arg1 != '_' else 0}"]
+                elif op == 'halt':
+                    body.append("raise _Halt")
+                elif op == 'in':
+                    body.append(f"{var(result)} = _read()")
+                elif op == 'out':
+                    body.append(f"_write({value(arg1)})")
+                else:
+                    body.append(f"{var(result)} = _binary({op!r}, {value(arg1)}, {value(arg2)})")
+            if quads[end - 1][0] not in ('j', 'return', 'halt'):
+                # 落入下一个基本块；最后一块之后是函数末尾，返回 0
+                body += [f"b = {i + 1}"] if i + 1 < len(blocks) else ["_depth -= 1", "return 0"]
+            bodies.append(body)
+
+        lines = [f"def {self.entries[name]}(A):",
+                 "    global _steps, _depth",
+                 "    _depth += 1",
+                 "    if _depth > _max_depth: _too_deep()"]
+        if names:
+            lines.append(f"    {' = '.join(names.values())} = 0")
+        if not direct:
+            lines.append("    P = []")
+        if not bodies:
+            return lines + ["    _depth -= 1", "    return 0"]
+        lines += ["    b = 0", "    while True:"]
+        lines += self._dispatch(bodies, 0, len(bodies), "        ")
+        return lines
+
+    @staticmethod
+    def _blocks(quads):
+        """划分基本块，返回 [(起始下标, 结束下标)]"""
+        blocks = []
+        start = 0
+        for i, quad in enumerate(quads):
+            if quad[0] == 'LABEL' and i > start:
+                blocks.append((start, i))
+                start = i
+            if quad[0] in _BLOCK_ENDS:
+                blocks.append((start, i + 1))
+                start = i + 1
+        if start < len(quads):
+            blocks.append((start, len(quads)))
+        return blocks
+
+    @staticmethod
+    def _direct_params(quads):
+        """是否每条实参 param 都属于紧挨在 call 之前的连续 param 序列"""
+        i = 0
+        while i < len(quads):
+            if quads[i][0] == 'param' and quads[i][3] == '_':
+                j = i
+                while j < len(quads) and quads[j][0] == 'param' and quads[j][3] == '_':
+                    j += 1
+                if j == len(quads) or quads[j][0] != 'call':
+                    return False
+                i = j
+            i += 1
+        return True
+
+    def _dispatch(self, bodies, lo, hi, indent):
+        """按块编号 b 二分查找要执行的基本块"""
+        if hi - lo == 1:
+            return [indent + line for line in bodies[lo]]
+        mid = (lo + hi) // 2
+        lines = [f"{indent}if b < {mid}:"]
+        lines += self._dispatch(bodies, lo, mid, indent + "    ")
+        lines.append(f"{indent}else:")
+        lines += self._dispatch(bodies, mid, hi, indent + "    ")
+        return lines
+
+
+class CompiledVM:
+    """执行 CompiledProgram，接口与 QuadVM 相同"""
+
+    def __init__(self, program, max_steps=10_000_000, max_output=1 << 20, max_depth=MAX_DEPTH):
+        """
+        Args:
+            program: CompiledProgram，或 {函数名: 四元式列表}（此时先编译）
+            max_steps: 最多执行的四元式条数，按基本块检查
+            max_output: 标准输出的字节数上限
+            max_depth: 函数调用的最大嵌套层数，不超过 MAX_DEPTH
+
+        Raises:
+            ValueError: max_depth 超过 MAX_DEPTH
+        """
+        if max_depth > MAX_DEPTH:
+            raise ValueError(f"max_depth 不能超过 {MAX_DEPTH}")
+        if not isinstance(program, CompiledProgram):
+            program = CompiledProgram(program)
+        self.program = program
+        self.max_steps = max_steps
+        self.max_output = max_output
+        self.max_depth = max_depth
+
+    def run(self, input_str=""):
+        """
+        从 main 开始执行程序
+
+        Returns:
+            subprocess.CompletedProcess: 与 QuadVM.run 相同
+        """
+        output = []
+        self.output_bytes = 0
+        max_output = self.max_output
+
+        def write(value):
+            text = f"{value}\n"
+            self.output_bytes += len(text)
+            if self.output_bytes > max_output:
+                raise VMError(f"输出超过 {max_output} 字节，程序已被终止")
+            output.append(text)
+
+        def out_of_steps():
+            raise VMError(f"执行的指令数超过上限 {self.max_steps}")
+
+        def too_deep():
+            raise VMError(f"函数调用层数超过上限 {self.max_depth}")
+
+        namespace = {
+            "_steps": 0, "_depth": -1,  # main 为第 0 层
+            "_max_steps": self.max_steps, "_max_depth": self.max_depth,
+            "_out_of_steps": out_of_steps, "_too_deep": too_deep, "_raise": _raise, "_Halt": _Halt,
+            "_read": InputReader(input_str).read, "_write": write,
+            "_divide": divide, "_power": power, "_binary": apply_binary,
+        }
+        exec(self.program.code, namespace)
+        try:
+            if 'main' not in self.program.entries:
+                raise VMError("缺少 main 函数")
+            namespace[self.program.entries['main']]([])
+            returncode, stderr = 0, ""
+        except _Halt:
+            returncode, stderr = 0, ""
+        except VMError as e:
+            returncode, stderr = 1, f"运行错误: {e}"
+        except RecursionError:
+            returncode, stderr = 1, f"运行错误: 函数调用层数超过上限 {self.max_depth}"
+        self.steps = namespace["_steps"]
+        result = subprocess.CompletedProcess(["quadvm"], returncode, "".join(output), stderr)
+        result.steps = self.steps
+        return result
+
+
+ENGINES = {"compiled": CompiledVM, "interpreter": QuadVM}
+
+
+def normalize_max_steps(max_steps, limit):
+    """
+    检查请求给出的指令数上限，None 原样返回（表示使用服务的上限）
+
+    Raises:
+        ValueError: 不是正整数或超过 limit
+    """
+    if max_steps is None:
+        return None
+    if isinstance(max_steps, bool) or not isinstance(max_steps, int) or not 0 < max_steps <= limit:
+        raise ValueError(f"max_steps 应为 1 到 {limit} 之间的整数: {max_steps!r}")
+    return max_steps
+
+
+class VMRunner:
+    """
+    用虚拟机运行源程序，接口与 runner.ProgramRunner 相同
+
+    源程序经 pcode 工具得到 Pcode，再翻译为四元式并优化后执行。准备好的程序
+    （compiled 引擎为 CompiledProgram）按源代码的哈希缓存，同一程序再次运行时
+    不再调用 pcode 工具，也不再翻译、优化和编译。
+    """
+
+    def __init__(self, compile_pcode, max_steps=10_000_000, max_output=1 << 20, optimize=True,
+                 engine="compiled", max_programs=256, version_paths=()):
+        """
+        Args:
+            compile_pcode: 可调用对象 compile_pcode(source_code)，返回 pcode 工具的 CompletedProcess
+            max_steps: 每次运行最多执行的四元式条数
+            max_output: 标准输出的字节数上限
+            optimize: 是否先用 QuadOptimizer 优化四元式
+            engine: 执行引擎，ENGINES 中的 "compiled"（编译为代码对象）或 "interpreter"（逐条解释）
+            max_programs: 缓存的程序个数上限
+            version_paths: 参与缓存键的文件（pcode 工具等），内容变化后缓存自动失效
+
+        Raises:
+            ValueError: 未知的执行引擎
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"未知的执行引擎: {engine}")
+        self.compile_pcode = compile_pcode
+        self.max_steps = max_steps
+        self.max_output = max_output
+        self.optimize = optimize
+        self.engine = engine
+        self.max_programs = max_programs
+        self.version_paths = version_paths
+        self.programs = OrderedDict()  # 缓存键 -> 程序，按最近使用排序
+        self.lock = threading.Lock()
+
+    def cache_key(self, source_code, level=None):
+        versions = "|".join(tool_version(path) for path in self.version_paths)
+        optimize = self.optimize if level is None else level
+        text = f"{self.engine}\0{optimize}\0{versions}\0{source_code}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _cached(self, key):
+        with self.lock:
+            program = self.programs.get(key)
+            if program is not None:
+                self.programs.move_to_end(key)
+            return program
+
+    def _store(self, key, program):
+        with self.lock:
+            self.programs[key] = program
+            self.programs.move_to_end(key)
+            while len(self.programs) > self.max_programs:
+                self.programs.popitem(last=False)
+
+    def load(self, source_code, level=None):
+        """
+        源程序 -> 引擎可执行的程序
+
+        Args:
+            source_code: 源代码
+            level: 四元式的优化级别（见 passes.LEVELS），None 表示按构造时的 optimize
+
+        Raises:
+            BuildError: pcode 工具失败
+            ValueError: 未知的优化级别
+        """
+        level = normalize_level(level)
+        key = self.cache_key(source_code, level)
+        program = self._cached(key)
+        if program is None:
+            program = self._prepare(self.compile_pcode(source_code), level)
+            self._store(key, program)
+        return program
+
+    def _prepare(self, result, level=None):
+        """由 pcode 工具的结果得到四元式，compiled 引擎再编译为 CompiledProgram"""
+        if result.returncode != 0:
+            raise BuildError("pcode", result)
+        functions = PcodeToQuadsTranslator().translate(result.stdout)["functions"]
+        if level is not None:
+            functions = PassManager(level).optimize_quads(functions)
+        elif self.optimize:
+            functions = {name: QuadOptimizer.optimize(quads) for name, quads in functions.items()}
+        if self.engine == "compiled":
+            return CompiledProgram(functions)
+        return functions
+
+    def _vm(self, program, max_steps):
+        limit = min(max_steps, self.max_steps) if max_steps else self.max_steps
+        return ENGINES[self.engine](program, limit, self.max_output)
+
+    def run(self, source_code, input_str="", timeout=None, max_steps=None, level=None):
+        """
+        运行一个源程序
+
+        Args:
+            source_code: 源代码
+            input_str: 程序的标准输入
+            timeout: 为与 ProgramRunner 兼容而保留，虚拟机以指令数而不是时间限制运行
+            max_steps: 本次运行的指令数上限，不超过构造时的 max_steps
+            level: 四元式的优化级别，见 load
+
+        Returns:
+            subprocess.CompletedProcess: 运行结果，steps 属性为执行的四元式条数
+
+        Raises:
+            BuildError: pcode 工具失败
+        """
+        return self._vm(self.load(source_code, level), max_steps).run(input_str)
+
+    def stream(self, source_code, input_str="", timeout=None, max_steps=None, level=None):
+        """
+        与 ProgramRunner.stream 相同的事件序列
+
+        程序运行很快，输出在运行结束后作为一个 stdout 事件产出。
+
+        Yields:
+            tuple: (事件名, 数据)
+        """
+        vm = self._vm(self.load(source_code, level), max_steps)
+        yield "start", None
+        yield from self._events(vm, vm.run(input_str))
+
+    def _events(self, vm, result):
+        if result.stdout:
+            yield "stdout", result.stdout
+        yield "exit", {
+            "returncode": result.returncode,
+            "stderr": result.stderr,
+            "timeout": False,
+            "truncated": vm.output_bytes > self.max_output,
+            "bytes": len(result.stdout.encode("utf-8")),
+            "steps": result.steps,
+        }
+
+
+class AsyncVMRunner(VMRunner):
+    """VMRunner 的 asyncio 版本，翻译与执行放到线程中，不阻塞事件循环"""
+
+    def __init__(self, compile_pcode, **kwargs):
+        """
+        Args:
+            compile_pcode: 协程函数 compile_pcode(source_code)，返回 pcode 工具的 CompletedProcess
+            kwargs: 与 VMRunner 相同
+        """
+        super().__init__(compile_pcode, **kwargs)
+
+    async def load(self, source_code, level=None):
+        level = normalize_level(level)
+        key = await asyncio.to_thread(self.cache_key, source_code, level)  # 哈希工具文件
+        program = self._cached(key)
+        if program is None:
+            result = await self.compile_pcode(source_code)
+            program = await asyncio.to_thread(self._prepare, result, level)
+            self._store(key, program)
+        return program
+
+    async def run(self, source_code, input_str="", timeout=None, max_steps=None, level=None):
+        vm = self._vm(await self.load(source_code, level), max_steps)
+        return await asyncio.to_thread(vm.run, input_str)
+
+    async def stream(self, source_code, input_str="", timeout=None, max_steps=None, level=None):
+        vm = self._vm(await self.load(source_code, level), max_steps)
+        yield "start", None
+        result = await asyncio.to_thread(vm.run, input_str)
+        for event in self._events(vm, result):
+            yield event
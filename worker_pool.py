@@ -0,0 +1,556 @@
+"""
+编译器前端常驻进程池模块
+
+每个前端工具 (Lexical / symbol_table / ast / pcode / acc) 以 --serve 模式
+常驻运行，通过管道按帧收发请求 (协议见 common/serve.h)，避免每个请求都
+fork/exec 一次新进程。线程版本供 Flask 使用，asyncio 版本供 asgi.py 使用。
+"""
+import asyncio
+import queue
+import subprocess
+import threading
+import time
+
+
+def crash_returncode(returncode):
+    """
+    常驻进程异常退出时返回给调用方的返回码
+
+    总是负数: 进程以正常退出码（如 exit(1)）结束时也与编译错误区分开，
+    调用方据此不缓存这类临时性的结果。
+    """
+    return -abs(returncode) if returncode else -1
+
+
+class CompilerWorker:
+    """单个常驻前端进程"""
+
+    def __init__(self, exe_path):
+        """
+        初始化工作进程（延迟启动）
+
+        Args:
+            exe_path: 前端工具可执行文件路径
+        """
+        self.exe_path = exe_path
+        self.proc = None
+        self.last_used = 0.0
+        self.requests = 0
+
+    def start(self):
+        """启动常驻进程"""
+        self.proc = subprocess.Popen(
+            [self.exe_path, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self.last_used = time.monotonic()
+        self.requests = 0
+
+    def stop(self):
+        """结束常驻进程"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.kill()
+            self.proc.wait()
+        except OSError:
+            pass
+        self.proc = None
+
+    def restart(self):
+        """重启常驻进程"""
+        self.stop()
+        self.start()
+
+    def alive(self):
+        """进程是否仍在运行"""
+        return self.proc is not None and self.proc.poll() is None
+
+    def _read_exact(self, size):
+        """从管道中读满 size 个字节"""
+        chunks = []
+        while size > 0:
+            chunk = self.proc.stdout.read(size)
+            if not chunk:
+                raise EOFError("worker pipe closed")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _exchange(self, length, payload, timeout):
+        """
+        发送一帧请求并读取一帧响应
+
+        超时由定时器强制结束子进程实现，读操作随之因管道关闭而返回。
+
+        Returns:
+            tuple: (status, stdout_bytes, stderr_bytes)
+        """
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            self.proc.kill()
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, on_timeout)
+            timer.start()
+        try:
+            self.proc.stdin.write(f"{length}\n".encode() + payload)
+            self.proc.stdin.flush()
+            header = self.proc.stdout.readline()
+            if not header:
+                raise EOFError("worker pipe closed")
+            status, out_len, err_len = map(int, header.split())
+            out = self._read_exact(out_len)
+            err = self._read_exact(err_len)
+            return status, out, err
+        except (OSError, EOFError, ValueError):
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired([self.exe_path, "--serve"], timeout)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.last_used = time.monotonic()
+
+    def ping(self, timeout=1):
+        """
+        心跳检测
+
+        Returns:
+            bool: 进程能否正常应答
+        """
+        if not self.alive():
+            return False
+        try:
+            return self._exchange(-1, b"", timeout)[0] == 0
+        except (OSError, EOFError, ValueError, subprocess.TimeoutExpired):
+            return False
+
+    def run(self, source_code, timeout=None):
+        """
+        处理一个源程序
+
+        Args:
+            source_code: 源代码字符串
+            timeout: 超时时间（秒），None 表示不限制
+
+        Returns:
+            subprocess.CompletedProcess: 与 subprocess.run 的返回值一致
+        """
+        if not self.alive():
+            self.start()
+        data = source_code.encode("utf-8")
+        status, out, err = self._exchange(len(data), data, timeout)
+        self.requests += 1
+        return subprocess.CompletedProcess(
+            [self.exe_path],
+            status,
+            out.decode("utf-8", errors="replace"),
+            err.decode("utf-8", errors="replace")
+        )
+
+
+class WorkerPool:
+    """单个前端工具的常驻进程池"""
+
+    def __init__(self, exe_path, size=2, health_interval=30.0, max_requests=1000):
+        """
+        初始化进程池
+
+        Args:
+            exe_path: 前端工具可执行文件路径
+            size: 常驻进程数量
+            health_interval: 空闲超过该秒数的进程在取用前先做心跳检测
+            max_requests: 单个进程处理请求数上限，达到后重启以回收内存
+        """
+        self.exe_path = exe_path
+        self.size = size
+        self.health_interval = health_interval
+        self.max_requests = max_requests
+        self.idle = queue.Queue()
+        self.restarts = 0
+        for _ in range(size):
+            self.idle.put(CompilerWorker(exe_path))
+
+    def _acquire(self):
+        """取出一个可用的工作进程，必要时重启"""
+        worker = self.idle.get()
+        try:
+            if not worker.alive():
+                if worker.proc is not None:
+                    self.restarts += 1
+                worker.restart()
+            elif worker.requests >= self.max_requests:
+                worker.restart()
+            elif time.monotonic() - worker.last_used > self.health_interval and not worker.ping():
+                self.restarts += 1
+                worker.restart()
+        except Exception:
+            self.idle.put(worker)
+            raise
+        return worker
+
+    def run(self, source_code, timeout=None):
+        """
+        用池中的进程处理一个源程序
+
+        进程崩溃时重启并返回非零返回码；超时时结束并重启进程，
+        然后抛出 subprocess.TimeoutExpired，与 subprocess.run 的行为一致。
+
+        Returns:
+            subprocess.CompletedProcess: 处理结果
+        """
+        worker = self._acquire()
+        try:
+            return worker.run(source_code, timeout)
+        except subprocess.TimeoutExpired:
+            self.restarts += 1
+            worker.restart()
+            raise
+        except (OSError, EOFError, ValueError):
+            # 进程在处理过程中崩溃，或应答格式错误（此时进程可能仍在运行，先结束它）
+            returncode = -1
+            if worker.proc is not None:
+                if worker.proc.poll() is None:
+                    worker.proc.kill()
+                returncode = worker.proc.wait()
+            self.restarts += 1
+            worker.restart()
+            return subprocess.CompletedProcess(
+                [self.exe_path], crash_returncode(returncode), "", "编译进程异常退出"
+            )
+        finally:
+            self.idle.put(worker)
+
+    def health_check(self):
+        """
+        对当前空闲的进程逐个做心跳检测，失败的进程被重启
+
+        Returns:
+            int: 被重启的进程数量
+        """
+        restarted = 0
+        for _ in range(self.idle.qsize()):
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker.proc is not None and not worker.ping():
+                worker.restart()
+                restarted += 1
+            self.idle.put(worker)
+        self.restarts += restarted
+        return restarted
+
+    def close(self):
+        """结束池中所有空闲进程"""
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+class ToolRunner:
+    """按工具名调用前端：进程池模式或每次启动新进程"""
+
+    def __init__(self, tools, pool_size=2, **pool_options):
+        """
+        Args:
+            tools: {工具名: 可执行文件路径}
+            pool_size: 每个工具的常驻进程数，0 表示不使用进程池
+            pool_options: 传给 WorkerPool 的其他参数
+        """
+        self.tools = tools
+        self.pool_size = pool_size
+        self.pool_options = pool_options
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def _pool(self, name):
+        with self.lock:
+            if name not in self.pools:
+                self.pools[name] = WorkerPool(self.tools[name], self.pool_size, **self.pool_options)
+            return self.pools[name]
+
+    def run(self, name, source_code, timeout=None):
+        """
+        调用指定前端处理源程序
+
+        Returns:
+            subprocess.CompletedProcess: 处理结果
+        """
+        if self.pool_size <= 0:
+            return subprocess.run(
+                [self.tools[name]],
+                input=source_code,
+                text=True,
+                encoding="utf-8",
+                capture_output=True,
+                timeout=timeout
+            )
+        return self._pool(name).run(source_code, timeout)
+
+    def health_check(self):
+        """
+        检查所有已创建的进程池
+
+        Returns:
+            dict: {工具名: 被重启的进程数量}
+        """
+        with self.lock:
+            pools = dict(self.pools)
+        return {name: pool.health_check() for name, pool in pools.items()}
+
+    def stats(self):
+        """进程池状态"""
+        with self.lock:
+            pools = dict(self.pools)
+        return {
+            name: {"size": pool.size, "idle": pool.idle.qsize(), "restarts": pool.restarts}
+            for name, pool in pools.items()
+        }
+
+    def close(self):
+        """结束所有常驻进程"""
+        with self.lock:
+            for pool in self.pools.values():
+                pool.close()
+            self.pools.clear()
+
+
+# ---------- asyncio 版本，供 asgi.py 使用 ----------
+
+async def run_process_async(args, input_str=None, timeout=None):
+    """
+    以非阻塞方式运行子进程，超时时结束子进程
+
+    Args:
+        args: 命令行参数列表
+        input_str: 标准输入内容
+        timeout: 超时时间（秒），None 表示不限制
+
+    Returns:
+        subprocess.CompletedProcess: 运行结果（stdout/stderr 为字符串）
+
+    Raises:
+        subprocess.TimeoutExpired: 运行超时
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=subprocess.PIPE if input_str is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    data = input_str.encode("utf-8") if input_str is not None else None
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(data), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(args, timeout)
+    return subprocess.CompletedProcess(
+        args,
+        proc.returncode,
+        out.decode("utf-8", errors="replace"),
+        err.decode("utf-8", errors="replace")
+    )
+
+
+class AsyncCompilerWorker:
+    """单个常驻前端进程（asyncio 版本）"""
+
+    def __init__(self, exe_path):
+        self.exe_path = exe_path
+        self.proc = None
+        self.last_used = 0.0
+        self.requests = 0
+
+    async def start(self):
+        """启动常驻进程"""
+        self.proc = await asyncio.create_subprocess_exec(
+            self.exe_path, "--serve",
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.last_used = time.monotonic()
+        self.requests = 0
+
+    async def stop(self):
+        """结束常驻进程"""
+        if self.proc is None:
+            return
+        try:
+            self.proc.kill()
+            await self.proc.wait()
+        except (OSError, ProcessLookupError):
+            pass
+        self.proc = None
+
+    async def restart(self):
+        """重启常驻进程"""
+        await self.stop()
+        await self.start()
+
+    def alive(self):
+        """进程是否仍在运行"""
+        return self.proc is not None and self.proc.returncode is None
+
+    async def _exchange(self, length, payload):
+        self.proc.stdin.write(f"{length}\n".encode() + payload)
+        await self.proc.stdin.drain()
+        header = await self.proc.stdout.readline()
+        if not header:
+            raise EOFError("worker pipe closed")
+        status, out_len, err_len = map(int, header.split())
+        out = await self.proc.stdout.readexactly(out_len)
+        err = await self.proc.stdout.readexactly(err_len)
+        self.last_used = time.monotonic()
+        return status, out, err
+
+    async def ping(self, timeout=1):
+        """心跳检测"""
+        if not self.alive():
+            return False
+        try:
+            return (await asyncio.wait_for(self._exchange(-1, b""), timeout))[0] == 0
+        except (OSError, EOFError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return False
+
+    async def run(self, source_code, timeout=None):
+        """
+        处理一个源程序，超时时结束进程并抛出 subprocess.TimeoutExpired
+
+        Returns:
+            subprocess.CompletedProcess: 处理结果
+        """
+        if not self.alive():
+            await self.start()
+        data = source_code.encode("utf-8")
+        try:
+            status, out, err = await asyncio.wait_for(self._exchange(len(data), data), timeout)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise subprocess.TimeoutExpired([self.exe_path, "--serve"], timeout)
+        self.requests += 1
+        return subprocess.CompletedProcess(
+            [self.exe_path],
+            status,
+            out.decode("utf-8", errors="replace"),
+            err.decode("utf-8", errors="replace")
+        )
+
+
+class AsyncWorkerPool:
+    """单个前端工具的常驻进程池（asyncio 版本）"""
+
+    def __init__(self, exe_path, size=2, health_interval=30.0, max_requests=1000):
+        self.exe_path = exe_path
+        self.size = size
+        self.health_interval = health_interval
+        self.max_requests = max_requests
+        self.idle = asyncio.Queue()
+        self.restarts = 0
+        for _ in range(size):
+            self.idle.put_nowait(AsyncCompilerWorker(exe_path))
+
+    async def _acquire(self):
+        worker = await self.idle.get()
+        try:
+            if not worker.alive():
+                if worker.proc is not None:
+                    self.restarts += 1
+                await worker.restart()
+            elif worker.requests >= self.max_requests:
+                await worker.restart()
+            elif time.monotonic() - worker.last_used > self.health_interval and not await worker.ping():
+                self.restarts += 1
+                await worker.restart()
+        except BaseException:
+            self.idle.put_nowait(worker)
+            raise
+        return worker
+
+    async def run(self, source_code, timeout=None):
+        """
+        用池中的进程处理一个源程序，语义与 WorkerPool.run 一致
+
+        Returns:
+            subprocess.CompletedProcess: 处理结果
+        """
+        worker = await self._acquire()
+        try:
+            return await worker.run(source_code, timeout)
+        except subprocess.TimeoutExpired:
+            self.restarts += 1
+            raise
+        except asyncio.CancelledError:
+            # 请求被取消时管道可能停在半帧上，直接丢弃该进程
+            if worker.proc is not None and worker.proc.returncode is None:
+                worker.proc.kill()
+            worker.proc = None
+            raise
+        except (OSError, EOFError, ValueError, asyncio.IncompleteReadError):
+            returncode = -1
+            if worker.proc is not None:
+                if worker.proc.returncode is None:
+                    try:
+                        worker.proc.kill()
+                    except ProcessLookupError:
+                        pass
+                returncode = await worker.proc.wait()
+            self.restarts += 1
+            await worker.stop()
+            return subprocess.CompletedProcess(
+                [self.exe_path], crash_returncode(returncode), "", "编译进程异常退出"
+            )
+        finally:
+            self.idle.put_nowait(worker)
+
+    async def close(self):
+        """结束池中所有空闲进程"""
+        while not self.idle.empty():
+            await self.idle.get_nowait().stop()
+
+
+class AsyncToolRunner:
+    """按工具名调用前端（asyncio 版本）"""
+
+    def __init__(self, tools, pool_size=2, **pool_options):
+        self.tools = tools
+        self.pool_size = pool_size
+        self.pool_options = pool_options
+        self.pools = {}
+
+    async def run(self, name, source_code, timeout=None):
+        """
+        调用指定前端处理源程序
+
+        Returns:
+            subprocess.CompletedProcess: 处理结果
+        """
+        if self.pool_size <= 0:
+            return await run_process_async([self.tools[name]], source_code, timeout)
+        if name not in self.pools:
+            self.pools[name] = AsyncWorkerPool(self.tools[name], self.pool_size, **self.pool_options)
+        return await self.pools[name].run(source_code, timeout)
+
+    def stats(self):
+        """进程池状态"""
+        return {
+            name: {"size": pool.size, "idle": pool.idle.qsize(), "restarts": pool.restarts}
+            for name, pool in self.pools.items()
+        }
+
+    async def close(self):
+        """结束所有常驻进程"""
+        for pool in self.pools.values():
+            await pool.close()
+        self.pools.clear()